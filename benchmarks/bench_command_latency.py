@@ -0,0 +1,78 @@
+"""Measure the latency between a command writing a line and conda-tui receiving it.
+
+The child process writes timestamped lines at a fixed interval. We compare the
+pipe-based `CommandRunner` against the previous strategy of redirecting output to
+a temporary file and polling it every 100 ms.
+
+Usage: python benchmarks/bench_command_latency.py [--lines 50]
+
+"""
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from conda_tui.runner import CommandRunner
+
+CHILD = """
+import sys, time
+for _ in range({lines}):
+    print(time.perf_counter(), flush=True)
+    time.sleep({interval})
+"""
+
+
+async def poll_tempfile(command: list[str]) -> AsyncIterator[str]:
+    """The original strategy, kept for comparison."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir, "tmp.log")
+        with tmp_path.open("w") as writer, tmp_path.open("r", 1) as reader:
+            process = subprocess.Popen(command, stdout=writer, stderr=writer)
+            while process.poll() is None:
+                yield reader.read()
+                await asyncio.sleep(0.1)
+            yield reader.read()
+
+
+async def measure(chunks: AsyncIterator[str]) -> list[float]:
+    latencies = []
+    partial = ""
+    async for chunk in chunks:
+        received = time.perf_counter()
+        # Chunks may end part way through a line, which is completed by the next
+        *lines, partial = (partial + chunk).split("\n")
+        for line in lines:
+            latencies.append(received - float(line))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.013)
+    args = parser.parse_args()
+
+    # perf_counter is system-wide on Linux and macOS, so it can be compared
+    # between the parent and child processes
+    child = CHILD.format(lines=args.lines, interval=args.interval)
+    command = [sys.executable, "-c", child]
+
+    for name, chunks in [
+        ("tempfile poll", poll_tempfile(command)),
+        ("pipe stream", CommandRunner(command).iter_chunks()),
+    ]:
+        latencies = asyncio.run(measure(chunks))
+        print(
+            f"{name:>14}: mean {statistics.mean(latencies) * 1000:6.1f} ms, "
+            f"max {max(latencies) * 1000:6.1f} ms over {len(latencies)} lines"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Compare bulk description loading against reading about.json one package at a time.
+
+Builds a synthetic package cache of extracted packages, each with an `about.json`
+of realistic size, and times both strategies.
+
+Usage: python benchmarks/bench_descriptions.py [--packages 2000] [--drop-caches]
+
+Passing `--drop-caches` (Linux, requires root) evicts the page cache before each
+run, which is representative of opening an environment for the first time.
+
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from conda_tui import package as package_module
+from conda_tui.package import Package
+from conda_tui.package import PackageSummary
+from conda_tui.package import load_descriptions
+
+
+def make_package_cache(root: Path, count: int) -> list[PackageSummary]:
+    summaries = []
+    for i in range(count):
+        package_dir = root / f"pkg-{i}-1.0-0"
+        (package_dir / "info").mkdir(parents=True)
+        about = {
+            "channels": ["https://conda.anaconda.org/conda-forge"],
+            "description": "A long description. " * 50,
+            "extra": {"recipe-maintainers": [f"user{j}" for j in range(20)]},
+            "home": "https://example.com",
+            "license": "BSD-3-Clause",
+            "root_pkgs": [f"dep-{j} 1.0 0" for j in range(200)],
+            "summary": f"Package number {i}",
+        }
+        with (package_dir / "info" / "about.json").open("w") as fh:
+            json.dump(about, fh, indent=2, sort_keys=True)
+        summaries.append(
+            PackageSummary(
+                f"pkg-{i}", "1.0", "0", "conda-forge", None, "", str(package_dir)
+            )
+        )
+    return summaries
+
+
+def per_package(summaries: list[PackageSummary]) -> list[str]:
+    """The original strategy: fully parse each about.json, one after another."""
+    descriptions = []
+    for summary in summaries:
+        with Path(summary.package_dir, "info", "about.json").open("r") as fh:
+            descriptions.append(json.load(fh).get("summary", ""))
+    return descriptions
+
+
+def bulk(summaries: list[PackageSummary], prefix: Path) -> list[str]:
+    package_module._description_cache.clear()
+    packages = [Package(summary, prefix) for summary in summaries]
+    for _ in load_descriptions(packages):
+        pass
+    return [pkg.description for pkg in packages]
+
+
+def drop_caches() -> None:
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as fh:
+        fh.write("3\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--drop-caches", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        summaries = make_package_cache(root, args.packages)
+        assert per_package(summaries) == bulk(summaries, root)
+
+        for name, func in [
+            ("per-package", lambda: per_package(summaries)),
+            ("bulk", lambda: bulk(summaries, root)),
+        ]:
+            timings = []
+            for _ in range(args.repeat):
+                if args.drop_caches:
+                    drop_caches()
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            print(f"{name:>12}: best {min(timings) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Measure how quickly the output of a verbose command reaches the screen.
+
+A `ShellCommandScreen` runs a command which writes many lines as quickly as it
+can, and we measure the lines per second until the last line is in the log, the
+number of lines kept, and the responsiveness of the app while the output is
+arriving. We compare the buffered `CommandLog` with the previous strategy of
+reading line by line and writing each line to an unbounded `Log`, of which a
+copy is kept for comparison.
+
+Usage: python benchmarks/bench_log_throughput.py [--lines 200000] [--max-lines 10000]
+
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from textual.app import App
+from textual.widgets import Log
+
+from conda_tui import screens
+from conda_tui.runner import LINE_LIMIT
+from conda_tui.widgets.progress import ShellCommandProgress
+
+CHILD = """
+import sys
+write = sys.stdout.write
+for i in range({lines}):
+    write(f"{{i:08d}} Linking package-{{i}}-1.0.0-py311_0 into the environment\\n")
+"""
+
+
+class LineByLineShellCommandProgress(ShellCommandProgress):
+    """The original strategy, kept for comparison."""
+
+    async def run_command(self, command: list[str], log: Log):
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=LINE_LIMIT,
+        )
+        assert process.stdout is not None
+        async for line in process.stdout:
+            log.write(line.decode(errors="replace"))
+        returncode = await process.wait()
+        log.write(f"\nFinished with status code {returncode}")
+
+
+async def measure(
+    progress_class: type, lines: int, max_lines: Optional[int], log_dir: Optional[Path]
+) -> dict[str, float]:
+    screens.ShellCommandProgress = progress_class
+    command = [sys.executable, "-c", CHILD.format(lines=lines)]
+    app = App()
+    async with app.run_test(size=(120, 40)):
+        start = time.perf_counter()
+        await app.push_screen(
+            screens.ShellCommandScreen(command, max_lines=max_lines, log_dir=log_dir)
+        )
+        log = app.screen.query_one(Log)
+        # The delay of the event loop, sampled while output arrives
+        delays = []
+        while not any(line.startswith("Finished") for line in log.lines[-3:]):
+            before = time.perf_counter()
+            await asyncio.sleep(0.01)
+            delays.append(time.perf_counter() - before - 0.01)
+        elapsed = time.perf_counter() - start
+        kept = len(log.lines)
+    return {
+        "rate": lines / elapsed,
+        "kept": kept,
+        "delay": statistics.median(delays) if delays else 0.0,
+        "worst delay": max(delays, default=0.0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--max-lines", type=int, default=10_000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir:
+        for name, progress_class, max_lines, spill_dir in [
+            ("line by line", LineByLineShellCommandProgress, None, None),
+            ("buffered", ShellCommandProgress, args.max_lines, None),
+            ("buffered+spill", ShellCommandProgress, args.max_lines, Path(log_dir)),
+        ]:
+            results[name] = asyncio.run(
+                measure(progress_class, args.lines, max_lines, spill_dir)
+            )
+
+    # Output is printed after the apps exit, since Textual captures stdout
+    for name, result in results.items():
+        print(
+            f"{name:>14}: {result['rate']:9.0f} lines/s, "
+            f"{result['kept']:7d} lines kept, "
+            f"event loop delay {result['delay'] * 1000:6.1f} ms median, "
+            f"{result['worst delay'] * 1000:6.1f} ms worst"
+        )
+
+
+if __name__ == "__main__":
+    main()
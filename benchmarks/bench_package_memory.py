@@ -0,0 +1,133 @@
+"""Measure the memory footprint and attribute access cost of each package.
+
+A synthetic prefix is generated, with conda-meta records of a realistic size
+(including file lists and paths_data). We then compare the retained memory per
+package of:
+
+* The original `Package`, which wrapped the full conda `PrefixRecord` of each
+  package, loaded through `PrefixData`, and proxied attributes to it via
+  `__getattr__`. A copy is kept for comparison.
+* The current slotted `Package`, loaded from the package listing cache.
+
+Usage: python benchmarks/bench_package_memory.py [--packages 5000] [--files 200]
+
+"""
+
+import argparse
+import gc
+import json
+import os
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any
+from typing import Callable
+
+from conda.core.prefix_data import PrefixData
+from conda.models.records import PrefixRecord
+
+from conda_tui.package import Package
+from conda_tui.package import load_package_summaries
+
+
+class BaselinePackage:
+    """The original strategy, kept for comparison."""
+
+    def __init__(self, record: PrefixRecord):
+        self._record = record
+        self._update_available = None
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._record, item)
+
+
+def make_prefix(root: Path, packages: int, files: int) -> Path:
+    conda_meta = root / "conda-meta"
+    conda_meta.mkdir(parents=True)
+    for i in range(packages):
+        name = f"package-{i:05d}"
+        paths = [
+            f"lib/python3.11/site-packages/{name}/module_{j}.py" for j in range(files)
+        ]
+        record = {
+            "name": name,
+            "version": "1.0.0",
+            "build": "py311_0",
+            "build_number": 0,
+            "channel": "https://conda.anaconda.org/conda-forge/linux-64",
+            "subdir": "linux-64",
+            "fn": f"{name}-1.0.0-py311_0.conda",
+            "url": f"https://conda.anaconda.org/conda-forge/linux-64/{name}-1.0.0-py311_0.conda",
+            "md5": "0" * 32,
+            "depends": ["python >=3.11,<3.12.0a0", "libgcc-ng >=12"],
+            "files": paths,
+            "paths_data": {
+                "paths_version": 1,
+                "paths": [
+                    {
+                        "_path": path,
+                        "path_type": "hardlink",
+                        "sha256": "0" * 64,
+                        "size_in_bytes": 1024,
+                    }
+                    for path in paths
+                ],
+            },
+        }
+        (conda_meta / f"{name}-1.0.0-py311_0.json").write_text(json.dumps(record))
+    return root
+
+
+def retained(load: Callable[[], list]) -> tuple[list, int]:
+    """The objects created by `load`, and the memory they retain."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = load()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return objects, size
+
+
+def load_baseline_packages(prefix: Path) -> list[BaselinePackage]:
+    """Load the packages as the package table originally did."""
+    prefix_data = PrefixData(str(prefix), pip_interop_enabled=True)
+    packages = [BaselinePackage(record) for record in prefix_data.iter_records()]
+    return sorted(packages, key=lambda x: x.name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=5000)
+    parser.add_argument("--files", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["CONDA_TUI_CACHE_DIR"] = str(Path(tmp_dir, "cache"))
+        prefix = make_prefix(Path(tmp_dir, "prefix"), args.packages, args.files)
+        # Populate the listing cache, so that below, only the summaries are loaded
+        load_package_summaries(prefix)
+
+        results = {}
+        baseline, results["baseline Package"] = retained(
+            lambda: load_baseline_packages(prefix)
+        )
+        packages, results["slotted Package"] = retained(
+            lambda: [Package(s, prefix) for s in load_package_summaries(prefix)]
+        )
+
+    for name, size in results.items():
+        print(f"{name:>16}: {size / args.packages:8.0f} B/package")
+
+    for name, package in [
+        ("baseline Package", baseline[0]),
+        ("slotted Package", packages[0]),
+    ]:
+        seconds = min(timeit.repeat(lambda: package.version, number=100_000, repeat=5))
+        print(f"{name:>16}: {seconds * 10_000:8.1f} ns/attribute access")
+
+
+if __name__ == "__main__":
+    main()
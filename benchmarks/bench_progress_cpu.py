@@ -0,0 +1,105 @@
+"""Measure the CPU used by the progress of a shell command, while running and idle.
+
+A `ShellCommandScreen` runs a command which writes a line every 100 ms, and then
+stays open after it finishes. We measure the CPU time of the whole process while
+the command runs and while the screen is idle, for the current progress display
+and for the previous strategy of re-rendering on a fixed 60 Hz timer, of which a
+copy is kept for comparison.
+
+Usage: python benchmarks/bench_progress_cpu.py [--seconds 5]
+
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any
+
+from rich.progress import BarColumn
+from rich.progress import Progress
+from rich.progress import TaskProgressColumn
+from rich.progress import TextColumn
+from textual.app import App
+from textual.widgets import Log
+from textual.widgets import Static
+
+from conda_tui import screens
+from conda_tui.runner import CommandRunner
+from conda_tui.widgets.progress import ShellCommandProgress
+
+CHILD = """
+import time
+for i in range({lines}):
+    print("line", i, flush=True)
+    time.sleep(0.1)
+"""
+
+
+class FixedRateShellCommandProgress(Static):
+    """The original strategy, kept for comparison."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._bar = Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+        )
+
+    def on_mount(self) -> None:
+        self.set_interval(1 / 60, lambda: self.update(self._bar))
+
+    async def run_command(self, command: list[str], log: Log):
+        for task_id in self._bar.task_ids:
+            self._bar.remove_task(task_id)
+
+        with self._bar as bar:
+            task = bar.add_task(f"Running command: {' '.join(command)}", total=None)
+            runner = CommandRunner(command)
+            async for chunk in runner.iter_chunks():
+                log.write(chunk)
+            log.write(f"\nFinished with status code {runner.returncode}")
+            bar.update(task, total=1, completed=True)
+
+
+async def measure(progress_class: type, seconds: float) -> dict[str, float]:
+    screens.ShellCommandProgress = progress_class
+    command = [sys.executable, "-c", CHILD.format(lines=int(seconds * 10))]
+    app = App()
+    async with app.run_test(size=(120, 40)):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        await app.push_screen(screens.ShellCommandScreen(command))
+        log = app.screen.query_one(Log)
+        while not any(line.startswith("Finished") for line in log.lines):
+            await asyncio.sleep(0.05)
+        running = (time.process_time() - start_cpu) / (time.perf_counter() - start_wall)
+
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        await asyncio.sleep(seconds)
+        idle = (time.process_time() - start_cpu) / (time.perf_counter() - start_wall)
+    return {"running": running, "idle": idle}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for name, progress_class in [
+        ("fixed 60 Hz", FixedRateShellCommandProgress),
+        ("on change", ShellCommandProgress),
+    ]:
+        results[name] = asyncio.run(measure(progress_class, args.seconds))
+
+    # Output is printed after the apps exit, since Textual captures stdout
+    for name, result in results.items():
+        print(
+            f"{name:>12}: {result['running'] * 100:5.1f}% CPU while running, "
+            f"{result['idle'] * 100:5.1f}% CPU while idle"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure how long conda-tui takes to start, and fail if it exceeds a budget.
+
+Two things are measured, each in a fresh interpreter:
+
+* The cumulative import time of `conda_tui.app`, using `python -X importtime`.
+  Any conda module imported along the way is reported, since conda should only
+  be loaded once the home screen is up.
+* The wall-clock time until the home screen has been drawn, in a headless app.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--budget-ms 500]
+
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+FIRST_SCREEN = """
+import time
+start = time.perf_counter()
+from conda_tui.app import CondaTUI
+
+async def auto_pilot(pilot):
+    await pilot.pause()
+    pilot.app.exit(time.perf_counter() - start)
+
+print(CondaTUI().run(headless=True, auto_pilot=auto_pilot))
+"""
+
+
+def measure_imports() -> tuple[float, dict[str, float]]:
+    """The cumulative import time of the app, and the self time of every module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import conda_tui.app"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    self_times, total = {}, 0.0
+    for match in IMPORT_LINE.finditer(result.stderr):
+        self_us, cumulative_us, _, module = match.groups()
+        self_times[module] = int(self_us) / 1000
+        if module == "conda_tui.app":
+            total = int(cumulative_us) / 1000
+    return total, self_times
+
+
+def measure_first_screen() -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_SCREEN], capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=500,
+        help="The maximum median import time of conda_tui.app (default: %(default)s)",
+    )
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    totals, self_times = [], {}
+    for _ in range(args.runs):
+        total, self_times = measure_imports()
+        totals.append(total)
+    first_screen = [measure_first_screen() for _ in range(args.runs)]
+
+    conda_modules = sorted(m for m in self_times if m.split(".")[0] == "conda")
+    median = statistics.median(totals)
+    print(f"import conda_tui.app: median {median:6.1f} ms over {args.runs} runs")
+    print(f"home screen drawn:    median {statistics.median(first_screen):6.1f} ms")
+    print("slowest modules (self time, last run):")
+    for module, ms in sorted(self_times.items(), key=lambda i: -i[1])[: args.top]:
+        print(f"  {ms:6.1f} ms  {module}")
+
+    failures = []
+    if conda_modules:
+        failures.append(f"conda was imported at startup: {', '.join(conda_modules)}")
+    if median > args.budget_ms:
+        failures.append(f"import time {median:.1f} ms exceeds {args.budget_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare per-row cell updates against keyed, batched diffs on a large package table.
+
+Usage: python benchmarks/bench_table_updates.py [--rows 5000]
+
+"""
+
+import argparse
+import asyncio
+import time
+
+from rich.text import Text
+from textual.app import App
+from textual.app import ComposeResult
+
+from conda_tui.widgets import BatchedDataTable
+
+UP = Text("\N{UPWARDS ARROW}")
+OK = Text("\N{HEAVY CHECK MARK}")
+
+
+class TableApp(App):
+    def __init__(self, rows: int):
+        super().__init__()
+        self.names = [f"package-{i:05d}" for i in range(rows)]
+
+    def compose(self) -> ComposeResult:
+        table = BatchedDataTable()
+        for key in ["name", "status", "version"]:
+            table.add_column(key, key=key)
+        for name in self.names:
+            table.add_row(name, OK, "1.0", key=name)
+        yield table
+
+
+def update_every_row(table: BatchedDataTable, names: list[str], updates: set) -> None:
+    """The original strategy: two coordinate-based updates for every row."""
+    for row_num, name in enumerate(names):
+        if name in updates:
+            table.update_cell_at((row_num, 2), "1.0 \N{RIGHTWARDS ARROW} 2.0")
+        table.update_cell_at((row_num, 1), UP if name in updates else OK)
+
+
+def update_diff(table: BatchedDataTable, names: list[str], updates: set) -> None:
+    changes = {}
+    for name in names:
+        status = UP if name in updates else OK
+        if table.get_cell(name, "status") is not status:
+            changes[name, "status"] = status
+            version = "1.0 \N{RIGHTWARDS ARROW} 2.0" if name in updates else "1.0"
+            changes[name, "version"] = version
+    table.update_cells(changes)
+
+
+async def run(rows: int, changed: int, repeat: int) -> dict[str, float]:
+    results = {}
+    app = TableApp(rows)
+    async with app.run_test(size=(120, 50)) as pilot:
+        table = app.query_one(BatchedDataTable)
+        for name, func in [
+            ("every row", update_every_row),
+            ("keyed diff", update_diff),
+        ]:
+            timings = []
+            for i in range(repeat):
+                # Alternate between two result sets, so each run has real changes
+                offset = (i % 2) * changed
+                updates = set(app.names[offset : offset + changed])
+                start = time.perf_counter()
+                with app.batch_update():
+                    func(table, app.names, updates)
+                await pilot.pause()
+                timings.append(time.perf_counter() - start)
+            results[name] = min(timings)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--changed", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    # Output is printed after the app exits, since Textual captures stdout
+    results = asyncio.run(run(args.rows, args.changed, args.repeat))
+    for name, best in results.items():
+        print(
+            f"{name:>10}: best {best * 1000:7.1f} ms "
+            f"({args.changed} of {args.rows} rows changed)"
+        )
+
+
+if __name__ == "__main__":
+    main()
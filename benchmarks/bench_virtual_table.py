@@ -0,0 +1,118 @@
+"""Compare a DataTable against the virtualized table for a very large package list.
+
+For each table, we measure the time to add all rows and draw the first frame,
+the time to page through the table, and the memory retained by the table.
+
+Usage: python benchmarks/bench_virtual_table.py [--rows 20000]
+
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from rich.text import Text
+from textual.app import App
+
+from conda_tui.widgets import BatchedDataTable
+from conda_tui.widgets import VirtualTable
+
+OK = Text("\N{HEAVY CHECK MARK}")
+COLUMNS = ["name", "description", "status", "version", "build", "channel"]
+
+
+def make_rows(count: int) -> list[tuple[str, tuple]]:
+    return [
+        (
+            f"package-{i:06d}",
+            (
+                f"package-{i:06d}",
+                f"A description of package number {i}",
+                OK,
+                f"1.{i % 100}.0",
+                f"py311h{i:06x}_0",
+                "conda-forge",
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def fill_data_table(table: BatchedDataTable, rows: list[tuple[str, tuple]]) -> None:
+    for key, cells in rows:
+        table.add_row(*cells, key=key)
+
+
+def fill_virtual_table(table: VirtualTable, rows: list[tuple[str, tuple]]) -> None:
+    table.add_rows(rows)
+
+
+async def run(make_table, fill, rows: list, pages: int) -> dict[str, float]:
+    app = App()
+    async with app.run_test(size=(160, 50)) as pilot:
+        table = make_table()
+        for key in COLUMNS:
+            table.add_column(key.title(), key=key)
+        start = time.perf_counter()
+        await app.mount(table)
+        fill(table, rows)
+        await pilot.pause()
+        first_frame = time.perf_counter() - start
+
+        table.focus()
+        start = time.perf_counter()
+        for _ in range(pages):
+            await pilot.press("pagedown")
+        paging = (time.perf_counter() - start) / pages
+
+        # Memory is measured separately, since tracing slows everything down
+        await table.remove()
+        table = make_table()
+        for key in COLUMNS:
+            table.add_column(key.title(), key=key)
+        await app.mount(table)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        fill(table, rows)
+        await pilot.pause()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+    return {"first frame": first_frame, "page down": paging, "memory": retained}
+
+
+def make_data_table() -> BatchedDataTable:
+    table = BatchedDataTable()
+    table.cursor_type = "row"
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    results = {}
+    for name, make_table, fill in [
+        ("DataTable", make_data_table, fill_data_table),
+        ("VirtualTable", VirtualTable, fill_virtual_table),
+    ]:
+        results[name] = asyncio.run(run(make_table, fill, rows, args.pages))
+
+    # Output is printed after the apps exit, since Textual captures stdout
+    for name, result in results.items():
+        print(
+            f"{name:>12}: first frame {result['first frame'] * 1000:8.1f} ms, "
+            f"page down {result['page down'] * 1000:6.1f} ms, "
+            f"retained {result['memory'] / 2**20:7.1f} MiB "
+            f"({result['memory'] / args.rows:6.0f} B/row)"
+        )
+
+
+if __name__ == "__main__":
+    main()
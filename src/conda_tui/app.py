@@ -1,15 +1,24 @@
 import argparse
 import sys
+from functools import cached_property
 from pathlib import Path
 from typing import Optional
 
-import conda.plugins
 from textual.app import App
 
+from conda_tui.package_index import PackageIndex
+from conda_tui.profiling import profiler
 from conda_tui.screens import EnvironmentScreen
 from conda_tui.screens import HomeScreen
 from conda_tui.screens import PackageListScreen
+from conda_tui.screens import PackageSearchScreen
+from conda_tui.screens import ProfileScreen
 from conda_tui.screens import ShellCommandScreen
+from conda_tui.updates import DEFAULT_UPDATE_JOBS
+from conda_tui.updates import DEFAULT_UPDATE_TTL
+from conda_tui.updates import UpdateChecker
+from conda_tui.watcher import Watcher
+from conda_tui.widgets.command_log import DEFAULT_MAX_LINES
 
 
 class CondaTUI(App):
@@ -17,19 +26,31 @@ class CondaTUI(App):
 
     TITLE = "conda-tui"
     CSS_PATH = Path("styles.css")
+    # Screens are constructed when they are first shown, not at import time
     SCREENS = {
-        "home": HomeScreen(),
-        "environments": EnvironmentScreen(),
-        "package_list": PackageListScreen(),
+        "home": HomeScreen,
+        "environments": EnvironmentScreen,
+        "package_list": PackageListScreen,
+        "package_search": PackageSearchScreen,
     }
     BINDINGS = [
         ("h", "switch_screen('home')", "Home"),
         ("e", "switch_screen('environments')", "Environments"),
+        ("f", "switch_screen('package_search')", "Find Package"),
         ("i", "run_command(['conda', 'info'])", "Info"),
         ("q", "quit", "Quit"),
         ("?", "run_command(['conda', '-h'])", "Help"),
     ]
 
+    # How long to reuse update check results for, in seconds
+    update_ttl: float = DEFAULT_UPDATE_TTL
+    # The maximum number of update checks to run concurrently
+    update_jobs: int = DEFAULT_UPDATE_JOBS
+    # The number of lines of command output to keep
+    log_lines: int = DEFAULT_MAX_LINES
+    # The directory in which to save the full output of commands, if any
+    log_dir: Optional[Path] = None
+
     def on_mount(self) -> None:
         """When we start up, push the home screen.
 
@@ -38,12 +59,63 @@ class CondaTUI(App):
 
         """
         self.push_screen("home")
+        self.run_worker(
+            warm_up_conda, group="warm-up", thread=True, exit_on_error=False
+        )
+
+    @cached_property
+    def update_checker(self) -> UpdateChecker:
+        """The update checker shared by all screens, so channel data is only loaded once."""
+        return UpdateChecker(max_workers=self.update_jobs, ttl=self.update_ttl)
+
+    @cached_property
+    def package_index(self) -> PackageIndex:
+        """The index of the packages in all environments, loaded from the cache."""
+        return PackageIndex.load()
+
+    @cached_property
+    def watcher(self) -> Watcher:
+        """The watcher shared by all screens, to refresh them when conda changes things."""
+        return Watcher()
+
+    def on_unmount(self) -> None:
+        if "watcher" in self.__dict__:
+            self.watcher.stop()
+
+    def enable_profiling(self) -> None:
+        """Record timings, and bind a key to show them in an overlay."""
+        profiler.enabled = True
+        self.bind("p", "toggle_profile", description="Profile")
+
+    def action_toggle_profile(self) -> None:
+        if isinstance(self.screen, ProfileScreen):
+            self.pop_screen()
+        elif profiler.enabled:
+            self.push_screen(ProfileScreen())
 
     def action_run_command(self, command: list[str]) -> None:
-        screen = ShellCommandScreen(command)
+        screen = ShellCommandScreen(
+            command, max_lines=self.log_lines, log_dir=self.log_dir
+        )
         self.push_screen(screen)
 
 
+def warm_up_conda() -> None:
+    """Import conda and initialize its context in the background.
+
+    Nothing from conda is imported until it is needed, so the home screen is
+    drawn without waiting for it. This loads it while the user is still on the
+    home screen, so the environment list doesn't have to wait either.
+
+    """
+    from conda.base.context import context
+    from conda.core.envs_manager import get_user_environments_txt_file  # noqa: F401
+    from conda.core.prefix_data import PrefixData  # noqa: F401
+
+    # Reading these loads and merges the user's condarc files
+    context.root_prefix, context.envs_dirs
+
+
 def run(argv: Optional[list[str]] = None) -> None:
     """Run the application."""
     # We have to consider multiple ways of launching the application:
@@ -58,17 +130,49 @@ def run(argv: Optional[list[str]] = None) -> None:
 
     parser = argparse.ArgumentParser("conda tui")
     parser.add_argument("--no-dark", action="store_true", help="Disable dark mode")
+    parser.add_argument(
+        "--update-ttl",
+        type=float,
+        default=DEFAULT_UPDATE_TTL,
+        metavar="SECONDS",
+        help="How long to reuse the results of update checks (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_UPDATE_JOBS,
+        metavar="N",
+        help=(
+            "How many environments to check for updates, and channels to fetch, "
+            "at once. Solves always run one at a time (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--log-lines",
+        type=int,
+        default=DEFAULT_MAX_LINES,
+        metavar="N",
+        help="How many lines of command output to keep (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--log-dir",
+        type=Path,
+        metavar="DIR",
+        help="Save the full output of commands to files in this directory",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record timings and cache statistics, which are shown by pressing P",
+    )
     args = parser.parse_args(argv)
 
     app = CondaTUI()
     app.dark = not args.no_dark
+    app.update_ttl = args.update_ttl
+    app.update_jobs = max(1, args.jobs)
+    app.log_lines = max(1, args.log_lines)
+    app.log_dir = args.log_dir
+    if args.profile:
+        app.enable_profiling()
     app.run()
-
-
-@conda.plugins.hookimpl
-def conda_subcommands():
-    yield conda.plugins.CondaSubcommand(
-        name="tui",
-        summary="A Terminal User Interface for conda",
-        action=run,
-    )
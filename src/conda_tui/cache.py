@@ -0,0 +1,196 @@
+"""Caching helpers, both in-process and persisted to the user cache directory."""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import update_wrapper
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Generic
+from typing import Optional
+from typing import Protocol
+from typing import TypeVar
+
+# A stat signature of a file, used to detect changes without reading its contents
+StatSignature = tuple[int, int]
+
+
+def get_cache_dir() -> Path:
+    """The root directory of the conda-tui cache.
+
+    Follows the platform conventions, and can be overridden by setting
+    `CONDA_TUI_CACHE_DIR`.
+
+    """
+    override = os.environ.get("CONDA_TUI_CACHE_DIR")
+    if override:
+        return Path(override)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base, "conda-tui")
+
+
+def get_cache_path(namespace: str, prefix: Path) -> Path:
+    """The path to the cache file for a specific environment prefix."""
+    digest = hashlib.sha1(str(prefix).encode("utf-8")).hexdigest()
+    return get_cache_dir() / namespace / f"{digest}.json"
+
+
+def stat_signature(path: Path) -> Optional[StatSignature]:
+    """The modification time and size of a path, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def read_cache_file(path: Path, version: int) -> Optional[dict[str, Any]]:
+    """Load a JSON cache file.
+
+    Returns None if the file is missing, corrupt, or was written by a different
+    version of the cache format.
+
+    """
+    try:
+        with path.open("r") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != version:
+        return None
+    return data
+
+
+def write_cache_file(path: Path, version: int, data: dict[str, Any]) -> None:
+    """Atomically write a JSON cache file.
+
+    Failures are ignored, since the cache is purely an optimization.
+
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w") as fh:
+            json.dump({**data, "version": version}, fh)
+        os.replace(tmp_name, path)
+    except OSError:
+        Path(tmp_name).unlink(missing_ok=True)
+
+
+def prefix_state(prefix: Path) -> tuple[Optional[StatSignature], ...]:
+    """A cheap fingerprint of the installed state of a prefix.
+
+    Conda appends to `conda-meta/history` on every transaction, and adding or
+    removing records changes the mtime of the `conda-meta` directory itself.
+
+    """
+    conda_meta = prefix / "conda-meta"
+    return stat_signature(conda_meta / "history"), stat_signature(conda_meta)
+
+
+class HasPrefix(Protocol):
+    prefix: Path
+
+
+K = TypeVar("K", bound=HasPrefix)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Counters for measuring the effectiveness of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    size: int = 0
+    maxsize: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class PrefixLRUCache(Generic[K, V]):
+    """A bounded least-recently-used cache for functions of an environment.
+
+    Unlike `functools.cache`, entries are discarded when the state of the prefix
+    changes (see `prefix_state`), and the oldest entries are evicted once
+    `maxsize` is reached.
+
+    """
+
+    def __init__(self, func: Callable[[K], V], maxsize: int):
+        self._func = func
+        self._maxsize = maxsize
+        self._entries: OrderedDict[K, tuple[Any, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats(maxsize=maxsize)
+        update_wrapper(self, func)
+
+    def __call__(self, key: K) -> V:
+        state = prefix_state(key.prefix)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == state:
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self._stats.invalidations += 1
+            self._stats.misses += 1
+
+        value = self._func(key)
+
+        with self._lock:
+            self._entries[key] = (state, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+        return value
+
+    def cache_info(self) -> CacheStats:
+        """A snapshot of the cache counters."""
+        with self._lock:
+            return CacheStats(**{**vars(self._stats), "size": len(self._entries)})
+
+    def invalidate(self, key: K) -> None:
+        """Discard the cached value for a single key, if present."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats.invalidations += 1
+
+    def cache_clear(self) -> None:
+        """Discard all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._stats = CacheStats(maxsize=self._maxsize)
+
+
+def prefix_lru_cache(
+    maxsize: int = 32,
+) -> Callable[[Callable[[K], V]], PrefixLRUCache[K, V]]:
+    """Decorate a function of an environment with a `PrefixLRUCache`."""
+
+    def decorator(func: Callable[[K], V]) -> PrefixLRUCache[K, V]:
+        return PrefixLRUCache(func, maxsize=maxsize)
+
+    return decorator
@@ -0,0 +1,189 @@
+"""The dependencies between the packages installed in an environment."""
+
+import re
+from array import array
+from collections.abc import Iterable
+from collections.abc import Mapping
+from functools import cache
+from typing import NamedTuple
+
+from conda_tui.cache import prefix_lru_cache
+from conda_tui.diff import load_history
+from conda_tui.environment import Environment
+from conda_tui.package import load_package_depends
+from conda_tui.profiling import profiler
+
+# The package name at the start of a match spec, after any channel
+_SPEC_NAME_RE = re.compile(r"^\s*(?:[^\s:]+::)?([^\s=<>!~\[,]+)")
+
+
+@cache
+def spec_name(spec: str) -> str:
+    """The name of the package matched by a spec, e.g. "python" for "python >=3.8".
+
+    The same specs occur in the records of many packages, so results are cached.
+
+    """
+    match = _SPEC_NAME_RE.match(spec)
+    return match.group(1).lower() if match else spec.strip().lower()
+
+
+class Dependency(NamedTuple):
+    """A package at one end of a dependency, and the spec of the dependency."""
+
+    name: str
+    spec: str
+
+
+def merge_specs(dependencies: Iterable[Dependency]) -> list[Dependency]:
+    """Combine the specs of the dependencies on each package, in their first order.
+
+    A record may list several specs for one package, e.g. "python >=3.8" and
+    "python <3.13", which are joined by commas. Duplicate specs are dropped.
+
+    """
+    specs: dict[str, dict[str, None]] = {}
+    for dependency in dependencies:
+        specs.setdefault(dependency.name, {})[dependency.spec] = None
+    return [Dependency(name, ", ".join(merged)) for name, merged in specs.items()]
+
+
+class _Adjacency(NamedTuple):
+    """Edges between numbered nodes, in compressed sparse row form.
+
+    The neighbours of node `i` are `targets[offsets[i] : offsets[i + 1]]`.
+
+    """
+
+    offsets: array
+    targets: array
+
+    @classmethod
+    def from_lists(cls, neighbours: list[list[int]]) -> "_Adjacency":
+        offsets = array("l", [0])
+        targets = array("l")
+        for nodes in neighbours:
+            targets.extend(nodes)
+            offsets.append(len(targets))
+        return cls(offsets, targets)
+
+    def neighbours(self, node: int) -> array:
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    def reachable(self, nodes: list[int]) -> list[int]:
+        """The nodes reachable from any of the given nodes, excluding those nodes."""
+        offsets, targets = self.offsets, self.targets
+        seen = bytearray(len(offsets) - 1)
+        for node in nodes:
+            seen[node] = 1
+        stack = list(nodes)
+        found = []
+        while stack:
+            node = stack.pop()
+            for target in targets[offsets[node] : offsets[node + 1]]:
+                if not seen[target]:
+                    seen[target] = 1
+                    found.append(target)
+                    stack.append(target)
+        return found
+
+
+class DependencyGraph:
+    """Which packages each installed package depends on, and which depend on it.
+
+    Packages are numbered, and the dependencies between installed packages are
+    kept as integer arrays in both directions, so transitive queries over
+    thousands of packages take well under a millisecond. The dependencies of a
+    package also include specs which no installed package provides, such as
+    virtual packages like `__glibc`. Dependents are always installed packages.
+
+    """
+
+    def __init__(self, depends: Mapping[str, Iterable[str]]):
+        self.names = list(depends)
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._specs = [list(specs) for specs in depends.values()]
+
+        forward: list[list[int]] = []
+        reverse: list[list[int]] = [[] for _ in self.names]
+        for i, specs in enumerate(self._specs):
+            # Packages which aren't installed map to the package itself, which is
+            # then discarded along with any dependency on itself
+            targets = {self._index.get(spec_name(spec), i) for spec in specs}
+            targets.discard(i)
+            forward.append(sorted(targets))
+            for target in forward[-1]:
+                reverse[target].append(i)
+        self._forward = _Adjacency.from_lists(forward)
+        self._reverse = _Adjacency.from_lists(reverse)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def dependencies(self, name: str) -> list[Dependency]:
+        """The packages which a package depends on, in the order of its record."""
+        if name not in self._index:
+            return []
+        specs = self._specs[self._index[name]]
+        return [Dependency(spec_name(spec), spec) for spec in specs]
+
+    def dependents(self, name: str) -> list[Dependency]:
+        """The installed packages which depend on a package, with their specs of it."""
+        if name not in self._index:
+            return []
+        return sorted(
+            Dependency(self.names[i], spec)
+            for i in self._reverse.neighbours(self._index[name])
+            for spec in self._specs[i]
+            if spec_name(spec) == name
+        )
+
+    def _nodes(self, names: Iterable[str]) -> list[int]:
+        return [self._index[name] for name in names if name in self._index]
+
+    def all_dependencies(self, names: Iterable[str]) -> list[str]:
+        """The installed packages which any of the packages depend on, transitively."""
+        nodes = self._forward.reachable(self._nodes(names))
+        return sorted(self.names[i] for i in nodes)
+
+    def all_dependents(self, names: Iterable[str]) -> list[str]:
+        """The packages which depend on any of the packages, transitively.
+
+        These are the packages which may be affected by updating or removing them.
+
+        """
+        nodes = self._reverse.reachable(self._nodes(names))
+        return sorted(self.names[i] for i in nodes)
+
+    def leaves(self) -> list[str]:
+        """The packages which no other installed package depends on."""
+        offsets = self._reverse.offsets
+        return sorted(
+            name
+            for name, start, end in zip(self.names, offsets, offsets[1:])
+            if start == end
+        )
+
+
+@prefix_lru_cache(maxsize=16)
+@profiler.traced("dependencies.graph")
+def load_dependency_graph(env: Environment) -> DependencyGraph:
+    """The dependency graph of the conda packages installed in an environment."""
+    return DependencyGraph(load_package_depends(env.prefix))
+
+
+def requested_packages(env: Environment) -> set[str]:
+    """The names of the packages which were explicitly requested, from the history.
+
+    Leaf packages which were never requested are orphans, which were installed
+    as dependencies of packages which have since been removed.
+
+    """
+    requested: set[str] = set()
+    for revision in load_history(env):
+        requested.update(spec_name(spec) for spec in revision.update_specs)
+        requested.difference_update(spec_name(spec) for spec in revision.remove_specs)
+    return requested
@@ -0,0 +1,228 @@
+"""Compare the packages of two environments, or of an environment over its history."""
+
+import ast
+import re
+from collections.abc import Iterable
+from collections.abc import Mapping
+from typing import NamedTuple
+from typing import Optional
+
+from conda_tui.cache import prefix_lru_cache
+from conda_tui.environment import Environment
+from conda_tui.package import Package
+from conda_tui.package import list_packages_for_environment
+from conda_tui.profiling import profiler
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+# The header of each revision in conda-meta/history, e.g. "==> 2024-01-01 12:00:00 <=="
+_REVISION_RE = re.compile(r"^==>\s*(.+?)\s*<==$")
+# The platform subdirectory which may end a channel in a history record
+_SUBDIR_RE = re.compile(r"^(noarch|[a-z]+-[a-z0-9_]+)$")
+
+
+class PackageVersion(NamedTuple):
+    """The fields of an installed package which are compared."""
+
+    version: str
+    build: str
+    channel: str
+
+
+class PackageChange(NamedTuple):
+    """A package which differs between two sets of packages."""
+
+    name: str
+    old: Optional[PackageVersion]  # None if the package was added
+    new: Optional[PackageVersion]  # None if the package was removed
+
+    @property
+    def kind(self) -> str:
+        if self.old is None:
+            return ADDED
+        if self.new is None:
+            return REMOVED
+        return CHANGED
+
+
+class Revision(NamedTuple):
+    """A transaction recorded in conda-meta/history, and the packages after it."""
+
+    number: int
+    date: str
+    command: str
+    packages: dict[str, PackageVersion]
+    # The changes made by this transaction, compared with the previous revision
+    changes: list[PackageChange]
+    # The specs which the user asked to install or update, and to remove
+    update_specs: list[str]
+    remove_specs: list[str]
+
+
+def count_changes(changes: Iterable[PackageChange]) -> dict[str, int]:
+    """The number of packages added, removed and changed."""
+    counts = {ADDED: 0, REMOVED: 0, CHANGED: 0}
+    for change in changes:
+        counts[change.kind] += 1
+    return counts
+
+
+def package_versions(packages: Iterable[Package]) -> dict[str, PackageVersion]:
+    return {
+        pkg.name: PackageVersion(pkg.version, pkg.build, pkg.schannel)
+        for pkg in packages
+    }
+
+
+def diff_packages(
+    old: Mapping[str, PackageVersion],
+    new: Mapping[str, PackageVersion],
+    compare_channels: bool = True,
+) -> list[PackageChange]:
+    """The packages which were added, removed or changed, sorted by name.
+
+    Packages are matched by name, so this takes linear time. If
+    `compare_channels` is False, a package which only differs by channel is
+    considered unchanged.
+
+    """
+    changes = []
+    for name, version in old.items():
+        other = new.get(name)
+        if other is None:
+            changes.append(PackageChange(name, version, None))
+        elif other != version and (compare_channels or other[:2] != version[:2]):
+            changes.append(PackageChange(name, version, other))
+    changes.extend(
+        PackageChange(name, None, version)
+        for name, version in new.items()
+        if name not in old
+    )
+    return sorted(changes, key=lambda change: change.name)
+
+
+@profiler.traced("diff.environments")
+def diff_environments(old: Environment, new: Environment) -> list[PackageChange]:
+    """Compare the packages of two environments, using their cached listings."""
+    return diff_packages(
+        package_versions(list_packages_for_environment(old)),
+        package_versions(list_packages_for_environment(new)),
+    )
+
+
+def _parse_specs(value: str) -> list[str]:
+    """Parse the specs in a history comment, written as a Python list by conda.
+
+    Old versions of conda wrote them separated by commas instead.
+
+    """
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            return [str(spec) for spec in ast.literal_eval(value)]
+        except (ValueError, SyntaxError):
+            return []
+    return [spec.strip() for spec in value.split(",") if spec.strip()]
+
+
+def _parse_record(record: str) -> tuple[str, PackageVersion]:
+    """Parse a record in conda-meta/history, e.g. "conda-forge/linux-64::zlib-1.3-h0_0"."""
+    channel, _, dist = record.rpartition("::")
+    head, _, subdir = channel.rpartition("/")
+    if head and _SUBDIR_RE.match(subdir):
+        channel = head
+    name, version, build = dist.rsplit("-", 2)
+    return name, PackageVersion(version, build, channel)
+
+
+@prefix_lru_cache(maxsize=16)
+@profiler.traced("diff.history")
+def load_history(env: Environment) -> list[Revision]:
+    """The revisions of an environment, from the oldest to the newest.
+
+    This reads conda-meta/history directly, like conda's `History`. Each revision
+    lists the records which were linked (+) and unlinked (-), except in some old
+    files, where the first lists the initial records unprefixed.
+
+    """
+    try:
+        text = (env.prefix / "conda-meta" / "history").read_text(errors="replace")
+    except OSError:
+        return []
+
+    revisions: list[Revision] = []
+    packages: dict[str, PackageVersion] = {}
+    date = command = ""
+    linked: dict[str, PackageVersion] = {}
+    unlinked: dict[str, PackageVersion] = {}
+    update_specs: list[str] = []
+    remove_specs: list[str] = []
+
+    def finish_revision() -> None:
+        nonlocal packages
+        if not (date or linked or unlinked):
+            return
+        previous = packages
+        packages = {
+            name: version for name, version in previous.items() if name not in unlinked
+        }
+        packages.update(linked)
+        revisions.append(
+            Revision(
+                len(revisions),
+                date,
+                command,
+                packages,
+                diff_packages(previous, packages),
+                update_specs,
+                remove_specs,
+            )
+        )
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        header = _REVISION_RE.match(line)
+        if header is not None:
+            finish_revision()
+            date, command, linked, unlinked = header.group(1), "", {}, {}
+            update_specs, remove_specs = [], []
+        elif line.startswith("#"):
+            key, _, value = line[1:].partition(":")
+            key = key.strip()
+            if key == "cmd":
+                command = value.strip()
+            elif key in ("update specs", "install specs"):
+                update_specs = _parse_specs(value)
+            elif key == "remove specs":
+                remove_specs = _parse_specs(value)
+        else:
+            target = unlinked if line.startswith("-") else linked
+            try:
+                name, version = _parse_record(line.lstrip("+-"))
+            except ValueError:
+                continue
+            target[name] = version
+    finish_revision()
+    return revisions
+
+
+@profiler.traced("diff.revision")
+def diff_revision(env: Environment, revision: int) -> list[PackageChange]:
+    """Compare the packages of an environment at a revision with those installed now.
+
+    Channels are not compared, since conda records them differently in the
+    history than in the package records, e.g. "defaults" rather than "pkgs/main".
+    Packages installed with pip are not recorded in the history, and are ignored.
+
+    """
+    revisions = load_history(env)
+    installed = list_packages_for_environment(env)
+    return diff_packages(
+        revisions[revision].packages,
+        package_versions(pkg for pkg in installed if pkg.filename),
+        compare_channels=False,
+    )
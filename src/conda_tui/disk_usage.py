@@ -0,0 +1,126 @@
+"""Disk usage of conda environments, accounting for files hard-linked between them."""
+
+import json
+import os
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+from conda_tui.cache import get_cache_path
+from conda_tui.cache import prefix_state
+from conda_tui.cache import read_cache_file
+from conda_tui.cache import write_cache_file
+from conda_tui.profiling import profiler
+
+# Bump this whenever the structure of the cached disk usage changes
+DISK_USAGE_CACHE_VERSION = 1
+
+# The number of environments to measure at once. Like environment discovery, this
+# is dominated by the latency of stat calls rather than by CPU.
+DISK_USAGE_WORKERS = 8
+
+
+class DiskUsage(NamedTuple):
+    """The disk usage of an environment, in bytes."""
+
+    total: int  # All files in the environment, counting each inode once
+    unique: int  # Files not hard-linked from elsewhere, e.g. the package cache
+
+
+def _record_files(record: dict) -> list[str]:
+    """The paths of the files installed by a record, relative to the prefix."""
+    files = record.get("files")
+    if files:
+        return files
+    paths_data = record.get("paths_data") or {}
+    return [path["_path"] for path in paths_data.get("paths", [])]
+
+
+@profiler.traced("disk_usage.measure")
+def _measure(prefix: Path) -> DiskUsage:
+    """Stat every file installed into the prefix by conda.
+
+    Files are listed from the records in conda-meta rather than by walking the
+    prefix. Conda links most files from the package cache, so a file only counts
+    towards the unique size if all of its hard links are within the prefix.
+
+    """
+    conda_meta = prefix / "conda-meta"
+    # (device, inode) -> [size, number of links, number of links in this prefix]
+    inodes: dict[tuple[int, int], list[int]] = {}
+    with os.scandir(conda_meta) as it:
+        record_paths = [entry.path for entry in it if entry.name.endswith(".json")]
+    for record_path in record_paths:
+        try:
+            with open(record_path) as fh:
+                files = _record_files(json.load(fh))
+        except (OSError, ValueError):
+            continue
+        for file in files:
+            try:
+                st = os.lstat(os.path.join(prefix, file))
+            except OSError:
+                continue
+            entry = inodes.get((st.st_dev, st.st_ino))
+            if entry is None:
+                inodes[st.st_dev, st.st_ino] = [st.st_size, st.st_nlink, 1]
+            else:
+                entry[2] += 1
+
+    total = unique = 0
+    for size, links, seen in inodes.values():
+        total += size
+        if links <= seen:
+            unique += size
+    return DiskUsage(total, unique)
+
+
+def get_disk_usage(prefix: Path) -> DiskUsage:
+    """The disk usage of an environment.
+
+    Results are persisted, and reused until the contents of conda-meta change.
+
+    """
+    cache_path = get_cache_path("disk-usage", prefix)
+    state = [list(s) if s else None for s in prefix_state(prefix)]
+    cached = read_cache_file(cache_path, DISK_USAGE_CACHE_VERSION)
+    if cached is not None and cached["state"] == state:
+        profiler.count_cache("disk usage", hits=1)
+        return DiskUsage(*cached["usage"])
+
+    profiler.count_cache("disk usage", misses=1)
+    usage = _measure(prefix)
+    write_cache_file(
+        cache_path,
+        DISK_USAGE_CACHE_VERSION,
+        {"prefix": str(prefix), "state": state, "usage": list(usage)},
+    )
+    return usage
+
+
+def iter_disk_usage(
+    prefixes: Iterable[Path], max_workers: int = DISK_USAGE_WORKERS
+) -> Iterator[tuple[Path, DiskUsage]]:
+    """Measure many environments concurrently, yielding each as it finishes.
+
+    Environments which cannot be measured are skipped.
+
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="conda-tui-disk-usage"
+    )
+    try:
+        futures = {
+            executor.submit(get_disk_usage, prefix): prefix for prefix in prefixes
+        }
+        for future in as_completed(futures):
+            try:
+                usage = future.result()
+            except OSError:
+                continue
+            yield futures[future], usage
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,11 +1,39 @@
+import os
+import sys
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from dataclasses import dataclass
 from functools import cache
 from pathlib import Path
 
-from conda.base.constants import ROOT_ENV_NAME
-from conda.base.context import context
-from conda.common.path import paths_equal
-from conda.core.envs_manager import list_all_known_prefixes as list_prefixes
+from conda_tui.cache import get_cache_path
+from conda_tui.cache import read_cache_file
+from conda_tui.cache import stat_signature
+from conda_tui.cache import write_cache_file
+from conda_tui.profiling import profiler
+
+# Bump this whenever the structure of the cached environment list changes
+ENVIRONMENTS_CACHE_VERSION = 1
+
+# The number of prefixes to validate at once. Validation is dominated by the
+# latency of stat calls, which can be high on network file systems, so this
+# is not bounded by the number of CPUs.
+DISCOVERY_WORKERS = 16
+
+
+def _normalize(path: str) -> str:
+    """Normalize a path for comparison, as `conda.common.path.paths_equal` does."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+@cache
+def _named_envs_dirs() -> frozenset[str]:
+    """The normalized envs directories, whose children are named environments."""
+    from conda.base.context import context
+
+    return frozenset(_normalize(envs_dir) for envs_dir in context.envs_dirs)
 
 
 @dataclass
@@ -39,11 +67,12 @@ class Environment:
         Cached for performance.
 
         """
+        from conda.base.constants import ROOT_ENV_NAME
+        from conda.base.context import context
+
         if str(prefix) == context.root_prefix:
             return ROOT_ENV_NAME
-        elif any(
-            paths_equal(envs_dir, str(prefix.parent)) for envs_dir in context.envs_dirs
-        ):
+        elif _normalize(str(prefix.parent)) in _named_envs_dirs():
             return str(prefix.name)
         return ""
 
@@ -51,6 +80,144 @@ class Environment:
         return hash(self.prefix)
 
 
+def _environments_txt_files() -> list[str]:
+    """The `environments.txt` files in which conda registers environments.
+
+    As in conda, administrators see the environments of all users.
+
+    """
+    from conda.common._os import is_admin
+    from conda.core.envs_manager import get_user_environments_txt_file
+
+    home_dirs = [os.path.expanduser("~")]
+    if is_admin():
+        if sys.platform == "win32":
+            home_dir_dir = os.path.dirname(home_dirs[0])
+            home_dirs = [entry.path for entry in os.scandir(home_dir_dir)]
+        else:
+            from pwd import getpwall
+
+            home_dirs = [entry.pw_dir for entry in getpwall()] or home_dirs
+    return [get_user_environments_txt_file(home_dir) for home_dir in home_dirs]
+
+
+def _read_environments_txt(path: str) -> list[str]:
+    try:
+        with open(path) as fh:
+            lines = (line.strip() for line in fh)
+            return [line for line in lines if line and not line.startswith("#")]
+    except OSError:
+        return []
+
+
+def _list_envs_dir(envs_dir: str) -> list[str]:
+    try:
+        with os.scandir(envs_dir) as it:
+            return [entry.path for entry in it]
+    except OSError:
+        return []
+
+
+def _is_conda_environment(prefix: str) -> bool:
+    return os.path.isfile(os.path.join(prefix, "conda-meta", "history"))
+
+
+def iter_environments() -> Iterator[Environment]:
+    """Yield the conda environments installed on the local machine, as they are found.
+
+    Like conda's `list_all_known_prefixes`, this lists the environments registered
+    in `environments.txt`, any environments in the envs directories, and the root
+    environment. Unlike it, candidate prefixes are validated concurrently, and no
+    file is ever rewritten.
+
+    The result is cached, and reused until an `environments.txt` file or an envs
+    directory is modified, which happens whenever an environment is created or
+    removed with conda. Cached prefixes are still checked, since an environment
+    can also be deleted without conda, e.g. with `rm -rf`.
+
+    """
+    from conda.base.context import context
+
+    root_prefix = context.root_prefix
+    txt_files = _environments_txt_files()
+    envs_dirs = list(context.envs_dirs)
+    state = {}
+    for path in [*txt_files, *envs_dirs]:
+        signature = stat_signature(Path(path))
+        state[path] = list(signature) if signature else None
+
+    cache_path = get_cache_path("environments", Path(root_prefix))
+    cached = read_cache_file(cache_path, ENVIRONMENTS_CACHE_VERSION)
+    if cached is not None and cached["state"] == state:
+        profiler.count_cache("environments", hits=1)
+        found = []
+        for prefix in cached["prefixes"]:
+            if prefix == root_prefix or _is_conda_environment(prefix):
+                found.append(prefix)
+                yield Environment(prefix=Path(prefix))
+        if len(found) < len(cached["prefixes"]):
+            write_cache_file(
+                cache_path,
+                ENVIRONMENTS_CACHE_VERSION,
+                {"state": state, "prefixes": found},
+            )
+        return
+
+    profiler.count_cache("environments", misses=1)
+    candidates = dict.fromkeys(
+        prefix for path in txt_files for prefix in _read_environments_txt(path)
+    )
+    for envs_dir in envs_dirs:
+        candidates.update(dict.fromkeys(_list_envs_dir(envs_dir)))
+    candidates.pop(root_prefix, None)
+
+    prefixes = [root_prefix]
+    yield Environment(prefix=Path(root_prefix))
+
+    executor = ThreadPoolExecutor(
+        max_workers=DISCOVERY_WORKERS, thread_name_prefix="conda-tui-discovery"
+    )
+    try:
+        futures = {
+            executor.submit(_is_conda_environment, prefix): prefix
+            for prefix in candidates
+        }
+        for future in as_completed(futures):
+            if future.result():
+                prefixes.append(futures[future])
+                yield Environment(prefix=Path(futures[future]))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    write_cache_file(
+        cache_path,
+        ENVIRONMENTS_CACHE_VERSION,
+        {"state": state, "prefixes": sorted(prefixes)},
+    )
+
+
+def environment_sources() -> list[Path]:
+    """The files and directories which change when environments are created or removed.
+
+    These are the inputs of `iter_environments`, and the paths to watch to keep a
+    list of environments up to date.
+
+    """
+    from conda.base.context import context
+
+    return [Path(path) for path in [*_environments_txt_files(), *context.envs_dirs]]
+
+
+def sort_environments(environments: Iterable[Environment]) -> list[Environment]:
+    """Sort environments alphabetically, with named environments first."""
+    environments = list(environments)
+    named = sorted((e for e in environments if e.name), key=lambda x: x.name)
+    unnamed = sorted(
+        (e for e in environments if not e.name), key=lambda x: str(x.relative_path)
+    )
+    return named + unnamed
+
+
 def list_environments(sort: bool = True) -> list[Environment]:
     """Get a list of conda environments installed on local machine.
 
@@ -59,12 +226,7 @@ def list_environments(sort: bool = True) -> list[Environment]:
             appearing first, followed by path-based environments.
 
     """
-
-    environments = [Environment(prefix=Path(env)) for env in list_prefixes()]
+    environments = list(iter_environments())
     if sort:
-        named = sorted((e for e in environments if e.name), key=lambda x: x.name)
-        unnamed = sorted(
-            (e for e in environments if not e.name), key=lambda x: str(x.relative_path)
-        )
-        return named + unnamed
+        return sort_environments(environments)
     return environments
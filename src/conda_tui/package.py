@@ -1,34 +1,168 @@
 import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from functools import cache
-from functools import cached_property
 from pathlib import Path
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import NamedTuple
 from typing import Optional
 
-from conda.core.prefix_data import PrefixData
 from rich.text import Text
 
+from conda_tui.cache import StatSignature
+from conda_tui.cache import get_cache_path
+from conda_tui.cache import prefix_lru_cache
+from conda_tui.cache import read_cache_file
+from conda_tui.cache import stat_signature
+from conda_tui.cache import write_cache_file
 from conda_tui.environment import Environment
+from conda_tui.profiling import profiler
+
+if TYPE_CHECKING:
+    from conda.core.prefix_data import PrefixData
+    from conda.models.records import PrefixRecord
+
+# Bump this whenever the structure of the cached package listing changes
+LISTING_CACHE_VERSION = 2
+
+# conda-build writes about.json with sorted keys and an indent of 2, so the top-level
+# summary can be located without parsing the entire (sometimes very large) document
+_ABOUT_START = '{\n  "'
+_SUMMARY_KEY = '\n  "summary": '
+_json_decoder = json.JSONDecoder()
+
+# The number of descriptions kept in memory, enough for dozens of large environments
+DESCRIPTION_CACHE_SIZE = 20_000
+
+
+class _DescriptionCache:
+    """Descriptions keyed by extracted package directory, evicting the oldest.
+
+    These are shared between environments, since the same package cache directory
+    is linked into many of them.
+
+    """
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, package_dir: str) -> Optional[str]:
+        with self._lock:
+            description = self._entries.get(package_dir)
+            if description is not None:
+                self._entries.move_to_end(package_dir)
+            return description
+
+    def update(self, descriptions: Iterable[tuple[str, str]]) -> None:
+        with self._lock:
+            for package_dir, description in descriptions:
+                self._entries[package_dir] = description
+                self._entries.move_to_end(package_dir)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_description_cache = _DescriptionCache(DESCRIPTION_CACHE_SIZE)
+
+
+class PackageSummary(NamedTuple):
+    """The compact set of package fields required to display the package table."""
+
+    name: str
+    version: str
+    build: str
+    schannel: str
+    description: Optional[str]  # None until loaded from the package cache
+    filename: str  # The record file in conda-meta, empty for pip-installed packages
+    package_dir: str  # The extracted package directory in the package cache, if known
 
 
 class Package:
-    """Wrap a conda PrefixRecord, and supplement with custom attributes."""
+    """An installed package, holding only the fields displayed in the package table.
+
+    Fields are plain slotted attributes, so reading them is as cheap as possible,
+    and each package costs a single small object. The full conda `PrefixRecord`,
+    which includes the list of files in the package, is only loaded on demand by
+    `load_record`, and is not retained.
+
+    """
 
-    def __init__(self, record: PrefixData):
-        self._record = record
-        self._update_available = None
+    __slots__ = (
+        "name",
+        "version",
+        "build",
+        "schannel",
+        "description",
+        "filename",
+        "package_dir",
+        "prefix",
+        "update_available",
+    )
 
-    def __getattr__(self, item: str) -> Any:
-        return getattr(self._record, item)
+    def __init__(self, summary: PackageSummary, prefix: Path):
+        (
+            self.name,
+            self.version,
+            self.build,
+            self.schannel,
+            self.description,
+            self.filename,
+            self.package_dir,
+        ) = summary
+        self.prefix = prefix
+        # True if an update is available. If None, the update status is unknown.
+        self.update_available: Optional[bool] = None
 
     @property
-    def update_available(self) -> Optional[bool]:
-        """True if update is available. If None, update status is unknown."""
-        return self._update_available
+    def summary(self) -> PackageSummary:
+        return PackageSummary(
+            self.name,
+            self.version,
+            self.build,
+            self.schannel,
+            self.description,
+            self.filename,
+            self.package_dir,
+        )
 
-    @update_available.setter
-    def update_available(self, value: bool) -> None:
-        self._update_available = value
+    def load_description(self) -> str:
+        """Load the package description from the package cache, if not yet loaded."""
+        if self.description is None:
+            self.description = get_description(self.package_dir)
+        return self.description
+
+    def load_record(self) -> "PrefixRecord":
+        """Load the full conda PrefixRecord from the prefix."""
+        return _load_record(self.prefix, self.summary)
+
+    def load_record_data(self) -> dict[str, Any]:
+        """Load all fields of the record, as stored in conda-meta.
+
+        Conda packages are read as plain JSON, which for packages with many files
+        is much faster than creating a `PrefixRecord`.
+
+        """
+        if self.filename:
+            try:
+                with (self.prefix / "conda-meta" / self.filename).open("r") as fh:
+                    return json.load(fh)
+            except (OSError, ValueError):
+                pass
+        return self.load_record().dump()
 
     @property
     def status(self) -> Text:
@@ -44,22 +178,304 @@ class Package:
         else:
             return Text.from_markup("[bold #43b049]\N{HEAVY CHECK MARK}[/]")
 
-    @cached_property
-    def description(self) -> str:
-        """Attempt to load the package description."""
+
+def _read_description(package_dir: str) -> str:
+    """Attempt to load the package description from the package cache.
+
+    Only the `summary` field is extracted, if the file is formatted as conda-build
+    writes it. Otherwise, or if the summary isn't a string, we fall back to
+    parsing the entire file.
+
+    """
+    if not package_dir:
+        return ""
+    info_path = Path(package_dir, "info", "about.json")
+    try:
+        text = info_path.read_text()
+    except OSError:
+        return ""
+    # With an indent of 2, only top-level keys follow a newline and two spaces
+    index = text.find(_SUMMARY_KEY) if text.startswith(_ABOUT_START) else -1
+    try:
+        if index >= 0:
+            summary = _json_decoder.raw_decode(text, index + len(_SUMMARY_KEY))[0]
+            if isinstance(summary, str):
+                return summary
+        summary = json.loads(text).get("summary")
+    except (ValueError, AttributeError):
+        return ""
+    return summary if isinstance(summary, str) else ""
+
+
+def get_description(package_dir: str) -> str:
+    """The description of an extracted package, cached across environments."""
+    description = _description_cache.get(package_dir)
+    if description is None:
+        description = _read_description(package_dir)
+        _description_cache.update([(package_dir, description)])
+    return description
+
+
+@profiler.traced("packages.read_descriptions")
+def _read_descriptions(package_dirs: list[str]) -> list[str]:
+    return [_read_description(package_dir) for package_dir in package_dirs]
+
+
+def load_descriptions(
+    packages: Iterable[Package],
+    batch_size: int = 200,
+    max_workers: Optional[int] = None,
+) -> Iterator[list[Package]]:
+    """Load the descriptions of many packages concurrently.
+
+    Reading `about.json` is I/O bound, so the files are read in a thread pool,
+    in chunks to amortize the cost of scheduling. Each package directory is only
+    read once, even if it is shared between environments. Packages are yielded in
+    batches, in their original order, as their descriptions become available.
+
+    """
+    missing = [pkg for pkg in packages if pkg.description is None]
+    # The descriptions for this call, which can't be evicted before they're used
+    loaded: dict[str, str] = {}
+    pending = []
+    for package_dir in dict.fromkeys(pkg.package_dir for pkg in missing):
+        description = _description_cache.get(package_dir)
+        if description is None:
+            pending.append(package_dir)
+        else:
+            loaded[package_dir] = description
+    profiler.count_cache(
+        "descriptions", hits=len(missing) - len(pending), misses=len(pending)
+    )
+    chunk_size = 32
+    chunks = [pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        results = zip(chunks, executor.map(_read_descriptions, chunks))
+        batch = []
+        for pkg in missing:
+            while pkg.package_dir not in loaded:
+                package_dirs, descriptions = next(results)
+                loaded.update(zip(package_dirs, descriptions))
+                _description_cache.update(zip(package_dirs, descriptions))
+            pkg.description = loaded[pkg.package_dir]
+            batch.append(pkg)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _summarize(record: "PrefixRecord", filename: str) -> PackageSummary:
+    """Extract the summary from a record.
+
+    Descriptions are deferred, since they require reading a file per package.
+
+    """
+    package_dir = getattr(record, "extracted_package_dir", None) or ""
+    return PackageSummary(
+        name=record.name,
+        version=record.version,
+        build=record.build,
+        schannel=record.schannel,
+        description=None if package_dir else "",
+        filename=filename,
+        package_dir=package_dir,
+    )
+
+
+def _load_prefix_data(prefix: Path) -> "PrefixData":
+    """Load all records in a prefix, including pip-installed packages.
+
+    conda caches `PrefixData` instances per prefix for the life of the process,
+    and never reloads them, so constructing one normally can return records
+    which are long out of date, or which were loaded without pip interop.
+    Calling `type.__call__` directly bypasses that cache, so the records are
+    always read afresh.
+
+    """
+    from conda.core.prefix_data import PrefixData
+
+    return type.__call__(PrefixData, str(prefix), pip_interop_enabled=True)
+
+
+def _load_record(prefix: Path, summary: PackageSummary) -> "PrefixRecord":
+    """Load the full record for a single package.
+
+    Conda packages are read directly from their conda-meta file, which avoids
+    loading the entire prefix.
+
+    """
+    from conda.models.records import PrefixRecord
+
+    if summary.filename:
+        record_path = prefix / "conda-meta" / summary.filename
         try:
-            package_dir = self.extracted_package_dir
-        except AttributeError:
-            return ""
-        info_path = Path(package_dir, "info", "about.json")
-        if not info_path.exists():
-            return ""
-        with info_path.open("r") as fh:
-            return json.load(fh).get("summary", "")
+            with record_path.open("r") as fh:
+                return PrefixRecord(**json.load(fh))
+        except (OSError, ValueError):
+            pass
+    return _load_prefix_data(prefix).get(summary.name)
+
+
+def _site_packages_signatures(prefix: Path) -> dict[str, Optional[StatSignature]]:
+    """Stat signatures of any site-packages directories in the prefix.
+
+    Pip-installed packages are discovered by scanning these, so any change to
+    their contents invalidates the cached pip records.
+
+    """
+    candidates = [
+        *prefix.glob("lib/python*/site-packages"),
+        prefix / "Lib" / "site-packages",
+    ]
+    return {str(path): stat_signature(path) for path in candidates if path.is_dir()}
+
+
+def _get_json_filename(record: "PrefixRecord") -> str:
+    """The name of the file in conda-meta which stores a record, following conda."""
+    fn = getattr(record, "fn", None) or ""
+    for ext in (".tar.bz2", ".conda"):
+        if fn.endswith(ext):
+            return f"{fn[:-len(ext)]}.json"
+    return f"{record.name}-{record.version}-{record.build}.json"
+
 
+def _list_conda_meta(conda_meta: Path) -> dict[str, Optional[StatSignature]]:
+    with os.scandir(conda_meta) as it:
+        return {
+            entry.name: stat_signature(Path(entry.path))
+            for entry in it
+            if entry.name.endswith(".json")
+        }
 
-@cache
+
+def _load_listing(prefix: Path) -> tuple[dict[str, Any], list[PackageSummary]]:
+    """Load the listing of a prefix: its conda records by filename, and pip packages.
+
+    Each conda record is stored as its summary and its dependency specs.
+    Results are persisted to the user cache directory. On subsequent loads, only
+    records whose conda-meta file has changed are re-parsed. If the site-packages
+    directories have changed, the entire prefix is reloaded to pick up pip changes.
+
+    """
+    from conda.models.records import PrefixRecord
+
+    conda_meta = prefix / "conda-meta"
+    cache_path = get_cache_path("packages", prefix)
+    cached = read_cache_file(cache_path, LISTING_CACHE_VERSION) or {}
+
+    meta_mtime = stat_signature(conda_meta)
+    site_packages = _site_packages_signatures(prefix)
+    site_packages_json = {k: list(v) if v else None for k, v in site_packages.items()}
+
+    cached_records: dict[str, Any] = cached.get("records", {})
+    if meta_mtime is not None and list(meta_mtime) == cached.get("conda_meta"):
+        # The listing is unchanged, so only the individual files need checking
+        files = {name: stat_signature(conda_meta / name) for name in cached_records}
+    else:
+        files = _list_conda_meta(conda_meta) if meta_mtime is not None else {}
+
+    records: dict[str, Any] = {}
+    reparsed = 0
+    if cached and site_packages_json == cached.get("site_packages"):
+        pip_summaries = [PackageSummary(*s) for s in cached.get("pip", [])]
+        for filename, signature in files.items():
+            if signature is None:
+                continue
+            entry = cached_records.get(filename)
+            if entry is not None and entry["stat"] == list(signature):
+                records[filename] = entry
+                continue
+            reparsed += 1
+            try:
+                with (conda_meta / filename).open("r") as fh:
+                    record = PrefixRecord(**json.load(fh))
+            except (OSError, ValueError):
+                continue
+            records[filename] = {
+                "stat": list(signature),
+                "summary": list(_summarize(record, filename)),
+                "depends": list(record.depends),
+            }
+    else:
+        pip_summaries = []
+        for record in _load_prefix_data(prefix).iter_records():
+            filename = _get_json_filename(record)
+            signature = files.get(filename)
+            if signature is None:
+                pip_summaries.append(_summarize(record, ""))
+                continue
+            records[filename] = {
+                "stat": list(signature),
+                "summary": list(_summarize(record, filename)),
+                "depends": list(record.depends),
+            }
+
+    profiler.count_cache(
+        "package listing",
+        hits=len(records) - reparsed if cached else 0,
+        misses=reparsed if cached else len(records) + len(pip_summaries),
+    )
+
+    payload = {
+        "prefix": str(prefix),
+        "conda_meta": list(meta_mtime) if meta_mtime else None,
+        "site_packages": site_packages_json,
+        "records": records,
+        "pip": [list(s) for s in pip_summaries],
+    }
+    if any(cached.get(key) != value for key, value in payload.items()):
+        write_cache_file(cache_path, LISTING_CACHE_VERSION, payload)
+    return records, pip_summaries
+
+
+@profiler.traced("packages.load_summaries")
+def load_package_summaries(prefix: Path) -> list[PackageSummary]:
+    """Load the summaries of all packages installed into a prefix."""
+    records, pip_summaries = _load_listing(prefix)
+    summaries = [PackageSummary(*entry["summary"]) for entry in records.values()]
+    return summaries + pip_summaries
+
+
+@profiler.traced("packages.load_depends")
+def load_package_depends(prefix: Path) -> dict[str, list[str]]:
+    """Load the dependency specs of each conda package installed into a prefix, by name."""
+    records, _ = _load_listing(prefix)
+    return {entry["summary"][0]: entry["depends"] for entry in records.values()}
+
+
+def save_descriptions(prefix: Path, packages: list[Package]) -> None:
+    """Store loaded package descriptions in the persistent listing cache."""
+    descriptions = {
+        p.filename: p.description for p in packages if p.description is not None
+    }
+    cache_path = get_cache_path("packages", prefix)
+    cached = read_cache_file(cache_path, LISTING_CACHE_VERSION)
+    if not cached or not descriptions:
+        return
+    changed = False
+    for filename, entry in cached.get("records", {}).items():
+        summary = PackageSummary(*entry["summary"])
+        description = descriptions.get(filename)
+        if description is not None and summary.description != description:
+            entry["summary"] = list(summary._replace(description=description))
+            changed = True
+    if changed:
+        write_cache_file(cache_path, LISTING_CACHE_VERSION, cached)
+
+
+@prefix_lru_cache(maxsize=16)
 def list_packages_for_environment(env: Environment) -> list[Package]:
-    prefix_data = PrefixData(str(env.prefix), pip_interop_enabled=True)
-    packages = [Package(record) for record in prefix_data.iter_records()]
+    summaries = load_package_summaries(env.prefix)
+    packages = [Package(summary, env.prefix) for summary in summaries]
     return sorted(packages, key=lambda x: x.name)
+
+
+profiler.register_cache(
+    "packages (in memory)", list_packages_for_environment.cache_info
+)
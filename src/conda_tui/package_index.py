@@ -0,0 +1,216 @@
+"""An index of the packages installed in every environment, to find where each is installed."""
+
+import re
+import threading
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import Any
+from typing import NamedTuple
+from typing import Optional
+
+from conda_tui.cache import get_cache_dir
+from conda_tui.cache import prefix_state
+from conda_tui.cache import read_cache_file
+from conda_tui.cache import write_cache_file
+from conda_tui.environment import Environment
+from conda_tui.package import load_package_summaries
+from conda_tui.profiling import profiler
+from conda_tui.search import SearchIndex
+
+# Bump this whenever the structure of the cached index changes
+PACKAGE_INDEX_CACHE_VERSION = 1
+
+# The number of environments to index at once. Most listings are read from the
+# listing cache, so this is dominated by file I/O rather than by CPU.
+INDEX_WORKERS = 8
+
+# A package name, optionally followed by a version spec, e.g. "openssl <3"
+_QUERY_RE = re.compile(r"^\s*([^\s<>=!~]+)\s*(.*?)\s*$")
+
+
+class Installation(NamedTuple):
+    """A package installed in an environment."""
+
+    environment: Environment
+    name: str
+    version: str
+    build: str
+    schannel: str
+
+
+class _Lookup(NamedTuple):
+    by_name: dict[str, list[Installation]]
+    names: list[str]  # Sorted, in the order of the documents of `name_index`
+    name_index: SearchIndex
+
+
+class _IndexedPrefix(NamedTuple):
+    state: list
+    # (name, version, build, schannel) of each installed package
+    packages: list[tuple[str, str, str, str]]
+
+
+def parse_query(query: str) -> tuple[str, str]:
+    """Split a query into a package name and a version spec, which may be empty.
+
+    The version spec uses conda's syntax, e.g. "openssl <3" or "python=3.11".
+
+    """
+    match = _QUERY_RE.match(query)
+    if match is None:
+        return "", ""
+    name, spec = match.groups()
+    return name.lower(), spec.replace(" ", "")
+
+
+class PackageIndex:
+    """The packages installed in each environment, by package name.
+
+    Environments are indexed concurrently from their package listings, which are
+    themselves persisted per prefix. The index is persisted as a whole too, so an
+    environment is only indexed again once its `prefix_state` changes, and an
+    unchanged environment costs two stat calls.
+
+    """
+
+    def __init__(self) -> None:
+        self._prefixes: dict[str, _IndexedPrefix] = {}
+        self._lock = threading.Lock()
+        # Derived from the indexed prefixes, and rebuilt when they change
+        self._lookup: Optional[_Lookup] = None
+
+    @staticmethod
+    def _cache_path() -> Path:
+        return get_cache_dir() / "package-index.json"
+
+    @classmethod
+    def load(cls) -> "PackageIndex":
+        """The persisted index, which may be out of date until it is refreshed."""
+        index = cls()
+        cached = read_cache_file(cls._cache_path(), PACKAGE_INDEX_CACHE_VERSION)
+        if cached is not None:
+            index._prefixes = {
+                prefix: _IndexedPrefix(
+                    entry["state"], [tuple(p) for p in entry["packages"]]
+                )
+                for prefix, entry in cached["prefixes"].items()
+            }
+            # Ready for queries, without building the lookup on the first one
+            index._get_lookup()
+        return index
+
+    def save(self) -> None:
+        with self._lock:
+            prefixes: dict[str, Any] = {
+                prefix: entry._asdict() for prefix, entry in self._prefixes.items()
+            }
+        write_cache_file(
+            self._cache_path(), PACKAGE_INDEX_CACHE_VERSION, {"prefixes": prefixes}
+        )
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def refresh(
+        self, environments: Iterable[Environment], max_workers: int = INDEX_WORKERS
+    ) -> Iterator[Environment]:
+        """Index any of the environments which have changed, yielding each once done.
+
+        Environments which are not given are removed from the index. Those which
+        cannot be read are skipped.
+
+        """
+        environments = list(environments)
+        wanted = {str(env.prefix) for env in environments}
+        with self._lock:
+            for prefix in set(self._prefixes) - wanted:
+                del self._prefixes[prefix]
+                self._lookup = None
+
+        states = {env: self._get_state(env.prefix) for env in environments}
+        with self._lock:
+            indexed = {prefix: entry.state for prefix, entry in self._prefixes.items()}
+        stale = [
+            env
+            for env, state in states.items()
+            if indexed.get(str(env.prefix)) != state
+        ]
+        profiler.count_cache(
+            "package index", hits=len(environments) - len(stale), misses=len(stale)
+        )
+
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="conda-tui-package-index"
+        )
+        try:
+            futures = {
+                executor.submit(load_package_summaries, env.prefix): env
+                for env in stale
+            }
+            for future in as_completed(futures):
+                env = futures[future]
+                try:
+                    summaries = future.result()
+                except Exception:
+                    # A broken environment shouldn't prevent indexing the others
+                    continue
+                packages = [(s.name, s.version, s.build, s.schannel) for s in summaries]
+                with self._lock:
+                    self._prefixes[str(env.prefix)] = _IndexedPrefix(
+                        states[env], packages
+                    )
+                    self._lookup = None
+                yield env
+            self._get_lookup()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _get_state(prefix: Path) -> list:
+        return [list(s) if s else None for s in prefix_state(prefix)]
+
+    def _get_lookup(self) -> _Lookup:
+        with self._lock:
+            if self._lookup is None:
+                by_name: dict[str, list[Installation]] = {}
+                for prefix, entry in sorted(self._prefixes.items()):
+                    env = Environment(prefix=Path(prefix))
+                    for name, *fields in entry.packages:
+                        by_name.setdefault(name, []).append(
+                            Installation(env, name, *fields)
+                        )
+                names = sorted(by_name)
+                self._lookup = _Lookup(by_name, names, SearchIndex(names))
+            return self._lookup
+
+    @profiler.traced("package_index.find")
+    def find(self, query: str) -> list[Installation]:
+        """The installations of the packages matching a query.
+
+        The query is a package name, which matches exactly if any package has that
+        name, and otherwise matches any name containing it. It may be followed by
+        a version spec, e.g. "openssl <3", which the installed version must match.
+
+        Raises ValueError if the version spec is invalid.
+
+        """
+        name, spec = parse_query(query)
+        if not name:
+            return []
+        lookup = self._get_lookup()
+        if name in lookup.by_name:
+            names = [name]
+        else:
+            names = [lookup.names[i] for i in lookup.name_index.search(name)]
+        installations = [inst for n in names for inst in lookup.by_name[n]]
+        if spec:
+            from conda.models.version import VersionSpec
+
+            version_spec = VersionSpec(spec)
+            installations = [
+                inst for inst in installations if version_spec.match(inst.version)
+            ]
+        return installations
@@ -0,0 +1,26 @@
+"""The conda plugin, registering `conda tui` as a subcommand."""
+
+from typing import Optional
+
+import conda.plugins
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    """Run the application, deferring the import of the app until it is invoked.
+
+    Conda loads all plugins for every command, so this module must stay cheap
+    to import.
+
+    """
+    from conda_tui.app import run
+
+    run(argv)
+
+
+@conda.plugins.hookimpl
+def conda_subcommands():
+    yield conda.plugins.CondaSubcommand(
+        name="tui",
+        summary="A Terminal User Interface for conda",
+        action=run,
+    )
@@ -0,0 +1,202 @@
+"""Opt-in instrumentation, recording how long operations take and how well caches work.
+
+Nothing is recorded unless the profiler is enabled, e.g. with `conda tui --profile`,
+in which case `span` costs a couple of microseconds, and otherwise next to nothing.
+
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import AbstractContextManager
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+from typing import TypeVar
+
+from conda_tui.cache import CacheStats
+
+# The number of recent spans to keep
+MAX_SPANS = 10_000
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span(NamedTuple):
+    """A single timed operation."""
+
+    name: str
+    start: float  # In seconds since the profiler was created
+    duration: float  # In seconds
+    thread_id: int
+    thread_name: str
+
+
+class SpanStats(NamedTuple):
+    """Timings of all the recent spans with the same name, in seconds."""
+
+    count: int
+    total: float
+    mean: float
+    max: float
+    last: float
+
+
+class _ActiveSpan:
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        end = time.perf_counter()
+        thread = threading.current_thread()
+        self._profiler.add_span(
+            Span(
+                self._name,
+                self._start - self._profiler.origin,
+                end - self._start,
+                thread.ident or 0,
+                thread.name,
+            )
+        )
+
+
+class Profiler:
+    """Records spans and cache statistics, from any thread."""
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+        self._caches: dict[str, CacheStats] = {}
+        self._cache_sources: dict[str, Callable[[], CacheStats]] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str) -> AbstractContextManager[None]:
+        """Time the body of a `with` block, if the profiler is enabled."""
+        if not self.enabled:
+            return nullcontext()
+        return _ActiveSpan(self, name)
+
+    def traced(self, name: str) -> Callable[[F], F]:
+        """Decorate a function, so that each call is recorded as a span."""
+
+        def decorator(func: F) -> F:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(name):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def add_span(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def count_cache(self, name: str, hits: int = 0, misses: int = 0) -> None:
+        """Count the hits and misses of a cache, if the profiler is enabled."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._caches.setdefault(name, CacheStats())
+            stats.hits += hits
+            stats.misses += misses
+
+    def register_cache(self, name: str, cache_info: Callable[[], CacheStats]) -> None:
+        """Include the statistics of a cache which keeps its own, e.g. `PrefixLRUCache`."""
+        self._cache_sources[name] = cache_info
+
+    @property
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def span_stats(self) -> dict[str, SpanStats]:
+        """Statistics of the recent spans, by name."""
+        durations: dict[str, list[float]] = {}
+        for span in self.spans:
+            durations.setdefault(span.name, []).append(span.duration)
+        return {
+            name: SpanStats(
+                len(values),
+                sum(values),
+                sum(values) / len(values),
+                max(values),
+                values[-1],
+            )
+            for name, values in sorted(durations.items())
+        }
+
+    def cache_stats(self) -> dict[str, CacheStats]:
+        with self._lock:
+            stats = {name: CacheStats(**vars(s)) for name, s in self._caches.items()}
+        for name, cache_info in self._cache_sources.items():
+            stats[name] = cache_info()
+        return dict(sorted(stats.items()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._caches.clear()
+
+    def to_json(self) -> dict[str, Any]:
+        """All recorded data, in a form which can be serialized as JSON."""
+        return {
+            "spans": [span._asdict() for span in self.spans],
+            "summary": {
+                name: stats._asdict() for name, stats in self.span_stats().items()
+            },
+            "caches": {
+                name: {**vars(stats), "hit_ratio": stats.hit_ratio}
+                for name, stats in self.cache_stats().items()
+            },
+        }
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """The spans in the Trace Event Format, for `chrome://tracing` or Perfetto."""
+        pid = os.getpid()
+        spans = self.spans
+        threads = {span.thread_id: span.thread_name for span in spans}
+        events: list[dict[str, Any]] = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"name": thread_name},
+            }
+            for thread_id, thread_name in threads.items()
+        ]
+        events.extend(
+            {
+                "name": span.name,
+                "cat": span.name.partition(".")[0],
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+            }
+            for span in spans
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: Path, chrome_trace: bool = False) -> None:
+        data = self.to_chrome_trace() if chrome_trace else self.to_json()
+        path.write_text(json.dumps(data, indent=1))
+
+
+# The profiler used throughout conda-tui
+profiler = Profiler()
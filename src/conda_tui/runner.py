@@ -0,0 +1,89 @@
+"""Asynchronous execution of external commands, streaming output through pipes."""
+
+import asyncio
+import codecs
+from collections.abc import AsyncIterator
+from typing import Optional
+
+# The maximum length of a single line of output
+LINE_LIMIT = 2**24
+
+# The maximum number of bytes to read at once, when reading output in chunks
+CHUNK_SIZE = 2**16
+
+
+class CommandRunner:
+    """Run a command as an asyncio subprocess.
+
+    Output is read through pipes as soon as it is available, rather than via an
+    intermediate file. If the task consuming the output is cancelled, e.g. by
+    dismissing the screen which owns the worker, the process is killed.
+
+    """
+
+    def __init__(self, command: list[str]):
+        self.command = command
+        self.returncode: Optional[int] = None
+
+    async def iter_chunks(self, size: int = CHUNK_SIZE) -> AsyncIterator[str]:
+        """Yield combined stdout and stderr, as it is written, in chunks of any length.
+
+        This is much cheaper than reading line by line when there is a lot of
+        output, but chunks may end part way through a line.
+
+        """
+        process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            assert process.stdout is not None
+            while chunk := await process.stdout.read(size):
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            text = decoder.decode(b"", final=True)
+            if text:
+                yield text
+            self.returncode = await process.wait()
+        finally:
+            await _terminate(process)
+
+    async def iter_records(self, separator: bytes = b"\0") -> AsyncIterator[str]:
+        """Yield the chunks of stdout between separators, as they are written.
+
+        The final chunk is yielded even if it is not followed by a separator.
+        Stderr is discarded.
+
+        """
+        process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=LINE_LIMIT,
+        )
+        try:
+            assert process.stdout is not None
+            while True:
+                try:
+                    chunk = await process.stdout.readuntil(separator)
+                except asyncio.IncompleteReadError as e:
+                    if e.partial:
+                        yield e.partial.decode(errors="replace")
+                    break
+                yield chunk[: -len(separator)].decode(errors="replace")
+            self.returncode = await process.wait()
+        finally:
+            await _terminate(process)
+
+
+async def _terminate(process: asyncio.subprocess.Process) -> None:
+    """Kill the process if it is still running, and reap it."""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
@@ -1,28 +1,72 @@
-import asyncio
-import json
-import subprocess
-import tempfile
+import time
+from collections.abc import Iterator
+from concurrent.futures import as_completed
+from functools import partial
 from pathlib import Path
 from typing import Any
+from typing import Callable
 from typing import Optional
+from typing import Union
 
-from rich.json import JSON
+from rich.filesize import decimal
+from rich.text import Text
+from textual.app import App
 from textual.app import ComposeResult
 from textual.containers import Grid
+from textual.message import Message
 from textual.reactive import reactive
+from textual.screen import ModalScreen
 from textual.screen import Screen as _Screen
 from textual.widgets import DataTable
 from textual.widgets import Footer
 from textual.widgets import Header
+from textual.widgets import Input
 from textual.widgets import Log
 from textual.widgets import Static
+from textual.widgets import TabbedContent
+from textual.widgets import TabPane
+from textual.worker import Worker
+from textual.worker import get_current_worker
 
+from conda_tui.cache import prefix_state
+from conda_tui.dependencies import DependencyGraph
+from conda_tui.dependencies import load_dependency_graph
+from conda_tui.dependencies import merge_specs
+from conda_tui.dependencies import requested_packages
+from conda_tui.diff import ADDED
+from conda_tui.diff import CHANGED
+from conda_tui.diff import REMOVED
+from conda_tui.diff import PackageChange
+from conda_tui.diff import count_changes
+from conda_tui.diff import diff_environments
+from conda_tui.diff import diff_revision
+from conda_tui.diff import load_history
+from conda_tui.disk_usage import iter_disk_usage
 from conda_tui.environment import Environment
+from conda_tui.environment import environment_sources
+from conda_tui.environment import iter_environments
 from conda_tui.environment import list_environments
+from conda_tui.environment import sort_environments
 from conda_tui.package import Package
 from conda_tui.package import list_packages_for_environment
+from conda_tui.package import load_descriptions
+from conda_tui.package import save_descriptions
+from conda_tui.package_index import Installation
+from conda_tui.package_index import PackageIndex
+from conda_tui.profiling import profiler
+from conda_tui.search import SearchIndex
+from conda_tui.transaction import OPERATIONS
+from conda_tui.transaction import REMOVE
+from conda_tui.transaction import UPDATE
+from conda_tui.transaction import PackageTransaction
+from conda_tui.transaction import TransactionQueue
+from conda_tui.widgets import BatchedDataTable
+from conda_tui.widgets import CommandLog
+from conda_tui.widgets import FilterInput
 from conda_tui.widgets import Logo
 from conda_tui.widgets import PackageUpdateProgress
+from conda_tui.widgets import VirtualTable
+from conda_tui.widgets.command_log import DEFAULT_MAX_LINES
 from conda_tui.widgets.progress import ShellCommandProgress
 
 HOME_TEXT = """\
@@ -60,66 +104,362 @@ class HomeScreen(Screen):
 
 
 class EnvironmentScreen(Screen):
-    """A screen displaying a list of all conda environments on the system."""
+    """A screen displaying a list of all conda environments on the system.
+
+    Once discovery is complete, the environment registries and envs directories
+    are watched, and environments which are created or removed are added to or
+    removed from the table, without reloading the others.
+
+    """
 
     environments: list[Environment]
 
+    BINDINGS = [
+        ("u", "check_updates", "Check All for Updates"),
+        ("d", "compare", "Compare"),
+        ("slash", "filter", "Filter"),
+    ]
+
+    # How often to add newly discovered environments to the table, in seconds
+    DISCOVERY_INTERVAL = 0.05
+
+    # The columns which are filled in by background workers
+    COMPUTED_COLUMNS = ("size", "unique", "updates")
+
+    class EnvironmentsChanged(Message):
+        """Posted by the watcher when environments may have been created or removed."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.environments = []
+        self._search_index: Optional[SearchIndex] = None
+        # The environment chosen to be compared with another
+        self._compare_with: Optional[Environment] = None
+
     def compose(self) -> ComposeResult:
         yield from super().compose()
-        table = DataTable()
+        yield FilterInput(placeholder="Filter environments by name or path")
+        table = BatchedDataTable()
         table.cursor_type = "row"
-        table.add_columns("Name", "Path")
+        table.add_column("Name", key="name")
+        table.add_column("Path", key="path")
+        table.add_column("Size", key="size")
+        table.add_column("Unique", key="unique")
+        table.add_column("Updates", key="updates")
         yield table
 
     def on_mount(self) -> None:
-        self.environments = list_environments()
+        self.run_worker(
+            self.load_environments, group="environments", exclusive=True, thread=True
+        )
+
+    def load_environments(self) -> None:
+        """Discover environments in a thread, adding them to the table as they are found.
+
+        Once discovery is complete, the rows are sorted and the search index is built.
+
+        """
+        worker = get_current_worker()
+        found: list[Environment] = []
+        batch: list[Environment] = []
+        flushed = time.monotonic()
+        with profiler.span("environments.discover"):
+            for env in iter_environments():
+                if worker.is_cancelled:
+                    return
+                batch.append(env)
+                if time.monotonic() - flushed >= self.DISCOVERY_INTERVAL:
+                    self.app.call_from_thread(self._add_environment_rows, batch)
+                    found.extend(batch)
+                    batch = []
+                    flushed = time.monotonic()
+        found.extend(batch)
+        self.app.call_from_thread(self._set_environments, sort_environments(found))
+        self.app.call_from_thread(
+            self.app.watcher.watch,
+            "environments",
+            environment_sources(),
+            self._on_environments_changed,
+        )
+
+    def _on_environments_changed(self) -> None:
+        # Called from the watcher thread, which mustn't wait for the event loop
+        self.post_message(self.EnvironmentsChanged())
+
+    def on_environment_screen_environments_changed(
+        self, event: EnvironmentsChanged
+    ) -> None:
+        self.run_worker(
+            self.refresh_environments,
+            group="environments",
+            exclusive=True,
+            thread=True,
+        )
+
+    def refresh_environments(self) -> None:
+        """Discover the environments again, and apply any changes to the table."""
+        with profiler.span("environments.refresh"):
+            found = list(iter_environments())
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self._apply_environment_changes, found)
+
+    def _apply_environment_changes(self, found: list[Environment]) -> None:
+        """Remove the rows of environments which are gone, and add any new ones.
+
+        New environments are added at the end, and their disk usage is computed.
+
+        """
+        prefixes = {env.prefix for env in found}
+        current = {env.prefix for env in self.environments}
+        removed = [env for env in self.environments if env.prefix not in prefixes]
+        added = [env for env in sort_environments(found) if env.prefix not in current]
+        if not removed and not added:
+            return
+        table = self.query_one(BatchedDataTable)
+        for env in removed:
+            table.remove_row(str(env.prefix))
+        self.environments = [env for env in self.environments if env.prefix in prefixes]
+        self._add_environment_rows(added)
+        self._search_index = SearchIndex(
+            f"{env.name} {env.prefix}" for env in self.environments
+        )
+        query = self.query_one(FilterInput).value
+        if query.strip():
+            self._apply_filter(query)
+        if added:
+            self.run_worker(
+                partial(self.compute_disk_usage, added), group="disk-usage", thread=True
+            )
+
+    def _add_environment_rows(
+        self,
+        environments: list[Environment],
+        computed: Optional[list[tuple[Any, ...]]] = None,
+    ) -> None:
+        table = self.query_one(BatchedDataTable)
+        blank = ("",) * len(self.COMPUTED_COLUMNS)
+        for env, cells in zip(environments, computed or [blank] * len(environments)):
+            table.add_row(
+                f"[bold green]{env.name}[/]", env.prefix, *cells, key=str(env.prefix)
+            )
+        self.environments.extend(environments)
+
+    def _set_environments(self, environments: list[Environment]) -> None:
+        """Replace the rows with the sorted environments, once all are discovered.
+
+        Then, the disk usage of every environment is computed in the background.
+
+        """
+        if environments != self.environments:
+            # Keep the results of any update checks started during discovery
+            table = self.query_one(BatchedDataTable)
+            shown = {
+                env.prefix: tuple(
+                    table.get_cell(str(env.prefix), column)
+                    for column in self.COMPUTED_COLUMNS
+                )
+                for env in self.environments
+            }
+            blank = ("",) * len(self.COMPUTED_COLUMNS)
+            computed = [shown.get(env.prefix, blank) for env in environments]
+            table.clear()
+            self.environments = []
+            self._add_environment_rows(environments, computed)
+        self._search_index = SearchIndex(
+            f"{env.name} {env.prefix}" for env in self.environments
+        )
+        self._apply_filter(self.query_one(FilterInput).value)
+        self.run_worker(
+            self.compute_disk_usage, group="disk-usage", exclusive=True, thread=True
+        )
+
+    def compute_disk_usage(
+        self, environments: Optional[list[Environment]] = None
+    ) -> None:
+        """Compute the disk usage of the environments, showing each as it finishes.
+
+        By default, that of all environments is computed.
+
+        """
+        worker = get_current_worker()
+        if environments is None:
+            environments = self.environments
+        for prefix, usage in iter_disk_usage([env.prefix for env in environments]):
+            if worker.is_cancelled:
+                return
+            self.app.call_from_thread(
+                self._update_cells,
+                {
+                    (str(prefix), "size"): self._format_size(usage.total),
+                    (str(prefix), "unique"): self._format_size(usage.unique),
+                },
+            )
+
+    def _update_cells(self, updates: dict[tuple[str, str], Any]) -> None:
+        """Update cells of the table, skipping any environments removed since."""
+        prefixes = {str(env.prefix) for env in self.environments}
+        self.query_one(BatchedDataTable).update_cells(
+            {key: value for key, value in updates.items() if key[0] in prefixes}
+        )
+
+    @staticmethod
+    def _format_size(size: int) -> Text:
+        return Text(decimal(size), justify="right")
+
+    def action_filter(self) -> None:
+        self.query_one(FilterInput).open()
+
+    def on_filter_input_applied(self, event: FilterInput.Applied) -> None:
+        self._apply_filter(event.query)
+
+    def _apply_filter(self, query: str) -> None:
+        # Until discovery is complete, the filter is applied once it is
+        if self._search_index is None:
+            return
+        table = self.query_one(BatchedDataTable)
+        if not query.strip():
+            table.filter_rows(None)
+            return
+        indices = self._search_index.search(query)
+        table.filter_rows(
+            (str(self.environments[i].prefix) for i in indices), in_order=True
+        )
+
+    def action_check_updates(self) -> None:
         table = self.query_one(DataTable)
-        table.add_rows(
-            [(f"[bold green]{env.name}[/]", env.prefix) for env in self.environments]
+        for env in self.environments:
+            table.update_cell(str(env.prefix), "updates", "\N{HORIZONTAL ELLIPSIS}")
+        self.run_worker(
+            self.check_all_updates, group="updates", exclusive=True, thread=True
+        )
+
+    def check_all_updates(self) -> None:
+        """Check all environments for updates.
+
+        The checks are run by the shared update checker, which reads cached
+        results concurrently, solves one environment at a time, and shares the
+        loaded channel data between solves. Results are shown in the table as
+        each check finishes.
+
+        """
+        worker = get_current_worker()
+        futures = {
+            self.app.update_checker.submit(env): env for env in self.environments
+        }
+        try:
+            for future in as_completed(futures):
+                if worker.is_cancelled:
+                    return
+                env = futures[future]
+                try:
+                    updates = future.result()
+                    installed = list_packages_for_environment(env)
+                except Exception:
+                    updates = None
+                if updates is None:
+                    text = Text.from_markup("[red]error[/]")
+                else:
+                    count = sum(pkg.name in updates for pkg in installed)
+                    text = self._format_update_count(count)
+                self.app.call_from_thread(
+                    self._update_cells, {(str(env.prefix), "updates"): text}
+                )
+        finally:
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def _format_update_count(count: int) -> Text:
+        if count:
+            return Text.from_markup(f"[bold #DB6015]{count} \N{UPWARDS ARROW}[/]")
+        return Text.from_markup("[bold #43b049]\N{HEAVY CHECK MARK}[/]")
+
+    def action_compare(self) -> None:
+        """Choose the environment under the cursor to compare, then show the comparison.
+
+        The first environment chosen is the one compared against.
+
+        """
+        table = self.query_one(BatchedDataTable)
+        if not table.row_count:
+            return
+        row_key = table.coordinate_to_cell_key(table.cursor_coordinate).row_key
+        environment = Environment(prefix=Path(row_key.value))
+        if self._compare_with is None or self._compare_with == environment:
+            self._compare_with = environment
+            self.notify(
+                f"Comparing with {environment.name or environment.prefix}. "
+                "Choose another environment and press D again."
+            )
+            return
+        old, self._compare_with = self._compare_with, None
+        self.app.push_screen(
+            PackageDiffScreen(
+                title=f"{old.name or old.prefix} \N{RIGHTWARDS ARROW} "
+                f"{environment.name or environment.prefix}",
+                compare=partial(diff_environments, old, environment),
+            )
         )
 
     def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
         """When we select a specific item on the list view, open the package list screen and
         set the environment reactive variable on that view."""
         screen = self.app.get_screen("package_list")
-        screen.environment = self.environments[event.cursor_row]
+        screen.environment = Environment(prefix=Path(event.row_key.value))
         self.app.push_screen(screen)
 
 
 class PackageListScreen(Screen):
-    """A screen to display the packages installed into a specific environment."""
+    """A screen to display the packages installed into a specific environment.
+
+    The table is populated by a background worker, so the screen renders
+    immediately. Rows are added in batches, and the descriptions, which must be
+    read from the package cache, are filled in afterwards.
+
+    While the screen is shown, the environment's `conda-meta` directory is watched,
+    and packages which are installed, removed or changed by another process are
+    updated in place, as they are when returning to the screen after a transaction.
+
+    """
 
     environment = reactive[Optional[Environment]](None)
     packages: list[Package]
 
     BINDINGS = [
         ("escape", "go_back", "Back"),
-        ("u", "update_package", "Update"),
+        ("u", "update_packages", "Update"),
+        ("x", "remove_packages", "Remove"),
         ("s", "show_available_updates", "Show Available Updates"),
+        ("r", "refresh_updates", "Refresh Updates"),
+        ("v", "show_history", "History"),
+        ("l", "show_leaves", "Leaves"),
+        ("slash", "filter", "Filter"),
     ]
 
+    # The number of rows to add to the table in each batch
+    ROW_BATCH_SIZE = 200
+
+    class PackagesChanged(Message):
+        """Posted by the watcher when the environment's conda-meta has changed."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.packages = []
+        self._packages_by_name: dict[str, Package] = {}
+        self._search_index: Optional[SearchIndex] = None
+        self._loaded_environment: Optional[Environment] = None
+        self._loaded_state: Optional[tuple] = None
+
     def compose(self) -> ComposeResult:
         yield from super().compose()
-        assert self.environment is not None, "Shouldn't be possible"
-        table = DataTable()
-        table.cursor_type = "row"
-        table.add_columns("Name", "Description", "", "Version", "Build", "Channel")
-        self.packages = list_packages_for_environment(self.environment)
-        for row_num, pkg in enumerate(self.packages):
-            # TODO: Figure out a more dynamic way to do this
-            description = pkg.description
-            if len(description) > 80:
-                description = description[: 80 - 3] + "..."
-
-            table.add_row(
-                pkg.name,
-                description,
-                pkg.status,
-                pkg.version,
-                pkg.build,
-                pkg.schannel,
-                key=pkg.name,
-            )
+        yield FilterInput(placeholder="Filter packages by name, description or channel")
+        table = VirtualTable()
+        table.add_column("Name", key="name")
+        table.add_column("Description", key="description")
+        table.add_column("", key="status")
+        table.add_column("Version", key="version")
+        table.add_column("Build", key="build")
+        table.add_column("Channel", key="channel")
         yield table
 
     def on_screen_resume(self) -> None:
@@ -128,145 +468,1133 @@ class PackageListScreen(Screen):
         else:
             self.header_text = f"conda-tui: packages in {self.environment.prefix}"
 
-        self.run_worker(self.refresh_package_statuses)
-
-    async def refresh_package_statuses(self):
-        """Call conda in the background to get update results, and update the statuses in the table."""
+        self.app.watcher.watch(
+            self,
+            [self.environment.prefix / "conda-meta"],
+            self._on_packages_changed,
+        )
 
-        if self.environment.name:
-            env_args = ["-n", self.environment.name]
+        # Reload if another environment is shown, or apply any changes to this one,
+        # e.g. after an update
+        state = prefix_state(self.environment.prefix)
+        if self.environment != self._loaded_environment:
+            self._loaded_environment = self.environment
+            self._loaded_state = state
+            self.packages = []
+            self._packages_by_name = {}
+            self._search_index = None
+            self.workers.cancel_group(self, "updates")
+            filter_input = self.query_one(FilterInput)
+            filter_input.value = ""
+            filter_input.add_class("hidden")
+            self.query_one(VirtualTable).clear()
+            self.run_worker(
+                self.load_packages, group="packages", exclusive=True, thread=True
+            )
+        elif state != self._loaded_state:
+            self.run_worker(
+                self.refresh_packages, group="packages", exclusive=True, thread=True
+            )
         else:
-            env_args = ["-p", str(self.environment.prefix)]
-        command = ["conda", "update", *env_args, "--all", "--dry-run", "--json"]
+            self.run_worker(
+                self.refresh_package_statuses, group="updates", exclusive=True
+            )
 
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            tmp_path = Path(tmp_dir, "tmp.json")
-            with tmp_path.open("w") as fp:
-                process = subprocess.Popen(command, stdout=fp, stderr=fp)
-                while process.poll() is None:
-                    await asyncio.sleep(0.1)
+    def on_screen_suspend(self) -> None:
+        # Changes made while the screen is hidden are applied when it is resumed
+        self.app.watcher.unwatch(self)
 
-            with tmp_path.open("r") as fp:
-                try:
-                    data = json.load(fp)
-                except json.JSONDecodeError:
-                    data = {}
+    def _on_packages_changed(self) -> None:
+        # Called from the watcher thread, which mustn't wait for the event loop
+        self.post_message(self.PackagesChanged())
 
-        fetch_names = {
-            pkg["name"]: pkg["version"]
-            for pkg in data.get("actions", {}).get("FETCH", [])
-        }
+    def on_package_list_screen_packages_changed(self, event: PackagesChanged) -> None:
+        self.run_worker(
+            self.refresh_packages, group="packages", exclusive=True, thread=True
+        )
 
-        table = self.query_one(DataTable)
-        for row_num, package in enumerate(self.packages):
-            if package.name in fetch_names:
-                package.update_available = True
-                table.update_cell_at(
-                    (row_num, 3),
-                    f"{package.version} \N{RIGHTWARDS ARROW} {fetch_names[package.name]}",
-                )
+    def load_packages(self) -> None:
+        """Load the packages in a thread, streaming them into the table in batches.
+
+        Once all rows are displayed, descriptions are loaded and filled in, and
+        finally the update check is started.
+
+        """
+        worker = get_current_worker()
+        environment = self.environment
+        with profiler.span("packages.list"):
+            packages = list_packages_for_environment(environment)
+
+        batch_size = self.ROW_BATCH_SIZE
+        for start in range(0, len(packages), batch_size):
+            if worker.is_cancelled:
+                return
+            self.app.call_from_thread(
+                self._add_package_rows, packages[start : start + batch_size]
+            )
+
+        missing = [pkg for pkg in packages if pkg.description is None]
+        with profiler.span("packages.descriptions"):
+            for batch in load_descriptions(missing, batch_size=batch_size):
+                if worker.is_cancelled:
+                    return
+                self.app.call_from_thread(self._update_descriptions, batch)
+            if missing:
+                save_descriptions(environment.prefix, missing)
+
+        with profiler.span("search.index"):
+            search_index = SearchIndex(
+                f"{pkg.name} {pkg.description} {pkg.schannel}" for pkg in packages
+            )
+        self.app.call_from_thread(self._set_search_index, search_index, worker)
+
+        # Built once per load, for the detail screens and the impact of transactions
+        load_dependency_graph(environment)
+
+        self.app.call_from_thread(
+            self.run_worker,
+            self.refresh_package_statuses,
+            group="updates",
+            exclusive=True,
+        )
+
+    def refresh_packages(self) -> None:
+        """Load the packages again in a thread, and apply any changes to the table.
+
+        Only the records which have changed are read again, and only the new
+        packages need their descriptions to be loaded.
+
+        """
+        worker = get_current_worker()
+        environment = self.environment
+        state = prefix_state(environment.prefix)
+        with profiler.span("packages.refresh"):
+            packages = list_packages_for_environment(environment)
+            missing = [pkg for pkg in packages if pkg.description is None]
+            for _ in load_descriptions(missing, batch_size=self.ROW_BATCH_SIZE):
+                if worker.is_cancelled:
+                    return
+            if missing:
+                save_descriptions(environment.prefix, missing)
+        if worker.is_cancelled:
+            return
+        self.app.call_from_thread(
+            self._apply_package_changes, environment, state, packages
+        )
+
+    def _apply_package_changes(
+        self, environment: Environment, state: Optional[tuple], packages: list[Package]
+    ) -> None:
+        """Update the table to show the given packages, changing only what differs.
+
+        Unchanged packages keep their rows and update statuses. The update check
+        is then run again, since it depends on what is installed.
+
+        """
+        if environment != self._loaded_environment:
+            return
+        self._loaded_state = state
+        table = self.query_one(VirtualTable)
+        previous = self._packages_by_name
+        # Unchanged packages keep their previous objects, with their statuses
+        packages = list(packages)
+        added, changed = [], []
+        for i, pkg in enumerate(packages):
+            old = previous.get(pkg.name)
+            if old is None:
+                added.append(pkg)
+            elif (pkg.version, pkg.build, pkg.schannel, pkg.filename) != (
+                old.version,
+                old.build,
+                old.schannel,
+                old.filename,
+            ):
+                changed.append(pkg)
             else:
-                package.update_available = False
-            table.update_cell_at((row_num, 2), package.status)
+                packages[i] = old
+        names = {pkg.name for pkg in packages}
+        with self.app.batch_update():
+            table.remove_rows(name for name in previous if name not in names)
+            table.update_cells(
+                {
+                    (pkg.name, column): value
+                    for pkg in changed
+                    for column, value in zip(
+                        ("description", "status", "version", "build", "channel"),
+                        self._package_cells(pkg)[1:],
+                    )
+                }
+            )
+            self._add_package_rows(added)
+            table.order_rows(pkg.name for pkg in packages)
+        self.packages = packages
+        self._packages_by_name = {pkg.name: pkg for pkg in packages}
+        with profiler.span("search.index"):
+            self._search_index = SearchIndex(
+                f"{pkg.name} {pkg.description} {pkg.schannel}" for pkg in packages
+            )
+        query = self.query_one(FilterInput).value
+        if query.strip():
+            self._apply_filter(query)
+        self.run_worker(self.refresh_package_statuses, group="updates", exclusive=True)
+
+    def _package_cells(self, pkg: Package) -> tuple[Any, ...]:
+        return (
+            pkg.name,
+            self._format_description(pkg.description),
+            pkg.status,
+            pkg.version,
+            pkg.build,
+            pkg.schannel,
+        )
+
+    def _add_package_rows(self, packages: list[Package]) -> None:
+        table = self.query_one(VirtualTable)
+        table.add_rows((pkg.name, self._package_cells(pkg)) for pkg in packages)
+        self.packages.extend(packages)
+        self._packages_by_name.update((pkg.name, pkg) for pkg in packages)
+
+    def _set_search_index(self, search_index: SearchIndex, worker: Worker) -> None:
+        # Checked on the UI thread, since a refresh may have replaced the packages
+        # which the index was built from, along with their order
+        if worker.is_cancelled:
+            return
+        self._search_index = search_index
+        query = self.query_one(FilterInput).value
+        if query:
+            self._apply_filter(query)
+
+    def action_filter(self) -> None:
+        self.query_one(FilterInput).open()
+
+    def on_filter_input_applied(self, event: FilterInput.Applied) -> None:
+        self._apply_filter(event.query)
+
+    def _apply_filter(self, query: str) -> None:
+        # Until the index is built, the filter is applied once it is ready
+        if self._search_index is None:
+            return
+        table = self.query_one(VirtualTable)
+        if not query.strip():
+            table.filter_rows(None)
+            return
+        # The row keys, in the same order as the documents of the search index.
+        # Rows are shown in the order of the results, so fuzzy matches are ranked.
+        names = list(self._packages_by_name)
+        table.filter_rows(
+            (names[i] for i in self._search_index.search(query)), in_order=True
+        )
+
+    def _update_descriptions(self, packages: list[Package]) -> None:
+        table = self.query_one(VirtualTable)
+        table.update_cells(
+            {
+                (pkg.name, "description"): self._format_description(pkg.description)
+                for pkg in packages
+            }
+        )
+
+    @staticmethod
+    def _format_description(description: Optional[str]) -> str:
+        # TODO: Figure out a more dynamic way to do this
+        description = description or ""
+        if len(description) > 80:
+            description = description[: 80 - 3] + "..."
+        return description
+
+    async def refresh_package_statuses(self, force: bool = False):
+        """Check for updates in the background, and update the statuses in the table.
+
+        Recent results are reused, unless `force` is True.
+
+        """
+        fetch_names = await self.app.update_checker.check(self.environment, force=force)
+        if fetch_names is None:
+            self.notify("Failed to check for updates", severity="error")
+
+        table = self.query_one(VirtualTable)
+        with self.app.batch_update():
+            table.update_cells(self._diff_package_statuses(fetch_names))
+
+    def _diff_package_statuses(
+        self, fetch_names: Optional[dict[str, str]]
+    ) -> dict[tuple[str, str], Any]:
+        """Apply the update results to the packages.
+
+        If the check failed, the statuses are unknown. Returns only the cells
+        which have changed, keyed by (row key, column key).
+
+        """
+        table = self.query_one(VirtualTable)
+        changes: dict[tuple[str, str], Any] = {}
+        for package in self.packages:
+            new_version = None if fetch_names is None else fetch_names.get(package.name)
+            update_available = None if fetch_names is None else new_version is not None
+            if package.update_available != update_available:
+                package.update_available = update_available
+                changes[package.name, "status"] = package.status
+
+            version = package.version
+            if new_version is not None:
+                version = f"{version} \N{RIGHTWARDS ARROW} {new_version}"
+            if table.get_cell(package.name, "version") != version:
+                changes[package.name, "version"] = version
+        return changes
 
     def action_go_back(self) -> None:
+        self.workers.cancel_group(self, "updates")
         self.dismiss()
 
-    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
-        """Push a new package detail screen when a package is selected."""
-        self.app.push_screen(
-            PackageDetailScreen(package=self.packages[event.cursor_row])
+    def action_refresh_updates(self) -> None:
+        self.run_worker(
+            self.refresh_package_statuses(force=True), group="updates", exclusive=True
         )
 
-    def action_update_package(self):
-        """Launch a new screen to display package update progress."""
-        table = self.query_one(DataTable)
-        row_num = table.cursor_row
-        package = self.packages[row_num]
+    def on_virtual_table_row_selected(self, event: VirtualTable.RowSelected) -> None:
+        """Push a new package detail screen when a package is selected."""
+        package = self._packages_by_name[event.row_key]
+        self.app.push_screen(PackageDetailScreen(package=package))
 
-        def update_package_status(was_success: bool):
-            if was_success:
-                table.update_cell_at((row_num, 2), package.status)
+    def action_update_packages(self) -> None:
+        self._run_transaction(UPDATE)
 
-        self.app.push_screen(
-            PackageUpdateScreen(package=package), update_package_status
-        )
+    def action_remove_packages(self) -> None:
+        self._run_transaction(REMOVE)
+
+    def _run_transaction(self, operation: str) -> None:
+        """Queue packages for an operation, and show the environment's transactions.
+
+        The marked packages are queued, or if none are marked, the one under the
+        cursor.
+
+        """
+        table = self.query_one(VirtualTable)
+        row_keys = table.marked_row_keys
+        if not row_keys and table.cursor_row_key is not None:
+            row_keys = [table.cursor_row_key]
+        if not row_keys:
+            return
+        screen = TransactionScreen.for_environment(self.app, self.environment)
+        screen.enqueue(operation, [self._packages_by_name[key] for key in row_keys])
+        table.clear_marks()
+        self.app.push_screen(screen)
+
+    def action_show_history(self) -> None:
+        self.app.push_screen(HistoryScreen(environment=self.environment))
+
+    def action_show_leaves(self) -> None:
+        self.app.push_screen(LeafPackagesScreen(environment=self.environment))
 
     def action_show_available_updates(self) -> None:
         if self.environment.name:
             env_args = ["-n", self.environment.name]
         else:
             env_args = ["-p", str(self.environment.prefix)]
-        screen = ShellCommandScreen(
+        self.app.action_run_command(
             ["conda", "update", *env_args, "--all", "--dry-run"]
         )
+
+
+class PackageSearchScreen(Screen):
+    """A screen to find the environments in which packages are installed.
+
+    Queries are answered from the package index as the user types, e.g.
+    "openssl <3". Whenever the screen is shown, the index is refreshed in the
+    background, which only indexes the environments that have changed.
+
+    """
+
+    BINDINGS = [
+        ("slash", "focus_query", "Search"),
+    ]
+
+    # How often to show the progress of indexing, in seconds
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._index: Optional[PackageIndex] = None
+        self._results: list[Installation] = []
+
+    def compose(self) -> ComposeResult:
+        yield from super().compose()
+        yield Input(
+            placeholder="Find a package by name, and optionally version, e.g. openssl <3"
+        )
+        yield Static(id="package-search-status")
+        table = VirtualTable()
+        table.add_column("Environment", key="environment")
+        table.add_column("Name", key="name")
+        table.add_column("Version", key="version")
+        table.add_column("Build", key="build")
+        table.add_column("Channel", key="channel")
+        yield table
+
+    def on_screen_resume(self) -> None:
+        self.header_text = "conda-tui: find packages"
+        self.query_one(Input).focus()
+        self.run_worker(
+            self.refresh_index, group="package-index", exclusive=True, thread=True
+        )
+
+    def refresh_index(self) -> None:
+        """Load the persisted index in a thread, and then bring it up to date.
+
+        Results are shown from the persisted index straight away, and updated as
+        changed environments are indexed.
+
+        """
+        worker = get_current_worker()
+        index = self.app.package_index
+        self.app.call_from_thread(self._set_index, index)
+        with profiler.span("package_index.refresh"):
+            environments = list_environments()
+            count = len(index)
+            indexed = 0
+            shown = time.monotonic()
+            for indexed, _ in enumerate(index.refresh(environments), 1):
+                if worker.is_cancelled:
+                    return
+                if time.monotonic() - shown >= self.PROGRESS_INTERVAL:
+                    self.app.call_from_thread(self._search, f"Indexing... ({indexed})")
+                    shown = time.monotonic()
+            if indexed or len(index) != count:
+                index.save()
+        self.app.call_from_thread(self._search)
+
+    def _set_index(self, index: PackageIndex) -> None:
+        self._index = index
+        self._search()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self._search()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        self.query_one(VirtualTable).focus()
+
+    def action_focus_query(self) -> None:
+        self.query_one(Input).focus()
+
+    def _search(self, progress: str = "") -> None:
+        """Show the installations matching the query, and how long they took to find."""
+        if self._index is None:
+            return
+        status = self.query_one("#package-search-status", Static)
+        table = self.query_one(VirtualTable)
+        query = self.query_one(Input).value
+        start = time.perf_counter()
+        try:
+            results = self._index.find(query)
+        except ValueError as e:
+            status.update(Text(f"Invalid version spec: {e}", style="red"))
+            return
+        elapsed = time.perf_counter() - start
+
+        table.clear()
+        table.add_rows(
+            (
+                str(i),
+                (
+                    inst.environment.name or str(inst.environment.prefix),
+                    inst.name,
+                    inst.version,
+                    inst.build,
+                    inst.schannel,
+                ),
+            )
+            for i, inst in enumerate(results)
+        )
+        self._results = results
+        if query.strip():
+            environments = len({inst.environment for inst in results})
+            text = (
+                f"{len(results)} installations in {environments} of "
+                f"{len(self._index)} environments ({elapsed * 1000:.1f} ms)"
+            )
+        else:
+            text = f"{len(self._index)} environments indexed"
+        status.update(f"{text} {progress}".rstrip())
+
+    def on_virtual_table_row_selected(self, event: VirtualTable.RowSelected) -> None:
+        """Show the packages of the environment in which a package is installed."""
+        screen = self.app.get_screen("package_list")
+        screen.environment = self._results[int(event.row_key)].environment
         self.app.push_screen(screen)
 
 
-class PackageUpdateScreen(Screen):
+class PackageDiffScreen(Screen):
+    """A screen listing the packages which differ between two sets of packages.
+
+    The comparison is given as a function, which runs in a thread, so the same
+    screen compares two environments, or an environment with one of its
+    revisions.
+
+    """
+
     BINDINGS = [
         ("escape", "go_back", "Back"),
     ]
 
-    def __init__(self, *args: Any, package: Package, **kwargs: Any):
+    CHANGE_STYLES = {ADDED: "bold green", REMOVED: "bold red", CHANGED: "bold yellow"}
+
+    def __init__(
+        self,
+        *args: Any,
+        title: str,
+        compare: Callable[[], list[PackageChange]],
+        **kwargs: Any,
+    ):
         super().__init__(*args, **kwargs)
-        self._package = package
+        self._title = title
+        self._compare = compare
 
     def compose(self) -> ComposeResult:
         yield from super().compose()
-        yield Static(f"Updating package [cyan bold]`{self._package.name}`[/cyan bold]")
-        yield Static("[red bold]TODO[/red bold]: Hook this up to actual download")
-        yield PackageUpdateProgress(package=self._package)
+        yield Static("Comparing\N{HORIZONTAL ELLIPSIS}", id="diff-summary")
+        table = VirtualTable()
+        table.add_column("Name", key="name")
+        table.add_column("Change", key="change")
+        table.add_column("Version", key="version")
+        table.add_column("Build", key="build")
+        table.add_column("Channel", key="channel")
+        yield table
+
+    def on_mount(self) -> None:
+        super().on_mount()
+        self.header_text = f"conda-tui: {self._title}"
+        self.run_worker(self.compare_packages, thread=True)
+
+    def compare_packages(self) -> None:
+        changes = self._compare()
+        self.app.call_from_thread(self._show_changes, changes)
+
+    def _show_changes(self, changes: list[PackageChange]) -> None:
+        self.query_one(VirtualTable).add_rows(
+            (
+                change.name,
+                (
+                    change.name,
+                    Text(change.kind, style=self.CHANGE_STYLES[change.kind]),
+                    *(
+                        self._format_field(change, field)
+                        for field in ("version", "build", "channel")
+                    ),
+                ),
+            )
+            for change in changes
+        )
+        counts = count_changes(changes)
+        summary = ", ".join(f"{count} {kind}" for kind, count in counts.items())
+        self.query_one("#diff-summary", Static).update(
+            summary if changes else "No differences"
+        )
+
+    @staticmethod
+    def _format_field(change: PackageChange, field: str) -> str:
+        """The old and new values of a field, or just one if they are the same."""
+        old = getattr(change.old, field, None)
+        new = getattr(change.new, field, None)
+        if old is None or new is None or old == new:
+            return old or new or ""
+        return f"{old} \N{RIGHTWARDS ARROW} {new}"
 
     def action_go_back(self):
         self.dismiss()
 
 
+class HistoryScreen(Screen):
+    """A screen listing the revisions of an environment, newest first.
+
+    Selecting a revision compares the packages at that revision with those
+    installed now.
+
+    """
+
+    BINDINGS = [
+        ("escape", "go_back", "Back"),
+    ]
+
+    def __init__(self, *args: Any, environment: Environment, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.environment = environment
+
+    def compose(self) -> ComposeResult:
+        yield from super().compose()
+        table = VirtualTable()
+        table.add_column("Revision", key="revision")
+        table.add_column("Date", key="date")
+        table.add_column("Changes", key="changes")
+        table.add_column("Command", key="command")
+        yield table
+
+    def on_mount(self) -> None:
+        super().on_mount()
+        name = self.environment.name or self.environment.prefix
+        self.header_text = f"conda-tui: history of {name}"
+        self.run_worker(self.load_revisions, thread=True)
+
+    def load_revisions(self) -> None:
+        revisions = load_history(self.environment)
+        rows = [
+            (
+                str(revision.number),
+                (
+                    Text(str(revision.number), justify="right"),
+                    revision.date,
+                    self._format_changes(revision.changes),
+                    revision.command,
+                ),
+            )
+            for revision in reversed(revisions)
+        ]
+        self.app.call_from_thread(self.query_one(VirtualTable).add_rows, rows)
+
+    @staticmethod
+    def _format_changes(changes: list[PackageChange]) -> Text:
+        counts = count_changes(changes)
+        return Text.from_markup(
+            f"[green]+{counts[ADDED]}[/] [red]-{counts[REMOVED]}[/] "
+            f"[yellow]~{counts[CHANGED]}[/]"
+        )
+
+    def on_virtual_table_row_selected(self, event: VirtualTable.RowSelected) -> None:
+        revision = int(event.row_key)
+        name = self.environment.name or self.environment.prefix
+        self.app.push_screen(
+            PackageDiffScreen(
+                title=f"{name} at revision {revision} \N{RIGHTWARDS ARROW} now",
+                compare=partial(diff_revision, self.environment, revision),
+            )
+        )
+
+    def action_go_back(self):
+        self.dismiss()
+
+
+class LeafPackagesScreen(Screen):
+    """A screen listing the packages which no other installed package depends on.
+
+    Leaves which were never requested, according to the environment's history,
+    are orphans, and can usually be removed along with their dependencies.
+
+    """
+
+    BINDINGS = [
+        ("escape", "go_back", "Back"),
+    ]
+
+    def __init__(self, *args: Any, environment: Environment, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.environment = environment
+        self._packages: dict[str, Package] = {}
+
+    def compose(self) -> ComposeResult:
+        yield from super().compose()
+        table = VirtualTable()
+        table.add_column("Name", key="name")
+        table.add_column("Version", key="version")
+        table.add_column("Requested", key="requested")
+        table.add_column("Dependencies", key="dependencies")
+        yield table
+
+    def on_mount(self) -> None:
+        super().on_mount()
+        name = self.environment.name or self.environment.prefix
+        self.header_text = f"conda-tui: leaf packages of {name}"
+        self.run_worker(self.load_leaves, thread=True)
+
+    def load_leaves(self) -> None:
+        graph = load_dependency_graph(self.environment)
+        requested = requested_packages(self.environment)
+        packages = {
+            pkg.name: pkg for pkg in list_packages_for_environment(self.environment)
+        }
+        rows = [
+            (
+                name,
+                (
+                    name,
+                    getattr(packages.get(name), "version", ""),
+                    "\N{HEAVY CHECK MARK}" if name in requested else "orphan",
+                    Text(str(len(graph.all_dependencies([name]))), justify="right"),
+                ),
+            )
+            for name in graph.leaves()
+        ]
+        self.app.call_from_thread(self._show_leaves, packages, rows)
+
+    def _show_leaves(self, packages: dict[str, Package], rows: list) -> None:
+        self._packages = packages
+        self.query_one(VirtualTable).add_rows(rows)
+
+    def on_virtual_table_row_selected(self, event: VirtualTable.RowSelected) -> None:
+        package = self._packages.get(event.row_key)
+        if package is not None:
+            self.app.push_screen(PackageDetailScreen(package=package))
+
+    def action_go_back(self):
+        self.dismiss()
+
+
+class TransactionScreen(Screen):
+    """A screen to display the progress of package transactions in an environment.
+
+    There is one screen per environment, which is installed in the app, so that
+    transactions continue in the background once it is dismissed. It's
+    uninstalled once its queue is empty and it isn't shown. Packages which are
+    queued while a transaction is running are updated or removed together in the
+    next one.
+
+    The packages which depend on those being changed, and so may be affected,
+    are found in a thread, from the dependency graph of the environment before
+    the changes, and shown once they're known.
+
+    """
+
+    BINDINGS = [
+        ("escape", "go_back", "Back"),
+    ]
+
+    # The number of affected packages which are named in the queue
+    AFFECTED_SHOWN = 5
+
+    def __init__(self, *args: Any, environment: Environment, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.environment = environment
+        self.queue = TransactionQueue(environment)
+        self._updating = False
+        # Kept until the queue is empty, rather than rebuilt as each transaction
+        # changes the environment
+        self._graph: Optional[DependencyGraph] = None
+        # The queued packages which the affected packages were found for, and them
+        self._affected: tuple[list[str], list[str]] = ([], [])
+
+    @classmethod
+    def for_environment(cls, app: App, environment: Environment) -> "TransactionScreen":
+        """Get the transaction screen of an environment, installing it if necessary."""
+        name = f"transaction:{environment.prefix}"
+        if not app.is_screen_installed(name):
+            app.install_screen(cls(environment=environment), name)
+        return app.get_screen(name)
+
+    def compose(self) -> ComposeResult:
+        yield from super().compose()
+        yield Static(id="transaction-queue")
+        yield PackageUpdateProgress()
+        yield Log(id="transaction-log")
+
+    def enqueue(self, operation: str, packages: list[Package]) -> None:
+        """Queue packages for an operation. It runs once the screen is shown."""
+        self.queue.add(operation, (pkg.name for pkg in packages))
+
+    def on_screen_resume(self) -> None:
+        self.header_text = f"conda-tui: changing packages in {self.environment.prefix}"
+        self._show_queue()
+        if self.queue and not self._updating:
+            self.run_worker(self.run_transactions, group="transaction")
+
+    def _queued_names(self) -> list[str]:
+        pending = (name for op in OPERATIONS for name in self.queue.pending(op))
+        return [*self.queue.running, *pending]
+
+    def _show_queue(self) -> None:
+        """Show the queue, and find the packages which it affects."""
+        self._render_queue()
+        self.run_worker(
+            partial(self.find_affected, self._queued_names()),
+            group="affected",
+            exclusive=True,
+            thread=True,
+        )
+
+    def find_affected(self, names: list[str]) -> None:
+        if not names:
+            return
+        if self._graph is None:
+            self._graph = load_dependency_graph(self.environment)
+        affected = self._graph.all_dependents(names)
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self._set_affected, names, affected)
+
+    def _set_affected(self, names: list[str], affected: list[str]) -> None:
+        self._affected = (names, affected)
+        self._render_queue()
+
+    def _render_queue(self) -> None:
+        lines = []
+        if self.queue.running:
+            running = ", ".join(self.queue.running)
+            lines.append(
+                f"Running {self.queue.running_operation} of [cyan bold]{running}[/]"
+            )
+        for operation in OPERATIONS:
+            pending = self.queue.pending(operation)
+            if pending:
+                lines.append(
+                    f"Queued {operation} of [cyan bold]{', '.join(pending)}[/]"
+                )
+        # Until they're found for the current queue, the affected packages are omitted
+        names, affected = self._affected
+        if affected and names == self._queued_names():
+            shown = ", ".join(affected[: self.AFFECTED_SHOWN])
+            if len(affected) > self.AFFECTED_SHOWN:
+                shown += f" and {len(affected) - self.AFFECTED_SHOWN} more"
+            lines.append(f"Affecting {len(affected)} dependent packages: {shown}")
+        self.query_one("#transaction-queue", Static).update("\n".join(lines))
+
+    async def run_transactions(self) -> None:
+        """Run transactions until the queue is empty."""
+        self._updating = True
+        progress = self.query_one(PackageUpdateProgress)
+        log = self.query_one("#transaction-log", Log)
+        try:
+            while self.queue:
+                operation, names = self.queue.take()
+                self._show_queue()
+                log.write_line(f"Running {operation} of {', '.join(names)}")
+                transaction = PackageTransaction.for_packages(
+                    operation, self.environment, names
+                )
+                try:
+                    await progress.run_transaction(transaction, log)
+                except Exception as e:
+                    # Carry on with the rest of the queue, rather than crash the app
+                    log.write_line(f"Transaction failed: {e}")
+                    self.notify(
+                        f"Failed to {operation} {', '.join(names)}", severity="error"
+                    )
+                finally:
+                    self.queue.done()
+                    self._show_queue()
+        finally:
+            self._updating = False
+            self._graph = None
+            self._uninstall_if_idle()
+
+    def _uninstall_if_idle(self) -> None:
+        """Discard the screen once its queue is empty, unless it's still shown."""
+        if self.queue or self._updating or self in self.app.screen_stack:
+            return
+        self.app.uninstall_screen(self)
+        self.remove()
+
+    def action_go_back(self) -> None:
+        self.dismiss()
+        self._uninstall_if_idle()
+
+
 class ShellCommandScreen(Screen):
+    """A screen to display the output of a command, while it runs.
+
+    Only the last `max_lines` lines of output are kept. If `log_dir` is given,
+    the full output is also saved to a file in it.
+
+    """
+
     BINDINGS = [
         ("escape", "go_back", "Back"),
     ]
 
-    def __init__(self, command: list[str], **kwargs: Any):
+    def __init__(
+        self,
+        command: list[str],
+        max_lines: Optional[int] = DEFAULT_MAX_LINES,
+        log_dir: Optional[Path] = None,
+        **kwargs: Any,
+    ):
         super().__init__(**kwargs)
         self._command = command
+        self._max_lines = max_lines
+        self._log_dir = log_dir
 
     def compose(self) -> ComposeResult:
         yield from super().compose()
         yield ShellCommandProgress()
-        yield Log(highlight=True, id="shell-command-log")
+        yield CommandLog(
+            max_lines=self._max_lines, highlight=True, id="shell-command-log"
+        )
 
-    def on_screen_resume(self) -> None:
-        log = self.query_one("#shell-command-log")
+    def on_mount(self) -> None:
+        # Run only once, not on resume, which also follows closing a modal screen
+        super().on_mount()
+        log = self.query_one("#shell-command-log", CommandLog)
         log.clear()
+        if self._log_dir is not None:
+            name = "-".join(Path(arg).name for arg in self._command[:2])
+            log.spill_to(self._log_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.log")
         progress = self.query_one(ShellCommandProgress)
-        self.run_worker(progress.run_command(self._command, log=log))
+        self.run_worker(progress.run_command(self._command, log=log), exclusive=True)
 
     def action_go_back(self):
+        # Cancelling the worker kills the command if it is still running
+        self.workers.cancel_node(self)
         self.dismiss()
 
 
 class PackageDetailScreen(Screen):
-    """A screen to display the details of a package."""
+    """A screen to display the details of a package.
+
+    The fields shown in the package table are displayed straight away. The full
+    record, which for some packages lists tens of thousands of files, is read in
+    a thread, and each tab is only filled in when it is first shown. Long lists
+    are shown in virtual tables, which only render the visible rows.
+
+    """
 
     BINDINGS = [
         ("escape", "go_back", "Back"),
     ]
 
+    # Fields of the record which are shown in their own tabs
+    LIST_FIELDS = ("depends", "files", "paths_data")
+
+    # The number of files to add to the table at once
+    FILE_PAGE_SIZE = 2000
+
     def __init__(self, *args: Any, package: Package, **kwargs: Any):
         super().__init__(*args, **kwargs)
         self._package = package
+        self._record: Optional[dict[str, Any]] = None
+        self._installed: dict[str, Package] = {}
+        # The tabs which have been filled in
+        self._filled: set[str] = set()
 
     def compose(self) -> ComposeResult:
-        # TODO: This is just a simple JSON dump, should be nicer.
         yield from super().compose()
-        yield Grid(
-            Static(
-                f"Package details for [cyan bold]`{self._package.name}`[/cyan bold]:"
-            ),
-            Static(JSON(json.dumps(self._package.dist_fields_dump()))),
-            id="package-details",
+        yield Static(self._format_summary(), id="package-summary")
+        with TabbedContent(id="package-tabs"):
+            with TabPane("Depends on", id="dependencies"):
+                yield self._make_table("Name", "Spec", "Installed")
+            with TabPane("Required by", id="dependents"):
+                yield self._make_table("Name", "Spec", "Version")
+            with TabPane("Record", id="record"):
+                yield self._make_table("Field", "Value")
+            with TabPane("Files", id="files"):
+                yield self._make_table("Path", "Type", "Size")
+
+    @staticmethod
+    def _make_table(*labels: str) -> VirtualTable:
+        table = VirtualTable()
+        for label in labels:
+            table.add_column(label, key=label.lower())
+        return table
+
+    def _format_summary(self) -> Text:
+        pkg = self._package
+        text = Text.from_markup(
+            f"[cyan bold]{pkg.name}[/] {pkg.version} ({pkg.build}) from {pkg.schannel}"
         )
+        if pkg.description:
+            text.append(f"\n{pkg.description}")
+        return text
+
+    def on_mount(self) -> None:
+        super().on_mount()
+        self.header_text = f"conda-tui: {self._package.name}"
+        self.watch(self.query_one(TabbedContent), "active", self._fill_tab, init=False)
+        self.run_worker(self.load_details, thread=True)
+
+    def load_details(self) -> None:
+        """Show the dependencies from the environment's graph, then read the record."""
+        pkg = self._package
+        environment = Environment(prefix=pkg.prefix)
+        with profiler.span("details.dependencies"):
+            graph = load_dependency_graph(environment)
+            installed = {p.name: p for p in list_packages_for_environment(environment)}
+        self.app.call_from_thread(self._show_dependencies, graph, installed)
+        with profiler.span("details.record"):
+            record = pkg.load_record_data()
+        self.app.call_from_thread(self._set_record, record)
+
+    def _show_dependencies(
+        self, graph: DependencyGraph, installed: dict[str, Package]
+    ) -> None:
+        self._installed = installed
+        name = self._package.name
+        # Rows are keyed by package name, so each package has one, with all its specs
+        dependencies = [
+            dependency
+            for dependency in merge_specs(graph.dependencies(name))
+            if dependency.name != name
+        ]
+        dependents = merge_specs(graph.dependents(name))
+        if name in graph:
+            summary = self._format_summary()
+            summary.append(
+                f"\nDepends on {len(dependencies)} packages "
+                f"({len(graph.all_dependencies([name]))} installed, transitively), "
+                f"required by {len(dependents)} "
+                f"({len(graph.all_dependents([name]))} transitively)"
+            )
+            self.query_one("#package-summary", Static).update(summary)
+        for tab, rows in (("dependencies", dependencies), ("dependents", dependents)):
+            self.query_one(f"#{tab} VirtualTable", VirtualTable).add_rows(
+                (
+                    dependency.name,
+                    (
+                        dependency.name,
+                        dependency.spec,
+                        getattr(installed.get(dependency.name), "version", ""),
+                    ),
+                )
+                for dependency in rows
+            )
+
+    def _set_record(self, record: dict[str, Any]) -> None:
+        self._record = record
+        self._fill_tab(self.query_one(TabbedContent).active)
+
+    def _fill_tab(self, tab: Optional[str]) -> None:
+        """Fill in a tab showing the record, if it hasn't been already."""
+        if self._record is None or tab in self._filled:
+            return
+        if tab == "record":
+            self._filled.add(tab)
+            self.query_one("#record VirtualTable", VirtualTable).add_rows(
+                (field, (field, value))
+                for field, value in self._record_fields(self._record)
+            )
+        elif tab == "files":
+            self._filled.add(tab)
+            self.run_worker(self.load_files, thread=True)
+
+    def _record_fields(self, record: dict[str, Any]) -> Iterator[tuple[str, str]]:
+        for field, value in record.items():
+            if field in self.LIST_FIELDS:
+                continue
+            if isinstance(value, (list, tuple)):
+                value = ", ".join(map(str, value))
+            yield field, str(value)
+
+    def load_files(self) -> None:
+        """Add the files of the record to the table a page at a time, in a thread."""
+        worker = get_current_worker()
+        assert self._record is not None
+        paths = (self._record.get("paths_data") or {}).get("paths")
+        if not paths:
+            paths = [{"_path": path} for path in self._record.get("files") or []]
+        table = self.query_one("#files VirtualTable", VirtualTable)
+        for start in range(0, len(paths), self.FILE_PAGE_SIZE):
+            if worker.is_cancelled:
+                return
+            rows = [
+                (
+                    str(i),
+                    (
+                        path.get("_path", ""),
+                        path.get("path_type", ""),
+                        (
+                            Text(decimal(path["size_in_bytes"]), justify="right")
+                            if "size_in_bytes" in path
+                            else ""
+                        ),
+                    ),
+                )
+                for i, path in enumerate(
+                    paths[start : start + self.FILE_PAGE_SIZE], start
+                )
+            ]
+            self.app.call_from_thread(table.add_rows, rows)
+
+    def on_virtual_table_row_selected(self, event: VirtualTable.RowSelected) -> None:
+        """Show the details of an installed dependency or dependent."""
+        tab = event.control.parent
+        if tab is None or tab.id not in ("dependencies", "dependents"):
+            return
+        package = self._installed.get(event.row_key)
+        if package is not None:
+            self.app.push_screen(PackageDetailScreen(package=package))
 
     def action_go_back(self):
         self.dismiss()
+
+
+class ProfileScreen(ModalScreen):
+    """An overlay showing recent timings and cache statistics, when profiling.
+
+    The recorded data can be saved as JSON, or as a Chrome trace which can be
+    opened in `chrome://tracing` or Perfetto, to the current directory.
+
+    """
+
+    BINDINGS = [
+        ("escape,p", "go_back", "Back"),
+        ("j", "save_json", "Save JSON"),
+        ("t", "save_trace", "Save Trace"),
+        ("c", "clear", "Clear"),
+    ]
+
+    # How often to refresh the statistics, in seconds
+    REFRESH_INTERVAL = 1.0
+
+    def compose(self) -> ComposeResult:
+        spans: DataTable[Union[str, Text]] = DataTable(id="profile-spans")
+        spans.add_column("Span", key="name")
+        for label in ("Count", "Total ms", "Mean ms", "Max ms", "Last ms"):
+            spans.add_column(label, key=label)
+        caches: DataTable[Union[str, Text]] = DataTable(id="profile-caches")
+        caches.add_column("Cache", key="name")
+        for label in ("Hits", "Misses", "Hit ratio"):
+            caches.add_column(label, key=label)
+        yield Grid(
+            Static("[bold]Recent timings[/]"),
+            spans,
+            Static("[bold]Caches[/]"),
+            caches,
+            Static(id="profile-message"),
+            id="profile",
+        )
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.update_statistics()
+        self.set_interval(self.REFRESH_INTERVAL, self.update_statistics)
+
+    def update_statistics(self) -> None:
+        spans = self.query_one("#profile-spans", DataTable)
+        spans.clear()
+        for name, span in profiler.span_stats().items():
+            spans.add_row(
+                name,
+                self._format_number(span.count, "d"),
+                *(
+                    self._format_number(seconds * 1000, ".1f")
+                    for seconds in (span.total, span.mean, span.max, span.last)
+                ),
+            )
+        caches = self.query_one("#profile-caches", DataTable)
+        caches.clear()
+        for name, cache in profiler.cache_stats().items():
+            caches.add_row(
+                name,
+                self._format_number(cache.hits, "d"),
+                self._format_number(cache.misses, "d"),
+                self._format_number(cache.hit_ratio * 100, ".0f", "%"),
+            )
+
+    @staticmethod
+    def _format_number(value: float, spec: str, suffix: str = "") -> Text:
+        return Text(f"{value:{spec}}{suffix}", justify="right")
+
+    def _save(self, kind: str, chrome_trace: bool) -> None:
+        path = Path(f"conda-tui-{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        message = self.query_one("#profile-message", Static)
+        try:
+            profiler.dump(path, chrome_trace=chrome_trace)
+        except OSError as e:
+            message.update(f"[red]Could not save {path}: {e}[/]")
+        else:
+            message.update(f"Saved [cyan bold]{path.resolve()}[/]")
+
+    def action_save_json(self) -> None:
+        self._save("profile", chrome_trace=False)
+
+    def action_save_trace(self) -> None:
+        self._save("trace", chrome_trace=True)
+
+    def action_clear(self) -> None:
+        profiler.clear()
+        self.update_statistics()
+
+    def action_go_back(self) -> None:
+        self.dismiss()
@@ -0,0 +1,121 @@
+"""An in-memory index for filtering tables as the user types, tolerating typos."""
+
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Optional
+
+# Terms shorter than this are never matched fuzzily, since too much would match
+MIN_FUZZY_LENGTH = 3
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _fuzzy_pattern(term: str) -> "re.Pattern[str]":
+    """Match the characters of a term in order."""
+    return re.compile(".*?".join(re.escape(char) for char in term))
+
+
+class SearchIndex:
+    """A trigram index over a list of documents.
+
+    A query matches a document if every whitespace-separated term in the query is
+    a case-insensitive substring of the document. Terms of three or more
+    characters are narrowed down using the trigram index before the substring
+    check, so only a small fraction of documents need to be scanned.
+
+    If nothing matches, the query is matched fuzzily instead: each term must
+    match the characters of a word in order, so "nmpy" matches "numpy", and
+    "sklrn" matches "scikit-learn". Trigrams can't find those words, since a
+    dropped character breaks them, so the distinct words of all documents are
+    indexed by the characters they contain, which narrows the words to check
+    to those containing every character of the term. Fuzzy matches are ranked
+    by how tightly the terms match.
+
+    """
+
+    def __init__(self, documents: Iterable[str]):
+        self._documents = [document.lower() for document in documents]
+        postings: defaultdict[str, list[int]] = defaultdict(list)
+        # The documents containing each distinct word
+        words: defaultdict[str, list[int]] = defaultdict(list)
+        for i, document in enumerate(self._documents):
+            for trigram in _trigrams(document):
+                postings[trigram].append(i)
+            for word in set(document.split()):
+                words[word].append(i)
+        self._postings = {k: frozenset(v) for k, v in postings.items()}
+
+        self._words = list(words)
+        self._word_documents = list(words.values())
+        characters: defaultdict[str, list[int]] = defaultdict(list)
+        for i, word in enumerate(self._words):
+            for char in set(word):
+                characters[char].append(i)
+        self._characters = {k: frozenset(v) for k, v in characters.items()}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def search(self, query: str) -> list[int]:
+        """The indices of the documents matching the query.
+
+        Exact matches are in their original order, and fuzzy matches are best
+        first.
+
+        """
+        terms = query.lower().split()
+        if not terms:
+            return list(range(len(self._documents)))
+        return self._search_exact(terms) or self._search_fuzzy(terms)
+
+    def _search_exact(self, terms: list[str]) -> list[int]:
+        candidates: Optional[frozenset[int]] = None
+        for term in terms:
+            for trigram in _trigrams(term):
+                posting = self._postings.get(trigram, frozenset())
+                candidates = posting if candidates is None else candidates & posting
+                if not candidates:
+                    return []
+
+        indices = range(len(self._documents)) if candidates is None else candidates
+        documents = self._documents
+        return sorted(i for i in indices if all(term in documents[i] for term in terms))
+
+    def _search_fuzzy(self, terms: list[str]) -> list[int]:
+        if any(len(term) < MIN_FUZZY_LENGTH for term in terms):
+            return []
+        # The score of each document is the number of characters skipped by the
+        # best match of each term, summed over the terms
+        scores = self._score_term(terms[0])
+        for term in terms[1:]:
+            term_scores = self._score_term(term)
+            scores = {
+                i: score + term_scores[i]
+                for i, score in scores.items()
+                if i in term_scores
+            }
+        return sorted(scores, key=lambda i: (scores[i], i))
+
+    def _score_term(self, term: str) -> dict[int, int]:
+        """The documents with a word matching a term fuzzily, with the best score."""
+        candidates: Optional[frozenset[int]] = None
+        for char in set(term):
+            posting = self._characters.get(char, frozenset())
+            candidates = posting if candidates is None else candidates & posting
+            if not candidates:
+                return {}
+
+        pattern = _fuzzy_pattern(term)
+        scores: dict[int, int] = {}
+        for word in candidates or ():
+            match = pattern.search(self._words[word])
+            if match is None:
+                continue
+            score = match.end() - match.start() - len(term)
+            for i in self._word_documents[word]:
+                if score < scores.get(i, score + 1):
+                    scores[i] = score
+        return scores
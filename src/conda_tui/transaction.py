@@ -0,0 +1,190 @@
+"""Run conda transactions for an environment, streaming their progress."""
+
+import json
+from collections.abc import Iterable
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+from typing import Optional
+
+from conda_tui.environment import Environment
+from conda_tui.runner import CommandRunner
+
+# The share of each package's progress which conda assigns to downloading. The
+# remainder is extraction into the package cache.
+DOWNLOAD_FRACTION = 0.8
+
+# The conda subcommands which can be run on a set of installed packages
+UPDATE = "update"
+REMOVE = "remove"
+OPERATIONS = (UPDATE, REMOVE)
+
+
+class ProgressEvent(NamedTuple):
+    """The progress of fetching and extracting a single package."""
+
+    description: str
+    fraction: float
+    finished: bool
+
+
+class TransactionResult(NamedTuple):
+    success: bool
+    # The versions of the packages which were linked and unlinked, by name
+    linked: dict[str, str]
+    unlinked: dict[str, str]
+    error: str
+
+
+def parse_record(record: str) -> Optional[dict[str, Any]]:
+    """Parse a single JSON document written by conda, or None if it isn't one."""
+    record = record.strip()
+    if not record.startswith("{"):
+        return None
+    try:
+        return json.loads(record)
+    except ValueError:
+        return None
+
+
+def parse_progress(data: dict[str, Any]) -> Optional[ProgressEvent]:
+    """Interpret a progress record, written by conda's ProgressBar in JSON mode."""
+    if "fetch" not in data:
+        return None
+    return ProgressEvent(
+        description=str(data["fetch"]).strip(),
+        fraction=float(data.get("progress", 0)) / float(data.get("maxval", 1) or 1),
+        finished=bool(data.get("finished")),
+    )
+
+
+def parse_result(data: dict[str, Any]) -> TransactionResult:
+    """Interpret the final document written by a conda command in JSON mode."""
+    if data.get("success"):
+        actions = data.get("actions") or {}
+        linked, unlinked = (
+            {
+                prec["name"]: prec["version"]
+                for prec in actions.get(action, [])
+                if "name" in prec and "version" in prec
+            }
+            for action in ("LINK", "UNLINK")
+        )
+        return TransactionResult(True, linked, unlinked, "")
+    error = data.get("message") or data.get("error") or "The transaction failed"
+    return TransactionResult(False, {}, {}, str(error))
+
+
+class PackageTransaction:
+    """Update or remove packages in an environment with a single conda command.
+
+    The command runs with `--json`, in which mode conda writes a JSON document
+    for every progress update of every package it fetches, separated by NUL
+    bytes, followed by a document describing the result. Conda downloads
+    packages in parallel, according to its `fetch_threads` setting.
+
+    """
+
+    def __init__(self, command: list[str]):
+        self.command = command
+
+    @classmethod
+    def for_packages(
+        cls, operation: str, environment: Environment, names: Iterable[str]
+    ) -> "PackageTransaction":
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}")
+        return cls(
+            [
+                "conda",
+                operation,
+                "--json",
+                "--yes",
+                "--prefix",
+                str(environment.prefix),
+                *names,
+            ]
+        )
+
+    async def run(
+        self, on_progress: Callable[[ProgressEvent], None]
+    ) -> TransactionResult:
+        """Run the transaction, calling `on_progress` for each progress event.
+
+        If the command can't be started, e.g. if conda isn't on the PATH, the
+        transaction fails.
+
+        """
+        runner = CommandRunner(self.command)
+        result: Optional[TransactionResult] = None
+        try:
+            async for record in runner.iter_records():
+                data = parse_record(record)
+                if data is None:
+                    continue
+                event = parse_progress(data)
+                if event is not None:
+                    on_progress(event)
+                else:
+                    result = parse_result(data)
+        except OSError as e:
+            return TransactionResult(
+                False, {}, {}, f"Could not run {self.command[0]}: {e}"
+            )
+        if result is None:
+            return TransactionResult(
+                False, {}, {}, f"conda exited with status {runner.returncode}"
+            )
+        return result
+
+
+class TransactionQueue:
+    """Operations waiting to be run on the packages of a single environment.
+
+    Requests which arrive while a transaction is running are collected, and all
+    the packages queued for the same operation run together in the next
+    transaction, so that they share a single solve.
+
+    """
+
+    def __init__(self, environment: Environment):
+        self.environment = environment
+        # Pending package names by operation, in the order they were requested
+        self._pending: dict[str, dict[str, None]] = {}
+        self.running: list[str] = []
+        self.running_operation: Optional[str] = None
+
+    def __len__(self) -> int:
+        return sum(len(names) for names in self._pending.values())
+
+    def pending(self, operation: str) -> list[str]:
+        return list(self._pending.get(operation, ()))
+
+    def add(self, operation: str, names: Iterable[str]) -> None:
+        """Queue packages for an operation, replacing any other queued for them."""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}")
+        names = [
+            name
+            for name in names
+            if not (operation == self.running_operation and name in self.running)
+        ]
+        for other, pending in self._pending.items():
+            if other != operation:
+                for name in names:
+                    pending.pop(name, None)
+        self._pending.setdefault(operation, {}).update(dict.fromkeys(names))
+        self._pending = {
+            op: pending for op, pending in self._pending.items() if pending
+        }
+
+    def take(self) -> tuple[str, list[str]]:
+        """Remove the packages for the earliest requested operation, to run next."""
+        operation = next(iter(self._pending))
+        self.running_operation = operation
+        self.running = list(self._pending.pop(operation))
+        return operation, self.running
+
+    def done(self) -> None:
+        self.running = []
+        self.running_operation = None
@@ -0,0 +1,213 @@
+"""Check environments for available package updates using conda's solver in-process."""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from conda_tui.cache import get_cache_path
+from conda_tui.cache import prefix_state
+from conda_tui.cache import read_cache_file
+from conda_tui.cache import write_cache_file
+from conda_tui.environment import Environment
+from conda_tui.profiling import profiler
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever the structure of the cached update results changes
+UPDATES_CACHE_VERSION = 1
+
+# How long update results remain valid if nothing else changes, in seconds
+DEFAULT_UPDATE_TTL = 60 * 60
+
+# The number of update checks to run at once, and of channels to fetch repodata
+# for at once. Solves are CPU-bound and conda's solvers aren't thread-safe, so
+# they run one at a time regardless.
+DEFAULT_UPDATE_JOBS = max(1, min(4, os.cpu_count() or 1))
+
+
+def _get_solver_class() -> type:
+    """The solver backend configured by the user, falling back to the classic solver."""
+    from conda.base.context import context
+
+    try:
+        return context.plugin_manager.get_cached_solver_backend()
+    except AttributeError:  # conda < 23.1
+        from conda.core.solve import _get_solver_class
+
+        return _get_solver_class()
+
+
+def _repodata_state() -> list[int]:
+    """A fingerprint of conda's repodata cache.
+
+    Any refresh of a channel's repodata, whether by conda-tui or any other conda
+    process, rewrites a file in the cache directory.
+
+    """
+    count, latest = 0, 0
+    try:
+        from conda.core.subdir_data import create_cache_dir
+
+        with os.scandir(create_cache_dir()) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    count += 1
+                    latest = max(latest, entry.stat().st_mtime_ns)
+    except Exception:
+        # Checking for updates fails anyway if conda can't find its cache
+        pass
+    return [count, latest]
+
+
+def _get_state(prefix: Path) -> list:
+    return [[list(s) if s else None for s in prefix_state(prefix)], _repodata_state()]
+
+
+class UpdateChecker:
+    """Compute the packages that `conda update --all` would change in an environment.
+
+    This replaces shelling out to `conda update --all --dry-run --json`, which pays
+    for importing conda, initializing the context and loading repodata on every
+    check. Up to `max_workers` checks run at once in a dedicated thread pool,
+    which reads cached results, and fetches the repodata of up to `max_workers`
+    channels at once. Solves run one at a time, since conda's solvers aren't
+    thread-safe, e.g. libmamba configures global state for each solve. They're
+    CPU-bound anyway, so threads wouldn't speed them up. Channel indexes are
+    loaded once per process via `SubdirData`, which caches instances by channel
+    URL, so subsequent checks of other environments only pay for the solve itself.
+
+    Results are persisted per environment, and reused until they are older than
+    `ttl` seconds, the environment is modified, or the repodata cache is refreshed.
+
+    """
+
+    def __init__(
+        self, max_workers: int = DEFAULT_UPDATE_JOBS, ttl: float = DEFAULT_UPDATE_TTL
+    ):
+        self.ttl = ttl
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="conda-tui-solver"
+        )
+        self._index_lock = threading.Lock()
+        # Held while solving
+        self._solve_lock = threading.Lock()
+        self._loaded_urls: set[str] = set()
+
+    def _load_channel_indexes(self, solver_class: type) -> None:
+        """Load the repodata for all configured channels, once per process.
+
+        Only the classic solver reads its index from `SubdirData`. Other backends,
+        such as libmamba, manage their own index. Fetching is I/O bound, so the
+        channels are fetched in parallel, as conda itself does.
+
+        """
+        if solver_class.__module__ != "conda.core.solve":
+            return
+        from conda.base.context import context
+        from conda.core.subdir_data import SubdirData
+        from conda.models.channel import Channel
+        from conda.models.channel import all_channel_urls
+
+        with self._index_lock:
+            urls = all_channel_urls(context.channels, context.subdirs)
+            pending = [url for url in urls if url not in self._loaded_urls]
+            if not pending:
+                return
+
+            def load(url: str) -> str:
+                SubdirData(Channel(url)).load()
+                return url
+
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                self._loaded_urls.update(executor.map(load, pending))
+
+    @profiler.traced("updates.solve")
+    def _check(self, prefix: Path) -> Optional[dict[str, str]]:
+        """Solve for updates, returning None if the solve fails.
+
+        Any failure is caught, whether from conda, the solver backend or the
+        channel configuration, since a failed check of one environment shouldn't
+        bring down the app. It's logged at debug level, so it can't write to the
+        terminal over the TUI.
+
+        """
+        try:
+            from conda.base.constants import UpdateModifier
+            from conda.base.context import context
+            from conda.core.prefix_data import PrefixData
+
+            solver_class = _get_solver_class()
+            self._load_channel_indexes(solver_class)
+            with self._solve_lock:
+                # The solver reads the installed packages from the PrefixData which
+                # conda caches per prefix, and never reloads, so it would otherwise
+                # miss any change since the first check of this environment. It's
+                # reloaded under the lock, so it can't change during a solve.
+                PrefixData(str(prefix)).reload()
+                solver = solver_class(
+                    str(prefix),
+                    context.channels,
+                    context.subdirs,
+                    specs_to_add=(),
+                    command="update",
+                )
+                _, link_precs = solver.solve_for_diff(
+                    update_modifier=UpdateModifier.UPDATE_ALL
+                )
+            return {prec.name: prec.version for prec in link_precs}
+        except Exception:
+            logger.debug("Failed to check %s for updates", prefix, exc_info=True)
+            return None
+
+    def _check_cached(self, prefix: Path, ttl: float) -> Optional[dict[str, str]]:
+        cache_path = get_cache_path("updates", prefix)
+        cached = read_cache_file(cache_path, UPDATES_CACHE_VERSION)
+        if (
+            cached is not None
+            and time.time() - cached["timestamp"] < ttl
+            and cached["state"] == _get_state(prefix)
+        ):
+            profiler.count_cache("updates", hits=1)
+            return cached["updates"]
+
+        profiler.count_cache("updates", misses=1)
+        updates = self._check(prefix)
+        if updates is None:
+            return None
+        # The state is taken after solving, since the solve may refresh repodata
+        write_cache_file(
+            cache_path,
+            UPDATES_CACHE_VERSION,
+            {
+                "prefix": str(prefix),
+                "timestamp": time.time(),
+                "state": _get_state(prefix),
+                "updates": updates,
+            },
+        )
+        return updates
+
+    def submit(
+        self, env: Environment, force: bool = False
+    ) -> "Future[Optional[dict[str, str]]]":
+        """Schedule an update check, returning a future of name -> new version.
+
+        Valid cached results are returned, unless `force` is True. The result is
+        None if the check failed, which is never cached.
+
+        """
+        ttl = 0 if force else self.ttl
+        return self._executor.submit(self._check_cached, env.prefix, ttl)
+
+    async def check(
+        self, env: Environment, force: bool = False
+    ) -> Optional[dict[str, str]]:
+        """Check an environment for updates without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(env, force=force))
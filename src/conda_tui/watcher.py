@@ -0,0 +1,309 @@
+"""Watch files and directories for changes made outside of conda-tui.
+
+On Linux, changes are reported by inotify, which is read in a thread. Elsewhere,
+or if inotify is unavailable, the watched paths are polled with `stat`. Either
+way, bursts of changes, such as those made by a conda transaction, are coalesced
+into a single callback.
+
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Callable
+from typing import Hashable
+from typing import Optional
+
+from conda_tui.cache import StatSignature
+from conda_tui.cache import stat_signature
+
+# A callback is made once nothing has changed for this long, in seconds
+QUIET_PERIOD = 0.3
+# ...or once this long has passed since the first change, during a long burst
+MAX_DELAY = 2.0
+# How often to poll the watched paths, if inotify is unavailable, in seconds
+POLL_INTERVAL = 1.0
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Watch:
+    def __init__(self, paths: list[Path], callback: Callable[[], None]):
+        self.paths = paths
+        self.callback = callback
+        # The times of the first and the latest unreported change
+        self.first_change: Optional[float] = None
+        self.last_change = 0.0
+        # The stat signatures of the paths, when polling
+        self.signatures: list[Optional[StatSignature]] = []
+
+    def changed(self, now: float) -> None:
+        if self.first_change is None:
+            self.first_change = now
+        self.last_change = now
+
+    def due(self, now: float) -> Optional[float]:
+        """The time at which the pending change should be reported, if any."""
+        if self.first_change is None:
+            return None
+        return min(self.last_change + QUIET_PERIOD, self.first_change + MAX_DELAY)
+
+
+class Watcher:
+    """Call back when any of a group of paths changes.
+
+    Each group is registered under a key with `watch`, replacing any previous
+    group with the same key. Paths may be files or directories, which need not
+    exist yet. A change to a directory includes changes to the files directly
+    within it. Callbacks are made from the watcher thread, so they must not block
+    on the event loop, which may be waiting in `stop` for the thread to finish.
+
+    """
+
+    def __init__(self, use_inotify: bool = sys.platform.startswith("linux")):
+        self._watches: dict[Hashable, _Watch] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._wake_read, self._wake_write = os.pipe()
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                # AttributeError if the C library has no inotify functions
+                self._inotify = None
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def watch(
+        self, key: Hashable, paths: Iterable[Path], callback: Callable[[], None]
+    ) -> None:
+        watch = _Watch(list(paths), callback)
+        watch.signatures = [stat_signature(path) for path in watch.paths]
+        with self._lock:
+            self._watches[key] = watch
+            if self._inotify is not None:
+                self._inotify.update(self._watches)
+        self._start()
+
+    def unwatch(self, key: Hashable) -> None:
+        with self._lock:
+            if self._watches.pop(key, None) is not None and self._inotify is not None:
+                self._inotify.update(self._watches)
+        self._wake()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop the watcher thread, and close its file descriptors.
+
+        If a callback doesn't return within `timeout` seconds, the thread, which is
+        a daemon thread, is abandoned along with its file descriptors.
+
+        """
+        self._stopped.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return
+        with self._lock:
+            if self._wake_read < 0:
+                return
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+            self._wake_read = self._wake_write = -1
+            if self._inotify is not None:
+                self._inotify.close()
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="conda-tui-watcher", daemon=True
+            )
+            self._thread.start()
+        else:
+            self._wake()
+
+    def _wake(self) -> None:
+        with self._lock:
+            # Once stopped, the descriptor may be closed, and its number reused
+            if self._wake_write >= 0:
+                os.write(self._wake_write, b"\0")
+
+    def _run(self) -> None:
+        next_poll = time.monotonic()
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            with self._lock:
+                dues = [w.due(now) for w in self._watches.values()]
+            dues = [due for due in dues if due is not None]
+            timeout = min(dues, default=now + 3600) - now
+            if self._needs_polling():
+                timeout = min(timeout, next_poll - now)
+            fds = [self._wake_read]
+            if self._inotify is not None:
+                fds.append(self._inotify.fd)
+            readable, _, _ = select.select(fds, [], [], max(0.0, timeout))
+
+            now = time.monotonic()
+            if self._wake_read in readable:
+                os.read(self._wake_read, 4096)
+            if self._inotify is not None and self._inotify.fd in readable:
+                with self._lock:
+                    for watch in self._inotify.read(self._watches):
+                        watch.changed(now)
+            if self._needs_polling() and now >= next_poll:
+                self._poll(now)
+                next_poll = now + POLL_INTERVAL
+            self._report(now)
+
+    def _needs_polling(self) -> bool:
+        # Paths which inotify cannot watch are polled instead
+        return self._inotify is None or bool(self._inotify.unwatched)
+
+    def _poll(self, now: float) -> None:
+        with self._lock:
+            watches = list(self._watches.values())
+            if self._inotify is not None:
+                # Directories which couldn't be watched may exist by now
+                self._inotify.update(self._watches)
+        for watch in watches:
+            signatures = [stat_signature(path) for path in watch.paths]
+            if signatures != watch.signatures:
+                watch.signatures = signatures
+                watch.changed(now)
+
+    def _report(self, now: float) -> None:
+        with self._lock:
+            ready = []
+            for watch in self._watches.values():
+                due = watch.due(now)
+                if due is not None and due <= now:
+                    watch.first_change = None
+                    ready.append(watch)
+        for watch in ready:
+            watch.callback()
+
+
+class _Inotify:
+    """A minimal binding to the Linux inotify API, via ctypes."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watched directory -> watch descriptor, and the reverse
+        self._descriptors: dict[str, int] = {}
+        self._directories: dict[int, str] = {}
+        self.unwatched: set[str] = set()
+
+    def close(self) -> None:
+        os.close(self.fd)
+        self.fd = -1
+
+    @staticmethod
+    def _target(path: Path) -> str:
+        """The directory to watch for a path.
+
+        Files are watched through their directory, so that they are still
+        watched if they are replaced, or do not exist yet.
+
+        """
+        return str(path if path.is_dir() else path.parent)
+
+    def update(self, watches: dict[Hashable, _Watch]) -> None:
+        """Add and remove inotify watches to match the watched paths.
+
+        Directories which cannot be watched, e.g. because they don't exist, are
+        listed in `unwatched`.
+
+        """
+        wanted = {self._target(path) for w in watches.values() for path in w.paths}
+        for directory in set(self._descriptors) - wanted:
+            descriptor = self._descriptors.pop(directory)
+            self._directories.pop(descriptor, None)
+            self._rm_watch(self.fd, descriptor)
+        self.unwatched = set()
+        for directory in wanted - set(self._descriptors):
+            descriptor = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if descriptor >= 0:
+                self._descriptors[directory] = descriptor
+                self._directories[descriptor] = directory
+            else:
+                self.unwatched.add(directory)
+
+    def read(self, watches: dict[Hashable, _Watch]) -> list[_Watch]:
+        """Read the pending events, returning the watches which they affect."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events: set[tuple[str, str]] = set()
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            directory = self._directories.get(descriptor)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # The directory was removed. Until it's recreated, `update` watches
+                # its parent instead, which reports the recreation.
+                del self._directories[descriptor]
+                self._descriptors.pop(directory, None)
+            events.add((directory, name))
+
+        # Directories are watched directly, and files through their directory
+        directories = {directory for directory, _ in events}
+        affected = [
+            watch
+            for watch in watches.values()
+            if any(
+                str(path) in directories or (str(path.parent), path.name) in events
+                for path in watch.paths
+            )
+        ]
+        self.update(watches)
+        return affected
@@ -1,4 +1,15 @@
+from .command_log import CommandLog
+from .filter import FilterInput
 from .logo import Logo
 from .progress import PackageUpdateProgress
+from .table import BatchedDataTable
+from .virtual_table import VirtualTable
 
-__all__ = ["Logo", "PackageUpdateProgress"]
+__all__ = [
+    "BatchedDataTable",
+    "CommandLog",
+    "FilterInput",
+    "Logo",
+    "PackageUpdateProgress",
+    "VirtualTable",
+]
@@ -0,0 +1,117 @@
+import time
+from pathlib import Path
+from typing import Any
+from typing import Optional
+from typing import TextIO
+
+from textual.timer import Timer
+from textual.widgets import Log
+
+# The number of lines of output to keep, by default
+DEFAULT_MAX_LINES = 10_000
+
+
+class CommandLog(Log):
+    """A log for the output of a command, however much of it there is.
+
+    Output passed to `append` is buffered, and written at most `FLUSH_RATE` times
+    a second, so that each frame costs one refresh however many lines arrived in
+    between. Only the last `max_lines` lines are kept, like a ring buffer, and
+    the full output can be saved to a file with `spill_to`.
+
+    Lines are only shown once they are complete, or once the log is closed. A
+    carriage return ends a line too, as it does for `str.splitlines`, so progress
+    bars which redraw a line show each update. An incomplete line is shown once
+    it reaches `MAX_PARTIAL_LENGTH` characters, so the buffer stays bounded.
+
+    """
+
+    # The maximum number of writes to the log per second
+    FLUSH_RATE = 30
+
+    # The length at which an incomplete line is written as if it were complete
+    MAX_PARTIAL_LENGTH = 10_000
+
+    def __init__(self, *, max_lines: Optional[int] = DEFAULT_MAX_LINES, **kwargs: Any):
+        super().__init__(max_lines=max_lines, **kwargs)
+        self._pending: list[str] = []
+        self._last_flush = 0.0
+        self._flush_timer: Optional[Timer] = None
+        self._spill: Optional[TextIO] = None
+        self.spill_path: Optional[Path] = None
+        # The number of lines which are no longer kept
+        self.dropped_lines = 0
+
+    def spill_to(self, path: Path) -> None:
+        """Save all output appended from now on to a file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._spill = open(path, "w", encoding="utf-8", errors="replace")
+        self.spill_path = path
+
+    def append(self, data: str) -> None:
+        """Add output to the log, which may end part way through a line."""
+        if not data:
+            return
+        self._pending.append(data)
+        if self._spill is not None:
+            self._spill.write(data)
+        if self._flush_timer is not None:
+            return
+        delay = self._last_flush + 1 / self.FLUSH_RATE - time.monotonic()
+        if delay > 0:
+            self._flush_timer = self.set_timer(delay, self.flush)
+        else:
+            self.flush()
+
+    def flush(self, final: bool = False) -> None:
+        """Write the complete lines of buffered output to the log.
+
+        If `final` is True, any incomplete last line is written too.
+
+        """
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+            self._flush_timer = None
+        self._last_flush = time.monotonic()
+        data = "".join(self._pending)
+        self._pending.clear()
+        if not final:
+            # A trailing "\r" is kept back, since it may be followed by "\n"
+            end = max(data.rfind("\n"), data.rfind("\r", 0, len(data) - 1)) + 1
+            data, partial = data[:end], data[end:]
+            if len(partial) >= self.MAX_PARTIAL_LENGTH:
+                data += partial + "\n"
+            elif partial:
+                self._pending.append(partial)
+        if not data:
+            return
+        lines = data.splitlines()
+        # Lines which would be pruned straight away are never written
+        if self.max_lines is not None and len(lines) > self.max_lines:
+            self.dropped_lines += len(lines) - self.max_lines
+            lines = lines[-self.max_lines :]
+        self.write_lines(lines)
+
+    def _prune_max_lines(self) -> None:
+        if self.max_lines is not None:
+            self.dropped_lines += max(0, len(self._lines) - self.max_lines)
+        super()._prune_max_lines()
+
+    def close(self) -> None:
+        """Write any remaining output, and finish saving output to a file."""
+        self.flush(final=True)
+        self._close_spill()
+
+    def _close_spill(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def clear(self) -> "CommandLog":
+        self._pending.clear()
+        self.dropped_lines = 0
+        super().clear()
+        return self
+
+    def on_unmount(self) -> None:
+        self._close_spill()
@@ -0,0 +1,62 @@
+from typing import Any
+from typing import Optional
+
+from textual.message import Message
+from textual.timer import Timer
+from textual.widgets import Input
+
+
+class FilterInput(Input):
+    """A text input for filtering a table, hidden until it is opened.
+
+    Changes are debounced, so that a burst of keystrokes results in a single
+    `FilterInput.Applied` message once the user pauses typing.
+
+    """
+
+    BINDINGS = [
+        ("escape", "close", "Clear Filter"),
+    ]
+
+    # How long to wait after the last keystroke before applying the filter
+    DEBOUNCE = 0.05
+
+    class Applied(Message):
+        """Posted when the filter query should be applied."""
+
+        def __init__(self, query: str) -> None:
+            super().__init__()
+            self.query = query
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.add_class("hidden")
+        # Not focusable while hidden, so it doesn't take the initial focus
+        self.can_focus = False
+        self._timer: Optional[Timer] = None
+
+    def open(self) -> None:
+        self.remove_class("hidden")
+        self.can_focus = True
+        self.focus()
+
+    def action_close(self) -> None:
+        """Clear the filter, hide the input, and return focus to the table."""
+        self.value = ""
+        self.add_class("hidden")
+        self.can_focus = False
+        self.screen.focus_next()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        event.stop()
+        if self._timer is not None:
+            self._timer.stop()
+        self._timer = self.set_timer(self.DEBOUNCE, self._apply)
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        event.stop()
+        self.screen.focus_next()
+
+    def _apply(self) -> None:
+        self._timer = None
+        self.post_message(self.Applied(self.value))
@@ -1,77 +1,186 @@
-import asyncio
-import subprocess
-import tempfile
-from pathlib import Path
+import time
 from typing import Any
+from typing import Optional
 
 from rich.progress import BarColumn
 from rich.progress import Progress
+from rich.progress import ProgressColumn
+from rich.progress import TaskID
 from rich.progress import TaskProgressColumn
 from rich.progress import TextColumn
+from textual.timer import Timer
 from textual.widgets import Log
 from textual.widgets import Static
 
-from conda_tui.package import Package
+from conda_tui.runner import CommandRunner
+from conda_tui.transaction import DOWNLOAD_FRACTION
+from conda_tui.transaction import PackageTransaction
+from conda_tui.transaction import ProgressEvent
+from conda_tui.transaction import TransactionResult
+from conda_tui.widgets.command_log import CommandLog
 
 
-class PackageUpdateProgress(Static):
-    def __init__(self, *args: Any, package: Package, **kwargs: Any):
-        super().__init__(*args, **kwargs)
-        self._package = package
-        self._bar = Progress()
+class ProgressDisplay(Static):
+    """Display a Rich `Progress`, rendering it only when it changes.
 
-    def on_mount(self) -> None:
-        self.set_interval(1 / 60, lambda: self.update(self._bar))
-        self.run_worker(self.update_package())
-
-    async def update_package(self):
-        # TODO: This is a mock of actual package update
-        with self._bar as bar:
-            total_time, time_step = 2, 0.2
-            task = bar.add_task("", total=int(total_time / time_step))
-            while not bar.finished:
-                bar.update(task, advance=1)
-                await asyncio.sleep(time_step)
-        self._package.update_available = False
-        self.screen.dismiss(True)  # Return a value to trigger the callback
-
-
-class ShellCommandProgress(Static):
-    def __init__(self, *commands: str, **kwargs: Any):
+    Call `render_progress` after changing the progress. Renders are limited to
+    `MAX_RATE` per second, and changes in between are coalesced into one render.
+    Indeterminate bars are animated at `PULSE_RATE` while they are shown, and
+    otherwise nothing is rendered while the progress is idle.
+
+    """
+
+    # The maximum number of renders per second
+    MAX_RATE = 30
+    # The number of renders per second while an indeterminate bar is animating
+    PULSE_RATE = 10
+
+    def __init__(self, *columns: ProgressColumn, **kwargs: Any):
         super().__init__(**kwargs)
-        self._bar = Progress(
+        # The progress is rendered by the widget, so it never starts its own
+        # refresh thread
+        self._bar = Progress(*columns, auto_refresh=False)
+        self._last_render = 0.0
+        self._render_timer: Optional[Timer] = None
+        self._pulse_timer: Optional[Timer] = None
+        self._task_count = 0
+
+    def on_mount(self) -> None:
+        self.update(self._bar)
+
+    def render_progress(self) -> None:
+        """Schedule a render of the progress, no sooner than the rate limit allows."""
+        if self._render_timer is not None:
+            return
+        delay = self._last_render + 1 / self.MAX_RATE - time.monotonic()
+        if delay > 0:
+            self._render_timer = self.set_timer(delay, self._render_progress)
+        else:
+            self._render_progress()
+
+    def _render_progress(self) -> None:
+        self._render_timer = None
+        self._last_render = time.monotonic()
+        tasks = self._bar.tasks
+        # The height only changes when tasks are added or removed
+        self.refresh(layout=len(tasks) != self._task_count)
+        self._task_count = len(tasks)
+
+        pulsing = any(task.total is None for task in tasks)
+        if pulsing and self._pulse_timer is None:
+            self._pulse_timer = self.set_interval(
+                1 / self.PULSE_RATE, self.render_progress
+            )
+        elif not pulsing and self._pulse_timer is not None:
+            self._pulse_timer.stop()
+            self._pulse_timer = None
+
+
+class PackageUpdateProgress(ProgressDisplay):
+    """The progress of a conda transaction, with a bar for each package fetched.
+
+    Conda reports the progress of each package as a fraction, of which the first
+    80% is the download and the remainder is the extraction. Solving and linking
+    are not reported, so they are shown as indeterminate.
+
+    """
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
             TaskProgressColumn(),
+            TextColumn("{task.fields[phase]}"),
+            **kwargs,
         )
 
-    def on_mount(self) -> None:
-        self.set_interval(1 / 60, lambda: self.update(self._bar))
+    async def run_transaction(
+        self, transaction: PackageTransaction, log: Log
+    ) -> TransactionResult:
+        bar = self._bar
+        # Remove the tasks of any previous transaction
+        for task_id in bar.task_ids:
+            bar.remove_task(task_id)
+
+        step = bar.add_task("Solving environment", total=None, phase="")
+        tasks: dict[str, TaskID] = {}
+        fetching: set[str] = set()
+        self.render_progress()
+
+        def on_progress(event: ProgressEvent) -> None:
+            nonlocal step
+            task = tasks.get(event.description)
+            if task is None:
+                # Packages are only fetched once the solve is complete
+                if not tasks:
+                    bar.update(step, total=1, completed=1)
+                task = tasks[event.description] = bar.add_task(
+                    event.description, total=1, phase=""
+                )
+                fetching.add(event.description)
+            if event.finished:
+                phase = "done"
+                fetching.discard(event.description)
+            elif event.fraction < DOWNLOAD_FRACTION:
+                phase = "downloading"
+            else:
+                phase = "extracting"
+            bar.update(task, completed=event.fraction, phase=phase)
+            if not fetching and len(bar.task_ids) == len(tasks) + 1:
+                step = bar.add_task("Linking packages", total=None, phase="")
+            self.render_progress()
+
+        try:
+            result = await transaction.run(on_progress)
+        finally:
+            bar.update(step, total=1, completed=1)
+            for task in tasks.values():
+                bar.update(task, completed=1, phase="done")
+            self.render_progress()
+
+        if result.success:
+            for name, version in result.unlinked.items():
+                if name not in result.linked:
+                    log.write_line(f"Removed {name} {version}")
+            for name, version in result.linked.items():
+                log.write_line(f"Installed {name} {version}")
+            log.write_line("Transaction finished")
+        else:
+            log.write_line(f"Transaction failed: {result.error}")
+        return result
+
 
-    async def run_command(self, command: list[str], log: Log):
+class ShellCommandProgress(ProgressDisplay):
+    def __init__(self, **kwargs: Any):
+        super().__init__(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            **kwargs,
+        )
+
+    async def run_command(self, command: list[str], log: CommandLog):
+        bar = self._bar
         # Remove any existing tasks
-        for task_id in self._bar.task_ids:
-            self._bar.remove_task(task_id)
+        for task_id in bar.task_ids:
+            bar.remove_task(task_id)
 
-        with self._bar as bar:
-            description = (
-                f"Running command: [cyan bold]{' '.join(command)}[/cyan bold]:"
-            )
-            task = bar.add_task(description, total=None)
-
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                tmp_path = Path(tmp_dir, "tmp.log")
-                # Here, the subprocess writes to the temporary file, and then
-                # the polling writes to the log widget. We do it this way so
-                # it is not blocking. The sleep call is important because it
-                # allows the event loop to be used by the other UI threads.
-                with tmp_path.open("w") as writer, tmp_path.open("r", 1) as reader:
-                    process = subprocess.Popen(command, stdout=writer, stderr=writer)
-                    while process.poll() is None:
-                        log.write(reader.read())
-                        await asyncio.sleep(0.1)
-                    # Write any remaining characters
-                    log.write(reader.read())
-                log.write(f"\nFinished with status code {process.returncode}")
+        description = f"Running command: [cyan bold]{' '.join(command)}[/cyan bold]:"
+        task = bar.add_task(description, total=None)
+        self.render_progress()
 
+        try:
+            runner = CommandRunner(command)
+            async for chunk in runner.iter_chunks():
+                log.append(chunk)
+        finally:
+            log.close()
             bar.update(task, total=1, completed=True)
+            self.render_progress()
+
+        log.write_line(f"\nFinished with status code {runner.returncode}")
+        if log.dropped_lines:
+            message = f"Only the last {log.max_lines} lines are shown"
+            if log.spill_path is not None:
+                message += f", the full output is in {log.spill_path}"
+            log.write_line(message)
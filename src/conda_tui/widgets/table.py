@@ -0,0 +1,180 @@
+from collections.abc import Iterable
+from collections.abc import Mapping
+from typing import Any
+from typing import Optional
+from typing import Union
+from typing import cast
+
+# BatchedDataTable replaces the private row state of DataTable: `rows`, `_data`
+# and `_row_locations`, which is a TwoWayDict from a private module, and bumps
+# `_update_count` and `_require_update_dimensions` to invalidate its caches. This
+# is why textual is pinned to <0.33 in pyproject.toml.
+# tests/test_textual_internals.py fails if any of these change, when the pin is
+# raised.
+from textual._two_way_dict import TwoWayDict
+from textual.coordinate import Coordinate
+from textual.widgets import DataTable
+from textual.widgets.data_table import CellDoesNotExist
+from textual.widgets.data_table import CellType
+from textual.widgets.data_table import ColumnKey
+from textual.widgets.data_table import Row
+from textual.widgets.data_table import RowKey
+
+# The cells of a row, by column
+_Cells = dict[Union[ColumnKey, str], CellType]
+
+# The visible rows, cells and row locations of the table
+_RowState = tuple[
+    dict[RowKey, Row], dict[RowKey, dict[ColumnKey, CellType]], TwoWayDict
+]
+
+
+def _key_value(key: Union[RowKey, ColumnKey, str]) -> str:
+    """The string which a key wraps. Every row and column here has one."""
+    if isinstance(key, str):
+        return key
+    if key.value is None:
+        raise KeyError(key)
+    return key.value
+
+
+class BatchedDataTable(DataTable[CellType]):
+    """A DataTable which can apply many changes with a single refresh.
+
+    `DataTable.update_cell` refreshes the widget for every cell, and
+    `update_cell_at` must also resolve the coordinate to keys. Here, cells are
+    addressed directly by row and column key, and the table is refreshed once.
+
+    Rows can also be filtered. Hidden rows keep their data, and can still be
+    updated by key, so they are up to date when they are shown again. All rows
+    must be added with a string key.
+
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # All rows, including hidden ones, in the order they were added. These are
+        # keyed by plain strings, since hashing a RowKey calls back into Python.
+        self._all_rows: dict[str, Row] = {}
+        self._all_data: dict[str, dict[ColumnKey, CellType]] = {}
+        # The state of the table when it was last unfiltered, so it can be restored
+        self._unfiltered: Optional[_RowState[CellType]] = None
+        self._is_filtered = False
+
+    def add_row(
+        self, *cells: CellType, key: Optional[str] = None, **kwargs: Any
+    ) -> RowKey:
+        if key is None:
+            raise ValueError("Rows in a BatchedDataTable must have a key")
+        row_key = super().add_row(*cells, key=key, **kwargs)
+        self._all_rows[key] = self.rows[row_key]
+        self._all_data[key] = self._data[row_key]
+        self._unfiltered = None
+        return row_key
+
+    def remove_row(self, row_key: Union[RowKey, str]) -> None:
+        key = _key_value(row_key)
+        # A hidden row is only in the full set of rows
+        if key in self.rows or key not in self._all_rows:
+            super().remove_row(row_key)
+        del self._all_rows[key], self._all_data[key]
+        self._unfiltered = None
+
+    def clear(self, columns: bool = False) -> "BatchedDataTable[CellType]":
+        self._all_rows.clear()
+        self._all_data.clear()
+        self._unfiltered = None
+        self._is_filtered = False
+        return super().clear(columns)
+
+    def _get_row_data(
+        self, row_key: Union[RowKey, str]
+    ) -> dict[Union[ColumnKey, str], CellType]:
+        # A ColumnKey hashes and compares equal to the string it wraps, so cells
+        # can be addressed by either, without creating a ColumnKey for each
+        return cast("_Cells[CellType]", self._all_data[_key_value(row_key)])
+
+    def get_cell(
+        self, row_key: Union[RowKey, str], column_key: Union[ColumnKey, str]
+    ) -> CellType:
+        try:
+            return self._get_row_data(row_key)[column_key]
+        except KeyError:
+            raise CellDoesNotExist(
+                f"No cell exists for row_key={row_key!r}, column_key={column_key!r}."
+            ) from None
+
+    def update_cell(
+        self,
+        row_key: Union[RowKey, str],
+        column_key: Union[ColumnKey, str],
+        value: CellType,
+        *,
+        update_width: bool = False,
+    ) -> None:
+        if row_key in self.rows:
+            super().update_cell(row_key, column_key, value, update_width=update_width)
+        else:
+            self.update_cells({(_key_value(row_key), _key_value(column_key)): value})
+
+    def update_cells(self, updates: Mapping[tuple[str, str], CellType]) -> None:
+        """Update many cells, identified by (row key, column key)."""
+        if not updates:
+            return
+        for (row_key, column_key), value in updates.items():
+            try:
+                self._get_row_data(row_key)[column_key] = value
+            except KeyError:
+                raise CellDoesNotExist(
+                    f"No cell exists for row_key={row_key!r}, column_key={column_key!r}."
+                ) from None
+        self._update_count += 1
+        self.refresh()
+
+    def filter_rows(
+        self, row_keys: Optional[Iterable[str]], in_order: bool = False
+    ) -> None:
+        """Show only the rows with the given keys, or all rows if None.
+
+        Rows keep the order in which they were added, unless `in_order` is True,
+        in which case they're shown in the order of the given keys, e.g. ranked
+        by a search. They are moved between the visible and hidden sets without
+        being re-created or re-measured, and the unfiltered state is restored
+        without any work, so this is cheap even for large tables.
+
+        """
+        keys: Optional[list[str]] = None
+        if row_keys is not None:
+            if in_order:
+                keys = [key for key in dict.fromkeys(row_keys) if key in self._all_rows]
+            else:
+                wanted = set(row_keys)
+                keys = [key for key in self._all_rows if key in wanted]
+            if len(keys) == len(self._all_rows) and keys == list(self._all_rows):
+                keys = None
+
+        if not self._is_filtered:
+            self._unfiltered = self.rows, self._data, self._row_locations
+
+        if keys is None:
+            if self._unfiltered is None:
+                self._unfiltered = self._build_state(self._all_rows.values())
+            state = self._unfiltered
+        else:
+            state = self._build_state(self._all_rows[key] for key in keys)
+        self.rows, self._data, self._row_locations = state
+        self._is_filtered = keys is not None
+
+        self._update_count += 1
+        self._require_update_dimensions = True
+        self.cursor_coordinate = Coordinate(0, 0)
+        self.check_idle()
+        self.refresh(layout=True)
+
+    def _build_state(self, rows: Iterable[Row]) -> "_RowState[CellType]":
+        visible = list(rows)
+        return (
+            {row.key: row for row in visible},
+            {row.key: self._all_data[_key_value(row.key)] for row in visible},
+            TwoWayDict({row.key: i for i, row in enumerate(visible)}),
+        )
@@ -0,0 +1,467 @@
+from collections.abc import Iterable
+from collections.abc import Mapping
+from collections.abc import Sequence
+from typing import Any
+from typing import ClassVar
+from typing import Optional
+
+from rich.cells import cell_len
+from rich.cells import set_cell_size
+from rich.segment import Segment
+from rich.style import Style
+from rich.text import Text
+from textual import events
+
+# A private module, which is why textual is pinned to <0.33 in pyproject.toml.
+# tests/test_textual_internals.py fails if it moves, when the pin is raised.
+from textual._cache import LRUCache
+from textual.binding import Binding
+from textual.geometry import Region
+from textual.geometry import Size
+from textual.geometry import Spacing
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets.data_table import CellDoesNotExist
+from textual.widgets.data_table import CellType
+
+from conda_tui.profiling import profiler
+
+ELLIPSIS = "\N{HORIZONTAL ELLIPSIS}"
+
+
+class VirtualTable(ScrollView, can_focus=True):
+    """A table which only renders the rows that are in view.
+
+    `DataTable` creates a `Row` and a dictionary of cells for every row, and
+    measures every cell as it is added. Here, cells are stored by column in
+    plain lists, and each line is rendered from those lists when it scrolls into
+    view. Only the lines in the viewport, plus `OVERSCAN` lines either side, are
+    kept rendered, so memory and render time depend on the height of the screen
+    rather than the number of rows.
+
+    Rows are addressed by string keys, and can be filtered like those of a
+    `BatchedDataTable`. The cursor always selects a whole row, and any number of
+    rows can be marked, e.g. to act on them together.
+
+    """
+
+    BINDINGS: ClassVar[list[Binding]] = [
+        Binding("enter", "select_cursor", "Select", show=False),
+        Binding("up", "cursor_up", "Cursor Up", show=False),
+        Binding("down", "cursor_down", "Cursor Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home", "scroll_top", "Top", show=False),
+        Binding("end", "scroll_bottom", "Bottom", show=False),
+        Binding("space", "toggle_mark", "Mark"),
+    ]
+
+    COMPONENT_CLASSES: ClassVar[set[str]] = {
+        "virtual-table--header",
+        "virtual-table--cursor",
+        "virtual-table--marked",
+    }
+
+    DEFAULT_CSS = """
+    VirtualTable {
+        background: $surface;
+        color: $text;
+        height: 1fr;
+    }
+    App.-dark VirtualTable {
+        background:;
+    }
+    VirtualTable > .virtual-table--header {
+        text-style: bold;
+        background: $primary;
+        color: $text;
+    }
+    VirtualTable > .virtual-table--cursor {
+        background: $secondary;
+        color: $text;
+    }
+    VirtualTable > .virtual-table--marked {
+        background: $accent 50%;
+        text-style: bold;
+    }
+    """
+
+    # The number of lines outside the viewport to render ahead of scrolling
+    OVERSCAN = 10
+    # The number of blank cells either side of each cell
+    CELL_PADDING = 1
+
+    cursor_row = reactive(0, repaint=False, always_update=True)
+
+    class RowSelected(Message):
+        """Posted when a row is selected, with enter or a click."""
+
+        def __init__(self, table: "VirtualTable", row_key: str) -> None:
+            super().__init__()
+            self.table = table
+            self.row_key = row_key
+
+        @property
+        def control(self) -> "VirtualTable":
+            return self.table
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._column_keys: list[str] = []
+        self._labels: list[str] = []
+        self._widths: list[int] = []
+        # The columnar store: one list of cells per column, and one key per row
+        self._columns: dict[str, list[CellType]] = {}
+        self._keys: list[str] = []
+        self._index: dict[str, int] = {}
+        # The indices of the visible rows, or None if no filter is applied
+        self._visible: Optional[list[int]] = None
+        # The indices of the marked rows, which stay marked while hidden
+        self._marked: set[int] = set()
+        # The styles of rows, the cursor and marked rows, updated before each render
+        self._row_style = Style()
+        self._cursor_style = Style()
+        self._marked_style = Style()
+        # Rendered lines, keyed by (row index, is cursor row), before cropping
+        self._line_cache: LRUCache[tuple[int, bool], Strip] = LRUCache(
+            2 * self.OVERSCAN
+        )
+
+    @property
+    def row_count(self) -> int:
+        """The number of visible rows."""
+        return len(self._keys) if self._visible is None else len(self._visible)
+
+    @property
+    def cursor_row_key(self) -> Optional[str]:
+        """The key of the row under the cursor, or None if the table is empty."""
+        if not 0 <= self.cursor_row < self.row_count:
+            return None
+        return self._keys[self._row_index(self.cursor_row)]
+
+    @property
+    def marked_row_keys(self) -> list[str]:
+        """The keys of the marked rows, including hidden ones, in order."""
+        return [self._keys[index] for index in sorted(self._marked)]
+
+    def _row_index(self, position: int) -> int:
+        """The index into the columnar store of a visible row."""
+        return position if self._visible is None else self._visible[position]
+
+    def add_column(self, label: str, *, key: str) -> None:
+        self._column_keys.append(key)
+        self._labels.append(label)
+        self._widths.append(cell_len(label))
+        self._columns[key] = [""] * len(self._keys)
+        self._data_changed()
+
+    def add_row(self, *cells: CellType, key: str) -> None:
+        self.add_rows([(key, cells)])
+
+    def add_rows(self, rows: Iterable[tuple[str, Sequence[CellType]]]) -> None:
+        """Append many rows, each given as (key, cells), with a single refresh.
+
+        While a filter is applied, new rows are hidden until it is next applied.
+
+        """
+        keys, cells = [], []
+        for key, row in rows:
+            if key in self._index:
+                raise ValueError(f"A row with key {key!r} already exists")
+            self._index[key] = len(self._keys) + len(keys)
+            keys.append(key)
+            cells.append(row)
+        if not keys:
+            return
+        self._keys.extend(keys)
+        for i, (key, column) in enumerate(zip(self._column_keys, zip(*cells))):
+            self._columns[key].extend(column)
+            self._widths[i] = max(self._widths[i], *map(_measure, column))
+        self._data_changed()
+
+    def remove_rows(self, row_keys: Iterable[str]) -> None:
+        """Remove rows by key, ignoring any keys which don't exist."""
+        removed = {self._index[key] for key in row_keys if key in self._index}
+        if removed:
+            self._reorder([i for i in range(len(self._keys)) if i not in removed])
+
+    def order_rows(self, row_keys: Iterable[str]) -> None:
+        """Move rows into the order of the given keys.
+
+        Any rows which are not given keep their order, after those which are.
+
+        """
+        order = list(
+            dict.fromkeys(self._index[key] for key in row_keys if key in self._index)
+        )
+        ordered = set(order)
+        order.extend(i for i in range(len(self._keys)) if i not in ordered)
+        self._reorder(order)
+
+    def _reorder(self, order: list[int]) -> None:
+        """Rebuild the store from the rows at the given indices, in order.
+
+        Marks and any filter are kept, and the cursor stays on the same row if
+        it still exists.
+
+        """
+        cursor_key = self.cursor_row_key
+        positions = {old: new for new, old in enumerate(order)}
+        self._keys = [self._keys[i] for i in order]
+        for key in self._column_keys:
+            column = self._columns[key]
+            self._columns[key] = [column[i] for i in order]
+        self._index = {key: i for i, key in enumerate(self._keys)}
+        self._marked = {positions[i] for i in self._marked if i in positions}
+        if self._visible is not None:
+            self._visible = sorted(
+                positions[i] for i in self._visible if i in positions
+            )
+        self._data_changed()
+        if cursor_key in self._index:
+            index = self._index[cursor_key]
+            self.cursor_row = (
+                index if self._visible is None else self._visible.index(index)
+            )
+        else:
+            self.cursor_row = self.cursor_row
+
+    def clear(self) -> None:
+        """Remove all rows, keeping the columns."""
+        self._keys.clear()
+        self._index.clear()
+        for key in self._column_keys:
+            self._columns[key] = []
+        self._widths = [cell_len(label) for label in self._labels]
+        self._visible = None
+        self._marked.clear()
+        self.cursor_row = 0
+        self.scroll_to(0, 0, animate=False)
+        self._data_changed()
+
+    def clear_marks(self) -> None:
+        self._marked.clear()
+        self._line_cache.clear()
+        self.refresh()
+
+    def get_cell(self, row_key: str, column_key: str) -> CellType:
+        try:
+            return self._columns[column_key][self._index[row_key]]
+        except KeyError:
+            raise CellDoesNotExist(
+                f"No cell exists for row_key={row_key!r}, column_key={column_key!r}."
+            ) from None
+
+    def update_cell(self, row_key: str, column_key: str, value: CellType) -> None:
+        self.update_cells({(row_key, column_key): value})
+
+    def update_cells(self, updates: Mapping[tuple[str, str], CellType]) -> None:
+        """Update many cells, identified by (row key, column key)."""
+        if not updates:
+            return
+        resized = False
+        for (row_key, column_key), value in updates.items():
+            try:
+                index = self._index[row_key]
+                self._columns[column_key][index] = value
+            except KeyError:
+                raise CellDoesNotExist(
+                    f"No cell exists for row_key={row_key!r}, column_key={column_key!r}."
+                ) from None
+            column = self._column_keys.index(column_key)
+            width = _measure(value)
+            if width > self._widths[column]:
+                self._widths[column] = width
+                resized = True
+            self._line_cache.discard((index, False))
+            self._line_cache.discard((index, True))
+        if resized:
+            self._data_changed()
+        else:
+            self.refresh()
+
+    def filter_rows(
+        self, row_keys: Optional[Iterable[str]], in_order: bool = False
+    ) -> None:
+        """Show only the rows with the given keys, or all rows if None.
+
+        Rows keep the order in which they were added, unless `in_order` is True,
+        in which case they're shown in the order of the given keys, e.g. ranked
+        by a search.
+
+        """
+        if row_keys is None:
+            self._visible = None
+        else:
+            index = self._index
+            visible = [index[key] for key in dict.fromkeys(row_keys) if key in index]
+            if not in_order:
+                visible.sort()
+            if len(visible) == len(self._keys) and visible == sorted(visible):
+                self._visible = None
+            else:
+                self._visible = visible
+        self.cursor_row = 0
+        self.scroll_to(0, 0, animate=False)
+        self._data_changed()
+
+    def _data_changed(self) -> None:
+        self._line_cache.clear()
+        padding = 2 * self.CELL_PADDING * len(self._widths)
+        self.virtual_size = Size(sum(self._widths) + padding, self.row_count + 1)
+        self.refresh()
+
+    def on_resize(self, event: events.Resize) -> None:
+        self._line_cache.grow(event.size.height + 2 * self.OVERSCAN)
+
+    def render_lines(self, crop: Region) -> list[Strip]:
+        with profiler.span("table.render"):
+            return self._render_lines(crop)
+
+    def _render_lines(self, crop: Region) -> list[Strip]:
+        # Computing a style is relatively expensive, so this is done once per frame
+        row_style = self.rich_style
+        if row_style != self._row_style:
+            self._row_style = row_style
+            self._line_cache.clear()
+        self._cursor_style = self.get_component_rich_style("virtual-table--cursor")
+        self._marked_style = self.get_component_rich_style("virtual-table--marked")
+        strips = super().render_lines(crop)
+        # Render the lines just outside of the viewport, so short scrolls are free
+        top = int(self.scroll_y)
+        bottom = top + self.size.height
+        for position in range(
+            max(0, top - self.OVERSCAN), min(self.row_count, bottom + self.OVERSCAN)
+        ):
+            self._get_row_strip(position)
+        return strips
+
+    def render_line(self, y: int) -> Strip:
+        width = self.size.width
+        scroll_x, scroll_y = self.scroll_offset
+        if y == 0:
+            strip = self._render_header()
+        else:
+            position = y - 1 + scroll_y
+            if position >= self.row_count:
+                return Strip.blank(width, self._row_style)
+            strip = self._get_row_strip(position)
+        return strip.crop_extend(scroll_x, scroll_x + width, self._row_style)
+
+    def _render_header(self) -> Strip:
+        style = self.get_component_rich_style("virtual-table--header")
+        return self._render_cells(self._labels, style)
+
+    def _get_row_strip(self, position: int) -> Strip:
+        index = self._row_index(position)
+        is_cursor = position == self.cursor_row
+        cache_key = (index, is_cursor)
+        strip = self._line_cache.get(cache_key)
+        if strip is None:
+            if is_cursor and self.has_focus:
+                style = self._cursor_style
+            elif index in self._marked:
+                style = self._marked_style
+            else:
+                style = self._row_style
+            cells = [self._columns[key][index] for key in self._column_keys]
+            strip = self._render_cells(cells, style)
+            self._line_cache.set(cache_key, strip)
+        return strip
+
+    def _render_cells(self, cells: Sequence[CellType], style: Style) -> Strip:
+        padding = Segment(" " * self.CELL_PADDING, style)
+        segments: list[Segment] = []
+        for cell, width in zip(cells, self._widths):
+            segments.append(padding)
+            if isinstance(cell, Text):
+                rendered = Segment.apply_style(
+                    cell.render(self.app.console), style=style
+                )
+                segments.extend(
+                    Segment.adjust_line_length(list(rendered), width, style)
+                )
+            else:
+                segments.append(Segment(_fit(str(cell), width), style))
+            segments.append(padding)
+        return Strip(Segment.simplify(segments), self.virtual_size.width)
+
+    def watch_cursor_row(self, old: int, new: int) -> None:
+        if not self.row_count:
+            return
+        clamped = max(0, min(new, self.row_count - 1))
+        if clamped != new:
+            self.cursor_row = clamped
+            return
+        for position in {old, new}:
+            if position < self.row_count:
+                self._line_cache.discard((self._row_index(position), True))
+                self._line_cache.discard((self._row_index(position), False))
+                self.refresh_lines(position + 1)
+        self.scroll_to_region(
+            Region(0, new + 1, 1, 1), spacing=Spacing(1, 0, 0, 0), animate=False
+        )
+
+    def on_focus(self) -> None:
+        self.cursor_row = self.cursor_row
+
+    def on_blur(self) -> None:
+        self.cursor_row = self.cursor_row
+
+    def on_click(self, event: events.Click) -> None:
+        if event.y == 0:
+            return
+        position = event.y - 1 + int(self.scroll_y)
+        if position < self.row_count:
+            self.cursor_row = position
+            self.action_select_cursor()
+
+    def action_select_cursor(self) -> None:
+        row_key = self.cursor_row_key
+        if row_key is not None:
+            self.post_message(self.RowSelected(self, row_key))
+
+    def action_toggle_mark(self) -> None:
+        """Mark or unmark the row under the cursor, and move to the next row."""
+        if self.cursor_row_key is None:
+            return
+        index = self._row_index(self.cursor_row)
+        self._marked.symmetric_difference_update({index})
+        self._line_cache.discard((index, True))
+        self._line_cache.discard((index, False))
+        self.cursor_row += 1
+
+    def action_cursor_up(self) -> None:
+        self.cursor_row -= 1
+
+    def action_cursor_down(self) -> None:
+        self.cursor_row += 1
+
+    def action_page_up(self) -> None:
+        self.cursor_row -= max(1, self.size.height - 1)
+
+    def action_page_down(self) -> None:
+        self.cursor_row += max(1, self.size.height - 1)
+
+    def action_scroll_top(self) -> None:
+        self.cursor_row = 0
+
+    def action_scroll_bottom(self) -> None:
+        self.cursor_row = self.row_count - 1
+
+
+def _measure(cell: CellType) -> int:
+    if isinstance(cell, str) and cell.isascii():
+        return len(cell)
+    if isinstance(cell, Text):
+        return cell.cell_len
+    return cell_len(str(cell))
+
+
+def _fit(text: str, width: int) -> str:
+    """Pad or truncate the text to exactly `width` cells."""
+    if cell_len(text) > width:
+        return set_cell_size(text, width - 1) + ELLIPSIS
+    return set_cell_size(text, width)
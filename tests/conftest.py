@@ -0,0 +1,26 @@
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from conda_tui.environment import Environment
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep everything which the tests cache out of the user's cache directory."""
+    monkeypatch.setenv("CONDA_TUI_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def make_prefix(tmp_path: Path) -> Callable[..., Environment]:
+    """Make an environment with an empty conda-meta, apart from its history."""
+
+    def make(name: str, history: str = "") -> Environment:
+        prefix = tmp_path / name
+        (prefix / "conda-meta").mkdir(parents=True)
+        (prefix / "conda-meta" / "history").write_text(history)
+        return Environment(prefix=prefix)
+
+    return make
@@ -0,0 +1,83 @@
+from pathlib import Path
+from typing import Callable
+
+from conda_tui.cache import get_cache_path
+from conda_tui.cache import prefix_lru_cache
+from conda_tui.cache import read_cache_file
+from conda_tui.cache import stat_signature
+from conda_tui.cache import write_cache_file
+from conda_tui.environment import Environment
+
+
+def test_cache_path_is_stable_per_prefix(cache_dir: Path) -> None:
+    path = get_cache_path("packages", Path("/opt/env"))
+    assert path.parent == cache_dir / "packages"
+    assert path == get_cache_path("packages", Path("/opt/env"))
+    assert path != get_cache_path("packages", Path("/opt/other"))
+
+
+def test_round_trip() -> None:
+    path = get_cache_path("packages", Path("/opt/env"))
+    assert read_cache_file(path, version=1) is None
+    write_cache_file(path, version=1, data={"records": {"a": 1}})
+    assert read_cache_file(path, version=1) == {"records": {"a": 1}, "version": 1}
+
+
+def test_version_mismatch_is_ignored() -> None:
+    path = get_cache_path("packages", Path("/opt/env"))
+    write_cache_file(path, version=1, data={})
+    assert read_cache_file(path, version=2) is None
+
+
+def test_corrupt_file_is_ignored() -> None:
+    path = get_cache_path("packages", Path("/opt/env"))
+    path.parent.mkdir(parents=True)
+    path.write_text("{not json")
+    assert read_cache_file(path, version=1) is None
+
+
+def test_stat_signature(tmp_path: Path) -> None:
+    path = tmp_path / "file.json"
+    assert stat_signature(path) is None
+    path.write_text("{}")
+    assert stat_signature(path) == (path.stat().st_mtime_ns, 2)
+
+
+def test_prefix_lru_cache_hits_and_evictions(
+    make_prefix: Callable[..., Environment],
+) -> None:
+    calls = []
+
+    @prefix_lru_cache(maxsize=2)
+    def load(env: Environment) -> str:
+        calls.append(env)
+        return env.prefix.name
+
+    a, b, c = (make_prefix(name) for name in "abc")
+    assert load(a) == "a"
+    assert load(a) == "a"
+    load(b)
+    load(c)  # Evicts a
+    load(a)
+
+    assert calls == [a, b, c, a]
+    info = load.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.size) == (1, 4, 2, 2)
+
+
+def test_prefix_lru_cache_invalidated_by_history(
+    make_prefix: Callable[..., Environment],
+) -> None:
+    calls = []
+
+    @prefix_lru_cache(maxsize=2)
+    def load(env: Environment) -> int:
+        calls.append(env)
+        return len(calls)
+
+    env = make_prefix("env")
+    assert load(env) == 1
+    with (env.prefix / "conda-meta" / "history").open("a") as fh:
+        fh.write("==> 2023-01-01 00:00:00 <==\n")
+    assert load(env) == 2
+    assert load.cache_info().invalidations == 1
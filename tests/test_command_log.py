@@ -0,0 +1,62 @@
+import asyncio
+from pathlib import Path
+
+from textual.app import App
+from textual.app import ComposeResult
+
+from conda_tui.widgets import CommandLog
+
+
+class LogApp(App):
+    def compose(self) -> ComposeResult:
+        yield CommandLog(max_lines=100)
+
+
+def test_output_is_buffered_bounded_and_spilled(tmp_path: Path) -> None:
+    async def run() -> None:
+        app = LogApp()
+        async with app.run_test():
+            log = app.query_one(CommandLog)
+            log.spill_to(tmp_path / "output.log")
+            log.append("partial")
+            log.append(" line\n")
+            log.append("".join(f"line {i}\n" for i in range(1000)))
+            log.append("no newline")
+            log.flush()
+            assert log.lines[-1] == "line 999"
+            assert len(log.lines) == 100
+            assert log.dropped_lines == 901
+
+            log.close()
+            assert log.lines[-1] == "no newline"
+
+        text = (tmp_path / "output.log").read_text()
+        assert text.startswith("partial line\nline 0\n")
+        assert text.endswith("line 999\nno newline")
+
+    asyncio.run(run())
+
+
+def test_carriage_returns_and_long_lines_are_not_held_back() -> None:
+    async def run() -> None:
+        app = LogApp()
+        async with app.run_test():
+            log = app.query_one(CommandLog)
+            # Progress bars which only redraw their line
+            for percent in (10, 50, 100):
+                log.append(f"\rDownloading: {percent}%")
+            log.append("\r")
+            log.flush()
+            assert log.lines[-2:] == ["Downloading: 10%", "Downloading: 50%"]
+            # Held back, since the "\r" may be the start of "\r\n"
+            assert log._pending == ["Downloading: 100%\r"]
+            log.append("\nDone\n")
+            log.flush()
+            assert log.lines[-2:] == ["Downloading: 100%", "Done"]
+
+            log.append("x" * CommandLog.MAX_PARTIAL_LENGTH)
+            log.flush()
+            assert log.lines[-1] == "x" * CommandLog.MAX_PARTIAL_LENGTH
+            assert log._pending == []
+
+    asyncio.run(run())
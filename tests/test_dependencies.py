@@ -0,0 +1,80 @@
+from typing import Callable
+
+from conda_tui.dependencies import Dependency
+from conda_tui.dependencies import DependencyGraph
+from conda_tui.dependencies import merge_specs
+from conda_tui.dependencies import requested_packages
+from conda_tui.dependencies import spec_name
+from conda_tui.environment import Environment
+
+
+def test_spec_name() -> None:
+    assert spec_name("python >=3.8,<3.12.0a0") == "python"
+    assert spec_name("libgcc-ng>=12") == "libgcc-ng"
+    assert spec_name("conda-forge::numpy[version='>=1.20']") == "numpy"
+    assert spec_name("__glibc >=2.17") == "__glibc"
+    assert spec_name("openssl") == "openssl"
+
+
+def test_dependency_graph() -> None:
+    graph = DependencyGraph(
+        {
+            "numpy": ["python >=3.11", "libblas >=3.9", "__glibc >=2.17"],
+            "pandas": ["numpy >=1.22", "python >=3.11"],
+            "python": ["openssl >=3"],
+            "libblas": [],
+        }
+    )
+    assert [d.name for d in graph.dependencies("numpy")] == [
+        "python",
+        "libblas",
+        "__glibc",
+    ]
+    assert graph.dependents("python") == [
+        Dependency("numpy", "python >=3.11"),
+        Dependency("pandas", "python >=3.11"),
+    ]
+    assert graph.dependents("pandas") == []
+    assert graph.dependents("openssl") == []
+    assert "openssl" not in graph
+    assert graph.all_dependencies(["pandas"]) == ["libblas", "numpy", "python"]
+    assert graph.all_dependents(["libblas", "openssl"]) == ["numpy", "pandas"]
+    assert graph.leaves() == ["pandas"]
+
+
+def test_transitive_queries_with_a_cycle() -> None:
+    graph = DependencyGraph({"a": ["b"], "b": ["c"], "c": ["a", "c"], "d": ["b"]})
+    assert graph.all_dependencies(["a"]) == ["b", "c"]
+    assert graph.all_dependents(["c"]) == ["a", "b", "d"]
+    assert graph.dependents("c") == [Dependency("b", "c")]
+    assert graph.leaves() == ["d"]
+
+
+def test_requested_packages(make_prefix: Callable[..., Environment]) -> None:
+    env = make_prefix(
+        "env",
+        "==> 2024-01-01 10:00:00 <==\n"
+        "# update specs: ['python=3.11', 'conda-forge::numpy']\n"
+        "==> 2024-02-01 10:00:00 <==\n"
+        "# remove specs: ['numpy']\n",
+    )
+    assert requested_packages(env) == {"python"}
+
+
+def test_specs_of_the_same_package_are_merged() -> None:
+    graph = DependencyGraph(
+        {
+            "pkg": ["python >=3.8", "zlib", "python <3.13", "zlib"],
+            "python": [],
+            "zlib": [],
+        }
+    )
+    # One row per package, since the detail screen keys its rows by name
+    assert merge_specs(graph.dependencies("pkg")) == [
+        Dependency("python", "python >=3.8, python <3.13"),
+        Dependency("zlib", "zlib"),
+    ]
+    assert len(graph.dependents("python")) == 2
+    assert merge_specs(graph.dependents("python")) == [
+        Dependency("pkg", "python <3.13, python >=3.8")
+    ]
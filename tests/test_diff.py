@@ -0,0 +1,69 @@
+from typing import Callable
+
+from conda_tui.diff import PackageChange
+from conda_tui.diff import PackageVersion
+from conda_tui.diff import count_changes
+from conda_tui.diff import diff_packages
+from conda_tui.diff import load_history
+from conda_tui.environment import Environment
+
+HISTORY = """\
+==> 2024-01-01 10:00:00 <==
+# cmd: conda create -n demo python=3.11
+# conda version: 23.11.0
++conda-forge/linux-64::openssl-3.2.0-hd590300_1
++conda-forge/linux-64::python-3.11.7-hab00c5b_1
++conda-forge/noarch::tzdata-2023d-h0c530f3_0
+# update specs: ['python=3.11']
+==> 2024-02-01 10:00:00 <==
+# cmd: conda update -n demo openssl
+-conda-forge/linux-64::openssl-3.2.0-hd590300_1
++conda-forge/linux-64::openssl-3.2.1-hd590300_0
+==> 2024-03-01 10:00:00 <==
+# cmd: conda remove -n demo tzdata
+# remove specs: ['tzdata']
+-conda-forge/noarch::tzdata-2023d-h0c530f3_0
+"""
+
+
+def test_diff_packages() -> None:
+    old = {
+        "numpy": PackageVersion("1.26.4", "py311_0", "conda-forge"),
+        "openssl": PackageVersion("3.2.0", "h0_1", "conda-forge"),
+        "zlib": PackageVersion("1.3", "h0_0", "conda-forge"),
+    }
+    new = {
+        "numpy": PackageVersion("1.26.4", "py311_0", "pkgs/main"),
+        "openssl": PackageVersion("3.2.1", "h0_0", "conda-forge"),
+        "attrs": PackageVersion("23.2.0", "pyh0_0", "conda-forge"),
+    }
+    changes = diff_packages(old, new)
+    assert [(change.name, change.kind) for change in changes] == [
+        ("attrs", "added"),
+        ("numpy", "changed"),
+        ("openssl", "changed"),
+        ("zlib", "removed"),
+    ]
+    assert count_changes(changes) == {"added": 1, "removed": 1, "changed": 2}
+    assert "numpy" not in {c.name for c in diff_packages(old, new, False)}
+    assert diff_packages(new, new) == []
+
+
+def test_load_history(make_prefix: Callable[..., Environment]) -> None:
+    revisions = load_history(make_prefix("demo", HISTORY))
+    assert [revision.number for revision in revisions] == [0, 1, 2]
+    assert revisions[0].command == "conda create -n demo python=3.11"
+    assert revisions[0].update_specs == ["python=3.11"]
+    assert revisions[0].packages["tzdata"] == PackageVersion(
+        "2023d", "h0c530f3_0", "conda-forge"
+    )
+    assert revisions[1].changes == [
+        PackageChange(
+            "openssl",
+            PackageVersion("3.2.0", "hd590300_1", "conda-forge"),
+            PackageVersion("3.2.1", "hd590300_0", "conda-forge"),
+        )
+    ]
+    assert sorted(revisions[2].packages) == ["openssl", "python"]
+    assert [change.kind for change in revisions[2].changes] == ["removed"]
+    assert revisions[2].remove_specs == ["tzdata"]
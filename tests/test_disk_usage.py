@@ -0,0 +1,49 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from conda_tui.disk_usage import DiskUsage
+from conda_tui.disk_usage import get_disk_usage
+from conda_tui.environment import Environment
+
+
+@pytest.fixture
+def prefix(tmp_path: Path, make_prefix: Callable[..., Environment]) -> Path:
+    prefix = make_prefix("env").prefix
+    (prefix / "lib").mkdir()
+    pkgs = tmp_path / "pkgs"
+    pkgs.mkdir()
+
+    # A file hard-linked from the package cache, and one linked twice in the prefix
+    (pkgs / "shared.so").write_bytes(b"x" * 1000)
+    os.link(pkgs / "shared.so", prefix / "lib" / "shared.so")
+    (prefix / "lib" / "own.py").write_bytes(b"y" * 100)
+    os.link(prefix / "lib" / "own.py", prefix / "lib" / "alias.py")
+
+    records = {
+        "a-1.0-0.json": {"files": ["lib/shared.so", "lib/own.py"]},
+        "b-1.0-0.json": {
+            "paths_data": {"paths": [{"_path": "lib/alias.py"}, {"_path": "lib/gone"}]}
+        },
+    }
+    for name, record in records.items():
+        (prefix / "conda-meta" / name).write_text(json.dumps(record))
+    return prefix
+
+
+def test_hard_links_are_counted_once(prefix: Path) -> None:
+    assert get_disk_usage(prefix) == DiskUsage(total=1100, unique=100)
+
+
+def test_cached_until_conda_meta_changes(prefix: Path) -> None:
+    assert get_disk_usage(prefix).total == 1100
+
+    # Changing an installed file alone leaves conda-meta, and so the cache, unchanged
+    (prefix / "lib" / "own.py").write_bytes(b"y" * 200)
+    assert get_disk_usage(prefix).total == 1100
+
+    (prefix / "conda-meta" / "c-1.0-0.json").write_text(json.dumps({"files": []}))
+    assert get_disk_usage(prefix).total == 1200
@@ -0,0 +1,40 @@
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+
+import pytest
+
+from conda_tui import environment
+from conda_tui.environment import Environment
+from conda_tui.environment import iter_environments
+
+pytest.importorskip("conda")
+
+
+def test_deleted_environments_are_dropped_from_the_cache(
+    tmp_path: Path,
+    make_prefix: Callable[..., Environment],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from conda.base import context
+
+    root = make_prefix("root").prefix
+    envs_dir = tmp_path / "envs"
+    envs_dir.mkdir()
+    monkeypatch.setattr(
+        context,
+        "context",
+        SimpleNamespace(root_prefix=str(root), envs_dirs=[str(envs_dir)]),
+    )
+    monkeypatch.setattr(environment, "_environments_txt_files", lambda: [])
+    env = make_prefix("envs/env").prefix
+
+    def prefixes() -> list[Path]:
+        return sorted(e.prefix for e in iter_environments())
+
+    assert prefixes() == sorted([root, env])
+    # Only from the cache, since the envs directory is unchanged
+    shutil.rmtree(env / "conda-meta")
+    assert prefixes() == [root]
+    assert prefixes() == [root]
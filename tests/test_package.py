@@ -0,0 +1,170 @@
+import json
+from pathlib import Path
+from typing import Any
+from typing import Callable
+
+import pytest
+
+from conda_tui import package
+from conda_tui.cache import get_cache_path
+from conda_tui.cache import read_cache_file
+from conda_tui.environment import Environment
+from conda_tui.package import LISTING_CACHE_VERSION
+from conda_tui.package import load_package_summaries
+from conda_tui.profiling import profiler
+
+pytest.importorskip("conda")
+
+
+def write_record(prefix: Path, name: str, version: str) -> Path:
+    path = prefix / "conda-meta" / f"{name}-{version}-0.json"
+    record = {
+        "name": name,
+        "version": version,
+        "build": "0",
+        "build_number": 0,
+        "channel": "https://conda.anaconda.org/conda-forge/linux-64",
+        "subdir": "linux-64",
+        "fn": f"{name}-{version}-0.conda",
+        "depends": [],
+    }
+    path.write_text(json.dumps(record))
+    return path
+
+
+@pytest.fixture
+def prefix(make_prefix: Callable[..., Environment]) -> Path:
+    prefix = make_prefix("env").prefix
+    for name in ("numpy", "openssl", "python"):
+        write_record(prefix, name, "1.0")
+    return prefix
+
+
+@pytest.fixture
+def full_loads(monkeypatch: pytest.MonkeyPatch) -> list[Path]:
+    """Record each time the whole prefix is loaded by conda."""
+    loads = []
+    load_prefix_data = package._load_prefix_data
+
+    def spy(prefix: Path) -> Any:
+        loads.append(prefix)
+        return load_prefix_data(prefix)
+
+    monkeypatch.setattr(package, "_load_prefix_data", spy)
+    return loads
+
+
+def load(prefix: Path) -> tuple[dict[str, str], int]:
+    """The installed versions, and the number of records which were parsed."""
+    profiler.clear()
+    summaries = load_package_summaries(prefix)
+    misses = profiler.cache_stats()["package listing"].misses
+    return {s.name: s.version for s in summaries}, misses
+
+
+@pytest.fixture(autouse=True)
+def enable_profiler(monkeypatch: pytest.MonkeyPatch) -> None:
+    # The profiler counts the records which are parsed
+    monkeypatch.setattr(profiler, "enabled", True)
+
+
+def test_warm_loads_only_parse_changed_records(
+    prefix: Path, full_loads: list[Path]
+) -> None:
+    versions = {"numpy": "1.0", "openssl": "1.0", "python": "1.0"}
+    assert load(prefix) == (versions, 3)
+    assert load(prefix) == (versions, 0)
+    assert len(full_loads) == 1
+
+    # Rewritten in place, as when a record is updated
+    path = prefix / "conda-meta" / "openssl-1.0-0.json"
+    path.write_text(path.read_text().replace('"1.0"', '"1.0.1"'))
+    assert load(prefix) == ({**versions, "openssl": "1.0.1"}, 1)
+    assert len(full_loads) == 1
+
+
+def test_added_and_removed_records_are_picked_up(
+    prefix: Path, full_loads: list[Path]
+) -> None:
+    load(prefix)
+    (prefix / "conda-meta" / "numpy-1.0-0.json").unlink()
+    write_record(prefix, "zlib", "1.3")
+
+    assert load(prefix) == ({"openssl": "1.0", "python": "1.0", "zlib": "1.3"}, 1)
+    assert len(full_loads) == 1
+    cached = read_cache_file(get_cache_path("packages", prefix), LISTING_CACHE_VERSION)
+    assert cached is not None
+    assert sorted(cached["records"]) == [
+        "openssl-1.0-0.json",
+        "python-1.0-0.json",
+        "zlib-1.3-0.json",
+    ]
+
+
+def test_site_packages_changes_reload_the_prefix(
+    prefix: Path, full_loads: list[Path]
+) -> None:
+    site_packages = prefix / "lib" / "python3.11" / "site-packages"
+    site_packages.mkdir(parents=True)
+    load(prefix)
+    assert load(prefix)[1] == 0
+
+    # Pip packages can only be found by loading the whole prefix
+    (site_packages / "attrs-23.2.0.dist-info").mkdir()
+    assert load(prefix)[0] == {"numpy": "1.0", "openssl": "1.0", "python": "1.0"}
+    assert len(full_loads) == 2
+
+
+def test_prefix_changes_are_seen_within_one_process(
+    prefix: Path, full_loads: list[Path]
+) -> None:
+    from conda.core.prefix_data import PrefixData
+
+    site_packages = prefix / "lib" / "python3.11" / "site-packages"
+    site_packages.mkdir(parents=True)
+    # conda caches this instance for the rest of the process, as its solver does
+    PrefixData(str(prefix), pip_interop_enabled=True).iter_records()
+    load(prefix)
+
+    # As when pip installs a package, or python is updated
+    for name in ("attrs", "zlib"):
+        write_record(prefix, name, "1.0")
+        (site_packages / f"{name}-1.0.dist-info").mkdir()
+        assert name in load(prefix)[0]
+    assert len(full_loads) == 3
+
+
+def test_cache_version_mismatch_rebuilds_the_listing(
+    prefix: Path, full_loads: list[Path], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    load(prefix)
+    monkeypatch.setattr(package, "LISTING_CACHE_VERSION", LISTING_CACHE_VERSION + 1)
+    assert load(prefix)[1] == 3
+    assert len(full_loads) == 2
+    assert load(prefix)[1] == 0
+
+
+@pytest.mark.parametrize(
+    "about",
+    [
+        # As written by conda-build
+        json.dumps({"extra": {"summary": "nested"}, "summary": "top"}, indent=2),
+        # Otherwise formatted, or with a nested summary at the same indentation
+        json.dumps({"extra": {"summary": "nested"}, "summary": "top"}),
+        json.dumps({"extra": {"summary": "nested"}, "summary": "top"}, indent=1),
+        json.dumps({"summary": "top", "license": "BSD"}, indent=4),
+    ],
+)
+def test_read_description(tmp_path: Path, about: str) -> None:
+    (tmp_path / "info").mkdir()
+    (tmp_path / "info" / "about.json").write_text(about)
+    assert package._read_description(str(tmp_path)) == "top"
+
+
+def test_description_cache_is_bounded() -> None:
+    cache = package._DescriptionCache(maxsize=2)
+    cache.update([("a", "A"), ("b", "B")])
+    assert cache.get("a") == "A"
+    cache.update([("c", "C")])
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("A", None, "C")
+    assert len(cache) == 2
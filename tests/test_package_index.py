@@ -0,0 +1,61 @@
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from conda_tui import package_index
+from conda_tui.environment import Environment
+from conda_tui.package import PackageSummary
+from conda_tui.package_index import PackageIndex
+from conda_tui.package_index import parse_query
+
+PACKAGES = {
+    "old": [("openssl", "1.1.1w"), ("python", "3.9.18")],
+    "new": [("openssl", "3.2.0"), ("python", "3.12.1"), ("pyopenssl", "24.0.0")],
+}
+
+
+@pytest.fixture
+def loaded(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Replace reading package listings, recording the environments which are read."""
+    loaded = []
+
+    def load_package_summaries(prefix: Path) -> list[PackageSummary]:
+        loaded.append(prefix.name)
+        return [
+            PackageSummary(name, version, "0", "conda-forge", None, "", "")
+            for name, version in PACKAGES[prefix.name]
+        ]
+
+    monkeypatch.setattr(package_index, "load_package_summaries", load_package_summaries)
+    return loaded
+
+
+def test_parse_query() -> None:
+    assert parse_query(" OpenSSL ") == ("openssl", "")
+    assert parse_query("openssl<3") == ("openssl", "<3")
+    assert parse_query("openssl >=1.1, <3") == ("openssl", ">=1.1,<3")
+
+
+def test_only_changed_environments_are_indexed_again(
+    make_prefix: Callable[..., Environment], loaded: list[str]
+) -> None:
+    old, new = (make_prefix(name) for name in PACKAGES)
+    index = PackageIndex.load()
+    assert set(index.refresh([old, new])) == {old, new}
+    assert [inst.environment for inst in index.find("openssl")] == [new, old]
+    assert [inst.name for inst in index.find("ssl")] == ["openssl"] * 2 + ["pyopenssl"]
+    index.save()
+
+    # Persisted, so nothing is read until an environment changes
+    index = PackageIndex.load()
+    assert list(index.refresh([old, new])) == []
+    with (new.prefix / "conda-meta" / "history").open("a") as fh:
+        fh.write("==> 2024-01-01 00:00:00 <==\n")
+    assert list(index.refresh([old, new])) == [new]
+    assert sorted(loaded) == ["new", "new", "old"]
+
+    # Environments which no longer exist are dropped
+    list(index.refresh([new]))
+    assert len(index) == 1
+    assert [inst.version for inst in index.find("openssl")] == ["3.2.0"]
@@ -0,0 +1,28 @@
+from conda_tui.profiling import Profiler
+
+
+def test_nothing_is_recorded_until_enabled() -> None:
+    profiler = Profiler()
+    with profiler.span("load"):
+        pass
+    profiler.count_cache("listing", hits=1)
+    assert profiler.spans == []
+    assert profiler.cache_stats() == {}
+
+
+def test_spans_and_caches_are_summarized_and_traced() -> None:
+    profiler = Profiler()
+    profiler.enabled = True
+
+    @profiler.traced("load")
+    def load() -> int:
+        return 1
+
+    assert load() + load() == 2
+    profiler.count_cache("listing", hits=3, misses=1)
+
+    assert profiler.span_stats()["load"].count == 2
+    assert profiler.cache_stats()["listing"].hit_ratio == 0.75
+    events = profiler.to_chrome_trace()["traceEvents"]
+    assert [event["ph"] for event in events] == ["M", "X", "X"]
+    assert events[1]["name"] == "load" and events[1]["dur"] >= 0
@@ -0,0 +1,59 @@
+import asyncio
+import sys
+
+from conda_tui.runner import CommandRunner
+
+
+def test_iter_chunks_streams_stdout_and_stderr() -> None:
+    command = [
+        sys.executable,
+        "-c",
+        "import sys; print('out', flush=True); print('err', file=sys.stderr)",
+    ]
+    runner = CommandRunner(command)
+
+    async def collect() -> list[str]:
+        return [chunk async for chunk in runner.iter_chunks()]
+
+    assert "".join(asyncio.run(collect())) == "out\nerr\n"
+    assert runner.returncode == 0
+
+
+def test_cancellation_kills_process() -> None:
+    runner = CommandRunner(
+        [
+            sys.executable,
+            "-c",
+            "import time; print('start', flush=True); time.sleep(60)",
+        ]
+    )
+
+    async def consume() -> None:
+        async for _ in runner.iter_chunks():
+            pass
+
+    async def main() -> None:
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.5)
+        task.cancel()
+        await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), 5)
+
+    asyncio.run(main())
+    assert runner.returncode is None
+
+
+def test_iter_chunks_keeps_multibyte_characters() -> None:
+    command = [
+        sys.executable,
+        "-c",
+        "import sys; sys.stdout.buffer.write('snake \\N{SNAKE}\\n'.encode() * 1000)",
+    ]
+    runner = CommandRunner(command)
+
+    async def collect() -> list[str]:
+        return [chunk async for chunk in runner.iter_chunks(size=7)]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 1
+    assert "".join(chunks) == "snake \N{SNAKE}\n" * 1000
+    assert runner.returncode == 0
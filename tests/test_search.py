@@ -0,0 +1,47 @@
+from conda_tui.search import SearchIndex
+
+DOCUMENTS = [
+    "numpy NumPy is the fundamental package for array computing conda-forge",
+    "pandas Powerful data structures for data analysis conda-forge",
+    "np-utils Small helpers pypi",
+    "python General purpose programming language defaults",
+]
+
+
+def test_empty_query_matches_everything():
+    index = SearchIndex(DOCUMENTS)
+    assert index.search("") == [0, 1, 2, 3]
+    assert index.search("   ") == [0, 1, 2, 3]
+
+
+def test_substring_is_case_insensitive():
+    index = SearchIndex(DOCUMENTS)
+    assert index.search("NUMPY") == [0]
+    assert index.search("data") == [1]
+
+
+def test_short_terms_are_scanned():
+    index = SearchIndex(DOCUMENTS)
+    assert index.search("py") == [0, 2, 3]
+
+
+def test_all_terms_must_match():
+    index = SearchIndex(DOCUMENTS)
+    assert index.search("conda-forge data") == [1]
+    assert index.search("conda-forge python") == []
+
+
+def test_no_match():
+    index = SearchIndex(DOCUMENTS)
+    assert index.search("xyz") == []
+
+
+def test_fuzzy_match_when_nothing_matches_exactly():
+    index = SearchIndex(DOCUMENTS + ["scikit-learn Machine learning in Python pypi"])
+    assert index.search("nmpy") == [0]
+    assert index.search("sklrn") == [4]
+    # Tighter matches rank first
+    assert SearchIndex(["nomadic-mapping-yaml", "numpy"]).search("nmpy") == [1, 0]
+    # Fuzzy terms must each match within a word
+    assert index.search("nmpy sklrn") == []
+    assert index.search("xz") == []
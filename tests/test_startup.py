@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+CHECK_IMPORTS = """
+import sys
+import conda_tui.app
+print(sorted(m for m in sys.modules if m.split(".")[0] == "conda"))
+"""
+
+
+def test_app_does_not_import_conda() -> None:
+    """Conda is only loaded once the home screen is drawn."""
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_IMPORTS],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
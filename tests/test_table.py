@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from textual.app import App
+from textual.app import ComposeResult
+from textual.widgets.data_table import CellDoesNotExist
+
+from conda_tui.widgets import BatchedDataTable
+
+
+class TableApp(App):
+    def compose(self) -> ComposeResult:
+        table: BatchedDataTable[str] = BatchedDataTable()
+        table.add_column("Name", key="name")
+        table.add_column("Version", key="version")
+        for i in range(10):
+            table.add_row(f"pkg-{i}", "1.0", key=f"pkg-{i}")
+        yield table
+
+
+def visible_names(table: BatchedDataTable) -> list[str]:
+    return [table.get_row_at(i)[0] for i in range(table.row_count)]
+
+
+def test_filter_rows() -> None:
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test(size=(40, 20)):
+            table = app.query_one(BatchedDataTable)
+            table.filter_rows(["pkg-5", "pkg-3", "missing"])
+            assert visible_names(table) == ["pkg-3", "pkg-5"]
+            assert table.get_row_index("pkg-5") == 1
+
+            table.filter_rows(["pkg-5", "pkg-3"], in_order=True)
+            assert visible_names(table) == ["pkg-5", "pkg-3"]
+
+            table.filter_rows([])
+            assert table.row_count == 0
+            table.filter_rows(None)
+            assert visible_names(table) == [f"pkg-{i}" for i in range(10)]
+
+    asyncio.run(run())
+
+
+def test_update_hidden_rows() -> None:
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test(size=(40, 20)):
+            table = app.query_one(BatchedDataTable)
+            table.filter_rows(["pkg-1"])
+            table.update_cells(
+                {("pkg-1", "version"): "2.0", ("pkg-7", "version"): "3.0"}
+            )
+            table.update_cell("pkg-8", "version", "4.0")
+            assert table.get_row_at(0) == ["pkg-1", "2.0"]
+            with pytest.raises(CellDoesNotExist):
+                table.update_cells({("missing", "version"): "1.0"})
+
+            table.filter_rows(None)
+            assert table.get_cell("pkg-7", "version") == "3.0"
+            assert table.get_row_at(8) == ["pkg-8", "4.0"]
+
+    asyncio.run(run())
+
+
+def test_add_and_remove_rows() -> None:
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test(size=(40, 20)):
+            table = app.query_one(BatchedDataTable)
+            table.filter_rows(["pkg-2", "pkg-4"])
+            table.remove_row("pkg-2")
+            table.remove_row("pkg-6")
+            table.add_row("pkg-10", "1.0", key="pkg-10")
+            assert visible_names(table) == ["pkg-4", "pkg-10"]
+            with pytest.raises(ValueError):
+                table.add_row("pkg-11", "1.0")
+
+            table.filter_rows(None)
+            assert table.row_count == 9
+            assert "pkg-2" not in visible_names(table)
+            assert "pkg-6" not in visible_names(table)
+            with pytest.raises(CellDoesNotExist):
+                table.get_cell("pkg-6", "name")
+
+            table.clear()
+            table.filter_rows(None)
+            assert table.row_count == 0
+
+    asyncio.run(run())
@@ -0,0 +1,53 @@
+"""The private parts of textual which the tables rely on.
+
+textual is pinned to a minor version, since these may change in any release.
+If these tests fail after raising the pin, the tables must be updated first.
+
+"""
+
+import asyncio
+
+from textual._cache import LRUCache
+from textual._two_way_dict import TwoWayDict
+from textual.app import App
+from textual.app import ComposeResult
+from textual.widgets import DataTable
+
+
+def test_lru_cache() -> None:
+    # Used by VirtualTable for its rendered lines
+    cache: LRUCache[int, str] = LRUCache(2)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.grow(3)
+    cache.set(3, "c")
+    assert cache.get(1) == "a"
+    cache.discard(1)
+    assert cache.get(1) is None
+    assert len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0
+
+
+class TableApp(App):
+    def compose(self) -> ComposeResult:
+        yield DataTable()
+
+
+def test_data_table_row_state() -> None:
+    # BatchedDataTable swaps these out to filter rows, and bumps the counters
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test():
+            table = app.query_one(DataTable)
+            table.add_column("Name", key="name")
+            row_key = table.add_row("numpy", key="numpy")
+            assert table.rows[row_key].key == row_key
+            assert table._data == {row_key: {"name": "numpy"}}
+            assert isinstance(table._row_locations, TwoWayDict)
+            assert table._row_locations.get(row_key) == 0
+            assert table._row_locations.get_key(0) == row_key
+            assert isinstance(table._update_count, int)
+            assert isinstance(table._require_update_dimensions, bool)
+
+    asyncio.run(run())
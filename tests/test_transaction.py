@@ -0,0 +1,78 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from conda_tui.environment import Environment
+from conda_tui.transaction import REMOVE
+from conda_tui.transaction import UPDATE
+from conda_tui.transaction import PackageTransaction
+from conda_tui.transaction import ProgressEvent
+from conda_tui.transaction import TransactionQueue
+from conda_tui.transaction import TransactionResult
+
+# Mimics the output of `conda update --json`
+FAKE_CONDA = """
+import json, sys
+for progress in (0.0, 0.4, 0.8, 1.0):
+    record = {"fetch": "numpy-1.26.0 ", "finished": progress == 1.0, "maxval": 1, "progress": progress}
+    sys.stdout.write(json.dumps(record) + "\\n\\0")
+    sys.stdout.flush()
+print(sys.argv[1])
+"""
+
+
+def run(result: dict) -> tuple[list[ProgressEvent], TransactionResult]:
+    transaction = PackageTransaction(
+        [sys.executable, "-c", FAKE_CONDA, json.dumps(result)]
+    )
+    events: list[ProgressEvent] = []
+    return events, asyncio.run(transaction.run(events.append))
+
+
+def test_transaction_streams_progress() -> None:
+    events, result = run(
+        {"success": True, "actions": {"LINK": [{"name": "numpy", "version": "1.26.0"}]}}
+    )
+    assert [event.fraction for event in events] == [0.0, 0.4, 0.8, 1.0]
+    assert events[0].description == "numpy-1.26.0"
+    assert events[-1].finished
+    assert result.success
+    assert result.linked == {"numpy": "1.26.0"}
+
+
+def test_transaction_failure() -> None:
+    _, result = run({"error": "PackagesNotFoundError", "message": "not found"})
+    assert not result.success
+    assert result.error == "not found"
+
+
+def test_transaction_without_conda(tmp_path: Path) -> None:
+    transaction = PackageTransaction([str(tmp_path / "conda"), "update"])
+    result = asyncio.run(transaction.run(lambda event: None))
+    assert not result.success
+    assert result.error.startswith(f"Could not run {tmp_path / 'conda'}")
+
+
+def test_queue_batches_pending_packages() -> None:
+    queue = TransactionQueue(Environment(prefix=Path("/env")))
+    queue.add(UPDATE, ["numpy"])
+    assert queue.take() == (UPDATE, ["numpy"])
+    # Packages queued while a transaction runs wait for the next one
+    queue.add(UPDATE, ["numpy", "scipy"])
+    queue.add(UPDATE, ["pandas", "scipy"])
+    queue.add(REMOVE, ["requests"])
+    assert queue.pending(UPDATE) == ["scipy", "pandas"]
+    queue.done()
+    assert queue.take() == (UPDATE, ["scipy", "pandas"])
+    queue.done()
+    assert queue.take() == (REMOVE, ["requests"])
+    assert not queue
+
+
+def test_queue_replaces_other_operations() -> None:
+    queue = TransactionQueue(Environment(prefix=Path("/env")))
+    queue.add(UPDATE, ["numpy", "scipy"])
+    queue.add(REMOVE, ["scipy"])
+    assert queue.pending(UPDATE) == ["numpy"]
+    assert queue.pending(REMOVE) == ["scipy"]
@@ -0,0 +1,156 @@
+import json
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from typing import Callable
+
+import pytest
+
+from conda_tui import updates
+from conda_tui.environment import Environment
+from conda_tui.updates import UpdateChecker
+
+
+def test_failed_checks_are_not_cached(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def get_solver_class() -> type:
+        raise RuntimeError("bad channel configuration")
+
+    monkeypatch.setattr(updates, "_get_solver_class", get_solver_class)
+    checker = UpdateChecker()
+    assert checker._check(tmp_path) is None
+
+    checks = []
+    monkeypatch.setattr(checker, "_check", lambda prefix: checks.append(prefix))
+    assert checker._check_cached(tmp_path, ttl=60) is None
+    assert checker._check_cached(tmp_path, ttl=60) is None
+    assert len(checks) == 2
+
+
+def test_solves_run_one_at_a_time(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pytest.importorskip("conda")
+    running = []
+    overlapped = threading.Event()
+
+    class Solver:
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            pass
+
+        def solve_for_diff(self, **kwargs: Any) -> tuple[list, list]:
+            running.append(self)
+            if len(running) > 1:
+                overlapped.set()
+            time.sleep(0.05)
+            running.remove(self)
+            return [], []
+
+    monkeypatch.setattr(updates, "_get_solver_class", lambda: Solver)
+    checker = UpdateChecker()
+    futures = [
+        checker._executor.submit(checker._check, tmp_path / str(i)) for i in range(4)
+    ]
+    assert [future.result() for future in futures] == [{}] * 4
+    assert not overlapped.is_set()
+
+
+def test_cached_results_are_invalidated(
+    make_prefix: Callable[..., Environment], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    env = make_prefix("env")
+    now = [1000.0]
+    repodata = [[3, 100]]
+    solved = []
+
+    def check(prefix: Path) -> dict[str, str]:
+        solved.append(prefix)
+        return {"openssl": f"3.{len(solved)}"}
+
+    monkeypatch.setattr(updates, "time", SimpleNamespace(time=lambda: now[0]))
+    monkeypatch.setattr(updates, "_repodata_state", lambda: repodata[0])
+    checker = UpdateChecker(ttl=60)
+    monkeypatch.setattr(checker, "_check", check)
+
+    assert checker._check_cached(env.prefix, checker.ttl) == {"openssl": "3.1"}
+    now[0] += 59
+    assert checker._check_cached(env.prefix, checker.ttl) == {"openssl": "3.1"}
+    assert len(solved) == 1
+
+    # Expired
+    now[0] += 2
+    assert checker._check_cached(env.prefix, checker.ttl) == {"openssl": "3.2"}
+
+    # The repodata was refreshed
+    repodata[0] = [3, 200]
+    assert checker._check_cached(env.prefix, checker.ttl) == {"openssl": "3.3"}
+
+    # The environment was changed
+    with (env.prefix / "conda-meta" / "history").open("a") as fh:
+        fh.write("==> 2024-01-01 00:00:00 <==\n")
+    assert checker._check_cached(env.prefix, checker.ttl) == {"openssl": "3.4"}
+    assert checker._check_cached(env.prefix, checker.ttl) == {"openssl": "3.4"}
+
+    # Forced, as when refreshing explicitly
+    assert checker._check_cached(env.prefix, 0) == {"openssl": "3.5"}
+    assert len(solved) == 5
+
+
+def test_solves_see_changes_to_the_prefix(
+    make_prefix: Callable[..., Environment], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pytest.importorskip("conda")
+    from conda.core.prefix_data import PrefixData
+
+    prefix = make_prefix("env").prefix
+    installed = []
+
+    class Solver:
+        def __init__(self, prefix: str, *args: Any, **kwargs: Any) -> None:
+            self.prefix = prefix
+
+        def solve_for_diff(self, **kwargs: Any) -> tuple[list, list]:
+            records = PrefixData(self.prefix).iter_records()
+            installed.append(sorted(record.name for record in records))
+            return [], []
+
+    monkeypatch.setattr(updates, "_get_solver_class", lambda: Solver)
+    checker = UpdateChecker()
+    for name in ("numpy", "zlib"):
+        record = {"name": name, "version": "1.0", "build": "0", "build_number": 0}
+        (prefix / "conda-meta" / f"{name}-1.0-0.json").write_text(json.dumps(record))
+        assert checker._check(prefix) == {}
+    assert installed == [["numpy"], ["numpy", "zlib"]]
+
+
+def test_channels_are_fetched_concurrently(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("conda")
+    from conda.core import subdir_data
+    from conda.models import channel
+
+    # Each fetch waits for the other, so they can only finish if run at once
+    barrier = threading.Barrier(2, timeout=5)
+    fetched = []
+
+    class SubdirData:
+        def __init__(self, url: str) -> None:
+            self.url = url
+
+        def load(self) -> None:
+            barrier.wait()
+            fetched.append(self.url)
+
+    class Solver:
+        pass
+
+    Solver.__module__ = "conda.core.solve"
+    monkeypatch.setattr(subdir_data, "SubdirData", SubdirData)
+    monkeypatch.setattr(channel, "Channel", str)
+    monkeypatch.setattr(channel, "all_channel_urls", lambda *args: ["main", "forge"])
+    checker = UpdateChecker(max_workers=2)
+    checker._load_channel_indexes(Solver)
+    checker._load_channel_indexes(Solver)
+    assert sorted(fetched) == ["forge", "main"]
@@ -0,0 +1,118 @@
+import asyncio
+
+from textual.app import App
+from textual.app import ComposeResult
+
+from conda_tui.widgets import VirtualTable
+
+
+class TableApp(App):
+    def compose(self) -> ComposeResult:
+        table = VirtualTable()
+        table.add_column("Name", key="name")
+        table.add_column("Version", key="version")
+        table.add_rows((f"pkg-{i}", (f"pkg-{i}", "1.0")) for i in range(1000))
+        yield table
+
+
+def test_only_visible_lines_are_rendered() -> None:
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test(size=(40, 10)) as pilot:
+            table = app.query_one(VirtualTable)
+            assert table.render_line(0).text.split() == ["Name", "Version"]
+            assert table.render_line(1).text.split() == ["pkg-0", "1.0"]
+            assert len(table._line_cache) <= 10 + 2 * table.OVERSCAN
+
+            await pilot.press("end")
+            assert table.cursor_row_key == "pkg-999"
+
+    asyncio.run(run())
+
+
+def test_filter_and_update_hidden_rows() -> None:
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test(size=(40, 10)) as pilot:
+            table = app.query_one(VirtualTable)
+            table.filter_rows(["pkg-5", "pkg-3"])
+            assert table.row_count == 2
+            assert table.cursor_row_key == "pkg-3"
+
+            table.update_cell("pkg-7", "version", "2.0")
+            table.filter_rows(None)
+            await pilot.pause()
+            assert table.row_count == 1000
+            assert table.get_cell("pkg-7", "version") == "2.0"
+            assert table.render_line(8).text.split() == ["pkg-7", "2.0"]
+
+    asyncio.run(run())
+
+
+def test_filter_rows_in_order() -> None:
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test(size=(40, 10)):
+            table = app.query_one(VirtualTable)
+            table.filter_rows(["pkg-5", "pkg-3", "missing"], in_order=True)
+            assert table.cursor_row_key == "pkg-5"
+            assert [table.render_line(y).text.split()[0] for y in (1, 2)] == [
+                "pkg-5",
+                "pkg-3",
+            ]
+
+            # Every row, but not in the order they were added
+            table.filter_rows(
+                (f"pkg-{i}" for i in reversed(range(1000))), in_order=True
+            )
+            assert table.row_count == 1000
+            assert table.cursor_row_key == "pkg-999"
+
+    asyncio.run(run())
+
+
+def test_marked_rows_survive_filtering() -> None:
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test(size=(40, 10)) as pilot:
+            table = app.query_one(VirtualTable)
+            await pilot.press("space", "down", "space")
+            assert table.marked_row_keys == ["pkg-0", "pkg-2"]
+            assert table.cursor_row_key == "pkg-3"
+
+            table.filter_rows(["pkg-2"])
+            await pilot.press("space")
+            table.filter_rows(["pkg-5"])
+            assert table.marked_row_keys == ["pkg-0"]
+
+            table.clear_marks()
+            assert table.marked_row_keys == []
+
+    asyncio.run(run())
+
+
+def test_remove_and_order_rows() -> None:
+    async def run() -> None:
+        app = TableApp()
+        async with app.run_test(size=(40, 10)) as pilot:
+            table = app.query_one(VirtualTable)
+            await pilot.press("down", "space", "space")
+            table.filter_rows(["pkg-1", "pkg-2", "pkg-3"])
+            table.cursor_row = 2
+
+            table.remove_rows(["pkg-0", "pkg-2", "missing"])
+            assert table.row_count == 2
+            assert table.cursor_row_key == "pkg-3"
+            assert table.marked_row_keys == ["pkg-1"]
+
+            table.order_rows(["pkg-3", "pkg-1"])
+            assert table.cursor_row_key == "pkg-3"
+            table.filter_rows(None)
+            assert table.row_count == 998
+            assert [table.render_line(y).text.split()[0] for y in (1, 2, 3)] == [
+                "pkg-3",
+                "pkg-1",
+                "pkg-4",
+            ]
+
+    asyncio.run(run())
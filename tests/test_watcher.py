@@ -0,0 +1,66 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from conda_tui.watcher import Watcher
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_bursts_of_changes_are_coalesced(tmp_path: Path, use_inotify: bool) -> None:
+    conda_meta = tmp_path / "prefix" / "conda-meta"
+    conda_meta.mkdir(parents=True)
+    # A file which does not exist yet
+    environments_txt = tmp_path / "environments.txt"
+
+    calls: list[str] = []
+    called = threading.Event()
+
+    def callback(key: str) -> None:
+        calls.append(key)
+        called.set()
+
+    watcher = Watcher(use_inotify=use_inotify)
+    try:
+        watcher.watch("prefix", [conda_meta], lambda: callback("prefix"))
+        watcher.watch("envs", [environments_txt], lambda: callback("envs"))
+        # Let the poller take its first snapshot
+        time.sleep(0.1)
+
+        for i in range(20):
+            (conda_meta / f"package-{i}.json").write_text("{}")
+        assert called.wait(5)
+        time.sleep(0.5)
+        assert calls == ["prefix"]
+
+        called.clear()
+        environments_txt.write_text(str(tmp_path / "prefix"))
+        assert called.wait(5)
+        assert calls == ["prefix", "envs"]
+    finally:
+        watcher.stop()
+
+
+def test_stop_does_not_wait_for_a_blocked_callback(tmp_path: Path) -> None:
+    blocked = threading.Event()
+    release = threading.Event()
+
+    def callback() -> None:
+        blocked.set()
+        release.wait(10)
+
+    watcher = Watcher(use_inotify=False)
+    watcher.watch("dir", [tmp_path], callback)
+    time.sleep(0.1)
+    (tmp_path / "file").write_text("")
+    assert blocked.wait(5)
+
+    started = time.monotonic()
+    watcher.stop(timeout=0.1)
+    assert time.monotonic() - started < 1
+    release.set()
+    # Safe once stopped, even though the thread may still be running
+    watcher.unwatch("dir")
+    watcher.stop()
+    watcher.stop()